@@ -0,0 +1,105 @@
+"""
+Reports how long the hot path of the CLI (`easywindowswitcher monitor`/`direction`) takes to import, per module.
+
+Usage (from the root of the repo):
+
+    python3 benchmarks/import_time.py [--runs 5] [--top 15] [--budget-ms 40] [--full]
+
+Each run is a fresh interpreter using `python -X importtime`, and every number reported is the median across runs.
+Exits with a non-zero status if any of the modules that the hot path should never import got imported,
+or if the total import time is over the (optional) budget.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_FOLDER)
+
+from easywindowswitcher.fast_main import DEFERRED_MODULES, HOT_PATH_MODULES  # noqa: E402
+
+# What the full CLI imports, for comparison
+FULL_CLI_MODULES = ("easywindowswitcher.main",)
+
+# Self and cumulative import time (in microseconds) of each module
+ImportTimes = Dict[str, Tuple[int, int]]
+
+
+def measure_import_times(modules: Tuple[str, ...]) -> ImportTimes:
+    """Imports the modules in a fresh interpreter, returning how long each (transitively) imported module took."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import {}".format(", ".join(modules))],
+        cwd=REPO_FOLDER,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+
+    import_times = {}  # type: ImportTimes
+
+    # Example line: "import time:       207 |       2213 |           easywindowswitcher.services.monitor_detection"
+    for line in result.stderr.decode("utf8").split("\n"):
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_time, cumulative_time, module = line[len("import time:"):].split("|")
+        import_times[module.strip()] = (int(self_time), int(cumulative_time))
+
+    return import_times
+
+
+def median_import_times(runs: List[ImportTimes]) -> ImportTimes:
+    modules = set(module for run in runs for module in run)
+
+    return {
+        module: (
+            int(statistics.median(run[module][0] for run in runs if module in run)),
+            int(statistics.median(run[module][1] for run in runs if module in run)),
+        )
+        for module in modules
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="How many fresh interpreters to measure.")
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest modules to list.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if the total is over this budget.")
+    parser.add_argument("--full", action="store_true", help="Measure the full (click) CLI instead of the hot path.")
+    args = parser.parse_args()
+
+    modules = FULL_CLI_MODULES if args.full else HOT_PATH_MODULES
+    runs = [measure_import_times(modules) for _ in range(args.runs)]
+    import_times = median_import_times(runs)
+
+    total_time = statistics.median(sum(self_time for self_time, _ in run.values()) for run in runs) / 1000
+
+    print("Import time of {} (median of {} runs): {:.1f}ms\n".format(", ".join(modules), args.runs, total_time))
+    print("{:>10} {:>12}  {}".format("self (ms)", "cumul. (ms)", "module"))
+
+    slowest_modules = sorted(import_times.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+
+    for module, (self_time, cumulative_time) in slowest_modules:
+        print("{:>10.2f} {:>12.2f}  {}".format(self_time / 1000, cumulative_time / 1000, module))
+
+    failed = False
+
+    if not args.full:
+        imported_deferred_modules = [module for module in DEFERRED_MODULES if module in import_times]
+
+        if imported_deferred_modules:
+            print("\nThe hot path imported modules it should defer: {}".format(", ".join(imported_deferred_modules)))
+            failed = True
+
+    if args.budget_ms is not None and total_time > args.budget_ms:
+        print("\nOver the import time budget of {:.1f}ms".format(args.budget_ms))
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Replays a recorded session through the full CLI, to measure the end-to-end latency of each command without an X session.
+
+Record a session by setting EASYWINDOWSWITCHER_RECORD for the commands being run (e.g. in your keyboard shortcuts):
+
+    EASYWINDOWSWITCHER_RECORD=~/session.trace easywindowswitcher direction left
+
+Then replay it (from the root of the repo):
+
+    python3 benchmarks/replay.py ~/session.trace [--modes cold,snapshot,daemon] [--delays wmctrl=4,xdotool=3]
+                                                 [--snapshot-ttl 1] [--repeats 3]
+
+Every `monitor`/`direction` command of the trace is run in order through the CLI, against a stand-in for the wmctrl
+backend that answers every `wmctrl`/`xdotool` command with the output it had when it was recorded. The commands run
+in this process, so the interpreter's startup isn't included (see `make import-time` for that).
+
+Each call to the stand-in sleeps for its program's delay (in milliseconds), to stand in for the cost of spawning it;
+the delays are 0 by default, which leaves just the time spent in easywindowswitcher itself. Different backends can be
+compared by changing the delays, e.g. ~4ms per call for spawning wmctrl, versus ~0.2ms for a round trip to the X
+server with the x11 backend.
+
+The modes are how the state of the desktop is (or isn't) kept between commands:
+
+- cold: a fresh focuser for every command, like separate invocations of the CLI.
+- snapshot: the same, but sharing snapshots of the desktop between them (with --snapshot-ttl).
+- daemon: a single focuser that re-queries the desktop for every command, like the daemon with the wmctrl backend.
+
+For each mode, reports the latency percentiles of the commands, how many calls of each command they made to the
+backend (per command), and how many of them focused a different window than they did when they were recorded.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Tuple
+from typing import Optional  # noqa
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_FOLDER)
+
+from easywindowswitcher import main as cli_main  # noqa: E402
+from easywindowswitcher.commands import root  # noqa: E402
+from easywindowswitcher.data_models import MonitorTopology  # noqa: E402
+from easywindowswitcher.data_models.monitor_topology import DEFAULT_MONITORS  # noqa: E402
+from easywindowswitcher.external_services.wmctrl import WMCtrl  # noqa: E402
+from easywindowswitcher.external_services.xrandr import XRandR  # noqa: E402
+from easywindowswitcher.fast_main import parse_hot_command  # noqa: E402
+from easywindowswitcher.services.focus_history import FocusHistory  # noqa: E402
+from easywindowswitcher.services.snapshot_cache import SNAPSHOT_TTL_ENVIRONMENT_VARIABLE, SnapshotCache  # noqa: E402
+from easywindowswitcher.services.window_focuser import WindowFocuser  # noqa: E402
+from easywindowswitcher.utils import recorder  # noqa: E402
+from easywindowswitcher.utils.profiler import LatencyHistogram  # noqa: E402
+
+MODE_COLD = "cold"
+MODE_SNAPSHOT = "snapshot"
+MODE_DAEMON = "daemon"
+
+MODES = (MODE_COLD, MODE_SNAPSHOT, MODE_DAEMON)
+
+# The commands of the trace that get replayed
+REPLAYED_COMMANDS = ("monitor", "direction")
+
+FOCUS_COMMAND = ["wmctrl", "-i", "-a"]
+MONITORS_COMMAND = ["xrandr", "--listmonitors"]
+
+# A command, as it was run, e.g. ("wmctrl", "-l", "-G", "-x")
+CommandKey = Tuple[str, ...]
+
+
+class Invocation(NamedTuple):
+    args: List[str]
+    # The output of every command, as it was when the invocation was recorded
+    outputs: Dict[CommandKey, str]
+    # The windows that the invocation focused when it was recorded
+    focused_window_ids: List[int]
+
+
+class Result(NamedTuple):
+    latencies: Dict[str, float]
+    calls_per_invocation: Dict[str, float]
+    mismatches: int
+
+
+class ReplayBackend(WMCtrl):
+    """A stand-in for the wmctrl backend that answers its commands with their recorded output."""
+
+    def __init__(self, delays: Dict[str, float]) -> None:
+        """
+        :param delays: How long (in seconds) a call to each program (e.g. "wmctrl") takes.
+        """
+        super().__init__()
+
+        self.delays = delays
+        self.outputs = {}  # type: Dict[CommandKey, str]
+
+        self.call_counts = Counter()  # type: Counter[str]
+        self.focused_window_ids = []  # type: List[int]
+
+        # Queries can be run concurrently (see WMCtrl.CONCURRENT_QUERIES)
+        self._lock = threading.Lock()
+
+    def _get_command_output(self, command: List[str]) -> str:
+        self._call(command)
+        return self.outputs.get(tuple(command), "")
+
+    def _call_command(self, command: List[str], wait: bool = True) -> bool:
+        self._call(command)
+
+        if command[:len(FOCUS_COMMAND)] == FOCUS_COMMAND:
+            with self._lock:
+                self.focused_window_ids.append(int(command[-1]))
+
+        return True
+
+    def _call(self, command: List[str]) -> None:
+        # Window IDs (e.g. of the window being focused) would make every call of the same command look different
+        name = " ".join(arg for arg in command if not arg.isdigit())
+
+        with self._lock:
+            self.call_counts[name] += 1
+
+        delay = self.delays.get(command[0], 0)
+
+        if delay:
+            time.sleep(delay)
+
+
+def load_invocations(trace_path: str) -> Tuple[List[Invocation], MonitorTopology]:
+    """
+    Loads the replayable invocations of a trace, along with the monitor topology that was in use when recording it.
+
+    Invocations that didn't run some of the commands (e.g. because they used a snapshot or a different backend)
+    get the most recently recorded output of those commands.
+    """
+    recorded_invocations = recorder.group_by_invocation(recorder.read_trace(trace_path))
+
+    latest_outputs = {}  # type: Dict[CommandKey, str]
+    monitor_topology = None  # type: Optional[MonitorTopology]
+
+    # Start out with the first output of each command, for the invocations before it was first recorded
+    for recorded_invocation in reversed(recorded_invocations):
+        for event in reversed(recorded_invocation["events"]):
+            if event["event"] == recorder.EVENT_OUTPUT:
+                latest_outputs[tuple(event["command"])] = event["output"]
+
+    invocations = []  # type: List[Invocation]
+
+    for recorded_invocation in recorded_invocations:
+        focused_window_ids = []  # type: List[int]
+
+        for event in recorded_invocation["events"]:
+            if event["event"] == recorder.EVENT_OUTPUT:
+                latest_outputs[tuple(event["command"])] = event["output"]
+            elif event["event"] == recorder.EVENT_CALL and event["command"][:len(FOCUS_COMMAND)] == FOCUS_COMMAND:
+                focused_window_ids.append(int(event["command"][-1]))
+            elif event["event"] == recorder.EVENT_MONITOR_TOPOLOGY and monitor_topology is None:
+                monitor_topology = MonitorTopology.from_dict(event["topology"])
+
+        command = parse_hot_command(recorded_invocation.get("args", []))
+
+        if command is not None and command.name in REPLAYED_COMMANDS:
+            args = (["--across-workspaces"] if command.across_workspaces else []) + [command.name, command.value]
+            invocations.append(Invocation(args, dict(latest_outputs), focused_window_ids))
+
+    if monitor_topology is None:
+        monitors = XRandR()._parse_monitors_config(latest_outputs.get(tuple(MONITORS_COMMAND), ""))
+        monitor_topology = MonitorTopology(monitors or DEFAULT_MONITORS)
+
+    return (invocations, monitor_topology)
+
+
+def replay(
+    mode: str,
+    invocations: List[Invocation],
+    monitor_topology: MonitorTopology,
+    delays: Dict[str, float],
+    snapshot_ttl: float,
+    repeats: int,
+    temp_dir: str
+) -> Result:
+    backend = ReplayBackend(delays)
+    focus_history = FocusHistory(os.path.join(temp_dir, "{}_focus_history.bin".format(mode)))
+    snapshot_cache = (
+        SnapshotCache(os.path.join(temp_dir, "{}_snapshot.bin".format(mode)), snapshot_ttl)
+        if mode == MODE_SNAPSHOT else None
+    )
+
+    def create_focuser() -> WindowFocuser:
+        return WindowFocuser(
+            backend=backend,
+            monitor_topology=monitor_topology,
+            focus_history=focus_history,
+            snapshot_cache=snapshot_cache
+        )
+
+    focuser = create_focuser()
+    across_workspaces = focuser.across_workspaces
+    histogram = LatencyHistogram(size=len(invocations) * repeats)
+    mismatches = 0
+
+    for _ in range(repeats):
+        for invocation in invocations:
+            backend.outputs = invocation.outputs
+            backend.focused_window_ids = []
+
+            if mode == MODE_DAEMON:
+                focuser.invalidate()
+
+                # The option only applies to the invocation that has it, not to the ones after it
+                focuser.across_workspaces = across_workspaces
+            else:
+                focuser = create_focuser()
+
+            # The commands use whichever focuser is the CLI's at the time
+            root.window_focuser_service = focuser
+
+            start = time.perf_counter()
+            cli_main.cli.main(args=invocation.args, prog_name="easywindowswitcher", standalone_mode=False)
+            histogram.record(time.perf_counter() - start)
+
+            if backend.focused_window_ids != invocation.focused_window_ids:
+                mismatches += 1
+
+    invocation_count = max(len(invocations) * repeats, 1)
+
+    return Result(
+        histogram.report(),
+        {name: count / invocation_count for name, count in sorted(backend.call_counts.items())},
+        mismatches
+    )
+
+
+def parse_delays(delays: str) -> Dict[str, float]:
+    """Parses e.g. "wmctrl=4,xdotool=3" (in milliseconds) into the delay of each program (in seconds)."""
+    parsed_delays = {}  # type: Dict[str, float]
+
+    for delay in filter(None, delays.split(",")):
+        program, _, milliseconds = delay.partition("=")
+        parsed_delays[program.strip()] = float(milliseconds) / 1000
+
+    return parsed_delays
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="The trace file that was recorded with EASYWINDOWSWITCHER_RECORD.")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma separated modes to replay the trace in.")
+    parser.add_argument("--delays", default="", help="Comma separated program=milliseconds delays per call.")
+    parser.add_argument("--snapshot-ttl", type=float, default=1.0, help="The snapshot TTL (in seconds) for snapshot.")
+    parser.add_argument("--repeats", type=int, default=1, help="How many times to replay the whole trace.")
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    unknown_modes = [mode for mode in modes if mode not in MODES]
+
+    if unknown_modes:
+        parser.error("Unknown modes: {}. Valid modes are: [{}]".format(", ".join(unknown_modes), ", ".join(MODES)))
+
+    try:
+        delays = parse_delays(args.delays)
+    except ValueError:
+        parser.error("Invalid delays: {}".format(args.delays))
+
+    # Neither replaying into the trace, nor letting the environment turn on snapshots for the other modes
+    os.environ.pop(recorder.RECORD_ENVIRONMENT_VARIABLE, None)
+    os.environ.pop(SNAPSHOT_TTL_ENVIRONMENT_VARIABLE, None)
+
+    # The commands' own messages (e.g. "No window to focus to.") would drown out the report
+    logging.disable(logging.INFO)
+
+    invocations, monitor_topology = load_invocations(args.trace)
+
+    if not invocations:
+        print("The trace doesn't have any {} commands to replay".format("/".join(REPLAYED_COMMANDS)))
+        return 1
+
+    print("{} commands, {} monitors, {} repeats, delays: {}\n".format(
+        len(invocations), len(monitor_topology.monitors), args.repeats, args.delays or "none"
+    ))
+    print("{:<10}{:>10}{:>10}{:>10}{:>12}  calls per command".format(
+        "mode", "p50_ms", "p95_ms", "p99_ms", "mismatches"
+    ))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mode in modes:
+            result = replay(
+                mode, invocations, monitor_topology, delays, args.snapshot_ttl, args.repeats, temp_dir
+            )
+
+            print("{:<10}{:>10.3f}{:>10.3f}{:>10.3f}{:>12}  {}".format(
+                mode,
+                result.latencies["p50_ms"],
+                result.latencies["p95_ms"],
+                result.latencies["p99_ms"],
+                result.mismatches,
+                ", ".join("{}: {:.2f}".format(name, calls) for name, calls in result.calls_per_invocation.items())
+            ))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Microbenchmarks for the parsing and indexing paths, using synthetic `wmctrl` output (see synthetic.py).
+
+Usage (from the root of the repo):
+
+    python3 benchmarks/run_benchmarks.py [--windows 100,200,400,800,1600] [--monitors 4] [--grid 3x3]
+                                         [--repeats 7] [--min-time 0.1] [--only parse_windows_config,...]
+
+Every benchmark is run against each window count in isolation: all of the state it depends on is built beforehand,
+and only the one path is timed. Each timing is the median of several repeats, where each repeat runs the path enough
+times to take at least --min-time seconds. The spread is the interquartile range of the repeats, relative to the
+median; anything more than a few percent means the numbers are too noisy to compare.
+
+The scaling exponent is the slope of the time against the window count on a log-log scale:
+~0 is constant, ~1 is linear, and anything much above 1 grows faster than the number of windows.
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import timeit
+from typing import Callable, List, NamedTuple, Sequence
+from typing import Dict  # noqa
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_FOLDER)
+
+from benchmarks import synthetic  # noqa: E402
+from easywindowswitcher.external_services.wmctrl import WMCtrl  # noqa: E402
+from easywindowswitcher.services import window_table  # noqa: E402
+from easywindowswitcher.services.focus_history import FocusHistory  # noqa: E402
+from easywindowswitcher.services.window_focuser import WindowFocuser  # noqa: E402
+
+# The focuser's memoized state that depends on the windows, i.e. what a fresh snapshot has to rebuild
+DERIVED_STATE = (
+    "current_workspace_windows",
+    "current_windows_by_monitor_index",
+    "current_monitors_by_window_index",
+    "current_monitor",
+    "workspace_index",
+) + WindowFocuser.GEOMETRY_DERIVED_STATE
+
+
+class Case(NamedTuple):
+    window_count: int
+    workspace_config: str
+    windows_config: str
+    focuser: WindowFocuser
+
+
+class Timing(NamedTuple):
+    median: float
+    spread: float
+
+
+def create_case(desktop: synthetic.Desktop, window_count: int) -> Case:
+    workspace_config = synthetic.generate_workspace_config(desktop)
+    windows_config = synthetic.generate_windows_config(desktop, window_count)
+
+    wmctrl = WMCtrl()
+    workspace_grid, current_workspace = wmctrl._parse_system_config(workspace_config)
+    windows = wmctrl._parse_windows_config(windows_config)
+
+    focuser = WindowFocuser(backend=wmctrl, monitor_topology=desktop.topology, focus_history=FocusHistory())
+    focuser.load_snapshot(workspace_grid, current_workspace, windows, 0)
+
+    # Focus the window in the middle of the current workspace, so that no direction is a trivial edge case
+    current_workspace_windows = focuser.current_workspace_windows
+
+    if current_workspace_windows:
+        focuser.current_focused_window_id = current_workspace_windows[len(current_workspace_windows) // 2].id
+        focuser.forget(["current_monitor"])
+
+    return Case(window_count, workspace_config, windows_config, focuser)
+
+
+def forget_derived_state(focuser: WindowFocuser) -> None:
+    focuser.forget(DERIVED_STATE)
+
+
+def closest_window_cold(case: Case, direction: str) -> None:
+    forget_derived_state(case.focuser)
+    case.focuser._get_closest_window(direction)
+
+
+def index_current_workspace(case: Case) -> None:
+    """All of the current workspace's indices, built one window at a time."""
+    focuser = case.focuser
+    current_workspace_windows = focuser._get_current_workspace_windows()
+
+    focuser._index_windows_by_monitor(current_workspace_windows)
+    focuser._index_monitors_by_window(current_workspace_windows)
+
+
+def index_window_table(case: Case) -> None:
+    """All of the current workspace's indices, built at once with a (NumPy) window table."""
+    focuser = case.focuser
+
+    window_table.index_current_workspace(
+        focuser.windows,
+        focuser.workspace_grid.workspace_width,
+        focuser.workspace_grid.workspace_height,
+        focuser.monitor_topology
+    )
+
+
+BENCHMARKS = {
+    "parse_windows_config": lambda case: WMCtrl()._parse_windows_config(case.windows_config),
+    "parse_system_config": lambda case: WMCtrl()._parse_system_config(case.workspace_config),
+    "get_current_workspace_windows": lambda case: case.focuser._get_current_workspace_windows(),
+    "index_windows_by_monitor": lambda case: case.focuser._index_windows_by_monitor(
+        case.focuser.current_workspace_windows
+    ),
+    "index_current_workspace": index_current_workspace,
+    "build_navigation_table": lambda case: case.focuser._build_navigation_table(
+        case.focuser.current_windows_by_monitor_index
+    ),
+    # With the indices already built (e.g. by the daemon), and with them being rebuilt from the snapshot
+    "get_closest_window_right": lambda case: case.focuser._get_closest_window("right"),
+    "get_closest_window_down": lambda case: case.focuser._get_closest_window("down"),
+    "get_closest_window_right_cold": lambda case: closest_window_cold(case, "right"),
+    "get_closest_window_down_cold": lambda case: closest_window_cold(case, "down"),
+    "search_windows": lambda case: case.focuser.search_index.search("terminal"),
+}  # type: Dict[str, Callable[[Case], object]]
+
+# NumPy is optional (see services/window_table.py)
+if window_table.is_available():
+    BENCHMARKS["index_window_table"] = index_window_table
+
+
+def measure(function: Callable[[], object], repeats: int, min_time: float) -> Timing:
+    """Times the function, returning the median time per call (in seconds) and the relative spread."""
+    timer = timeit.Timer(function)
+
+    # Calibrate how many calls it takes to reach min_time per repeat
+    number, duration = timer.autorange()
+    number = max(int(number * min_time / max(duration, 1e-9)), 1)
+
+    timings = sorted(duration / number for duration in timer.repeat(repeat=repeats, number=number))
+    median = statistics.median(timings)
+
+    quartiles = statistics.quantiles(timings, n=4) if len(timings) > 1 else [median, median, median]
+    spread = (quartiles[2] - quartiles[0]) / median if median else 0.0
+
+    return Timing(median, spread)
+
+
+def scaling_exponent(window_counts: Sequence[int], timings: Sequence[Timing]) -> float:
+    """The least squares slope of log(time) against log(window count)."""
+    xs = [math.log(count) for count in window_counts]
+    ys = [math.log(max(timing.median, 1e-12)) for timing in timings]
+
+    x_mean = statistics.mean(xs)
+    y_mean = statistics.mean(ys)
+
+    numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    denominator = sum((x - x_mean) ** 2 for x in xs)
+
+    return numerator / denominator if denominator else 0.0
+
+
+def parse_grid(grid: str) -> List[int]:
+    columns, rows = grid.lower().split("x")
+    return [int(columns), int(rows)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--windows", default="100,200,400,800,1600", help="Comma separated window counts.")
+    parser.add_argument("--monitors", type=int, default=4, help="How many monitors the desktop has.")
+    parser.add_argument("--grid", default="3x3", help="The workspace grid, as columns x rows.")
+    parser.add_argument("--repeats", type=int, default=7, help="How many times to repeat each timing.")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per repeat.")
+    parser.add_argument("--only", default="", help="Comma separated benchmarks to run; all of them by default.")
+    args = parser.parse_args()
+
+    window_counts = sorted(int(count) for count in args.windows.split(","))
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+
+    unknown_names = [name for name in names if name not in BENCHMARKS]
+
+    if unknown_names:
+        parser.error("Unknown benchmarks: {}. Valid benchmarks are: [{}]".format(
+            ", ".join(unknown_names), ", ".join(BENCHMARKS)
+        ))
+
+    grid_columns, grid_rows = parse_grid(args.grid)
+    desktop = synthetic.create_desktop(args.monitors, grid_columns, grid_rows)
+    cases = [create_case(desktop, window_count) for window_count in window_counts]
+
+    print("{} monitors, {}x{} workspace grid, {} repeats of >= {}s\n".format(
+        args.monitors, grid_columns, grid_rows, args.repeats, args.min_time
+    ))
+    print("{:<32}".format("benchmark") + "".join("{:>18}".format(count) for count in window_counts) + "  exponent")
+
+    for name in names:
+        benchmark = BENCHMARKS[name]
+        timings = [measure(lambda: benchmark(case), args.repeats, args.min_time) for case in cases]
+
+        print("{:<32}".format(name) + "".join(
+            "{:>10.2f}us ±{:>3.0f}%".format(timing.median * 1e6, timing.spread * 100) for timing in timings
+        ) + "  {:>8.2f}".format(scaling_exponent(window_counts, timings)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
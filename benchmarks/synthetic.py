@@ -0,0 +1,112 @@
+"""
+Generators for synthetic `wmctrl` output, for benchmarking with any number of windows, monitors and workspaces.
+
+The output mimics what `wmctrl` prints on a Compiz/Unity-style desktop, where the workspaces are viewports
+of one big desktop and window offsets are relative to the current viewport.
+"""
+
+import random
+from typing import NamedTuple, Optional
+from typing import List  # noqa
+from easywindowswitcher.data_models import Monitor, MonitorTopology
+from easywindowswitcher.data_models.monitor_topology import DEFAULT_MONITORS
+from easywindowswitcher.data_models.window import WINDOW_DECORATION
+
+# Classes of windows that the tool filters out, mixed into the output in the same proportion as a real session
+NOISE_WINDOW_CLASSES = ("N/A", "nemo-desktop.Nemo-desktop")
+
+WINDOW_CLASSES = (
+    "google-chrome.Google-chrome",
+    "gnome-terminal-server.Gnome-terminal",
+    "code.Code",
+    "slack.Slack",
+    "nautilus.Nautilus",
+    "spotify.Spotify",
+)
+
+TITLE_WORDS = ("Inbox", "Terminal", "README.md", "easywindowswitcher", "Pull", "Request", "—", "Google", "Chrome")
+
+
+class Desktop(NamedTuple):
+    topology: MonitorTopology
+    grid_columns: int
+    grid_rows: int
+    current_column: int
+    current_row: int
+
+
+def create_topology(monitor_count: int) -> MonitorTopology:
+    """Creates a topology of 1080p monitors side by side, or the default quad-monitor setup for 4 monitors."""
+    if monitor_count == len(DEFAULT_MONITORS):
+        return MonitorTopology(DEFAULT_MONITORS)
+
+    return MonitorTopology([
+        Monitor(x_offset=index * 1920, y_offset=0, width=1920, height=1080, name="synthetic-{}".format(index))
+        for index in range(monitor_count)
+    ])
+
+
+def create_desktop(monitor_count: int = 4, grid_columns: int = 3, grid_rows: int = 3) -> Desktop:
+    # The current workspace is in the middle of the grid, so that windows are on every side of it
+    return Desktop(create_topology(monitor_count), grid_columns, grid_rows, grid_columns // 2, grid_rows // 2)
+
+
+def generate_workspace_config(desktop: Desktop) -> str:
+    """Generates the output of `wmctrl -d`."""
+    topology = desktop.topology
+
+    return "0  * DG: {}x{}  VP: {},{}  WA: 0,24 {}x{}  N/A".format(
+        topology.width * desktop.grid_columns,
+        topology.height * desktop.grid_rows,
+        topology.width * desktop.current_column,
+        topology.height * desktop.current_row,
+        topology.width,
+        topology.height - WINDOW_DECORATION,
+    )
+
+
+def generate_windows_config(
+    desktop: Desktop,
+    window_count: int,
+    title_words: int = 6,
+    noise_ratio: float = 0.05,
+    seed: Optional[int] = 0,
+) -> str:
+    """
+    Generates the output of `wmctrl -l -G -x`, with the windows spread randomly across every workspace and monitor.
+
+    :param desktop: The layout of the desktop.
+    :param window_count: How many lines of output to generate.
+    :param title_words: How many words each window title has.
+    :param noise_ratio: The fraction of the lines that are for 'windows' that get filtered out (desktop, launchers).
+    :param seed: The seed for the random layout, so that runs are comparable.
+    """
+    rng = random.Random(seed)
+    topology = desktop.topology
+    lines = []  # type: List[str]
+
+    for index in range(window_count):
+        monitor = topology.monitors[rng.randrange(len(topology))]
+        column = rng.randrange(desktop.grid_columns)
+        row = rng.randrange(desktop.grid_rows)
+
+        width = rng.randint(200, monitor.width)
+        height = rng.randint(200, monitor.height - WINDOW_DECORATION)
+
+        # Offsets are relative to the current workspace, so windows in other workspaces can have negative offsets
+        x_offset = (column - desktop.current_column) * topology.width + monitor.x_offset
+        x_offset += rng.randint(0, monitor.width - width)
+        y_offset = (row - desktop.current_row) * topology.height + monitor.y_offset + WINDOW_DECORATION
+
+        if rng.random() < noise_ratio:
+            window_class = rng.choice(NOISE_WINDOW_CLASSES)
+        else:
+            window_class = rng.choice(WINDOW_CLASSES)
+
+        title = " ".join(rng.choice(TITLE_WORDS) for _ in range(title_words))
+
+        lines.append("0x{:08x}  0 {} {}   {} {} {}  synthetic-host {}".format(
+            0x04000000 + index, x_offset, y_offset, width, height, window_class, title
+        ))
+
+    return "\n".join(lines)
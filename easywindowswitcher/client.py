@@ -0,0 +1,120 @@
+"""
+The thin client for the easywindowswitcher daemon (see `easywindowswitcher serve`).
+
+This is meant to be bound to keyboard shortcuts in place of `easywindowswitcher`, so it deliberately imports
+as little as possible: it just forwards its arguments to the daemon over a Unix socket and exits. If the daemon
+isn't running (or doesn't support the request), it falls back to running the full CLI in-process. Once the daemon
+has the request though, it's never run again in-process, even if the daemon doesn't answer in time.
+
+The request goes to the current display's own daemon if there is one, and otherwise to a daemon serving all
+of the displays (see `easywindowswitcher serve --all-displays`).
+"""
+
+import os
+import socket
+import sys
+from typing import List, Optional, Tuple
+from easywindowswitcher.utils import daemon_protocol
+from easywindowswitcher.utils.paths import get_shared_socket_path, get_socket_path
+
+# How long to wait on the daemon before giving up on it (in seconds).
+DAEMON_TIMEOUT = 2.0
+
+# Large enough for any response the daemon sends.
+RESPONSE_BUFFER_SIZE = 4096
+
+
+class DaemonError(Exception):
+    """
+    Raised when the daemon was sent a request, but didn't answer it (e.g. it timed out or crashed).
+
+    The daemon might still have handled the request (or still be handling it), so it mustn't be run again.
+    """
+
+
+def send_request(
+    args: List[str], socket_path: Optional[str] = None, display: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Sends the args to the daemon and waits for it to finish handling them.
+
+    :param display: The X display that the request is for; only needed by a daemon serving many displays.
+
+    :raises OSError: When the daemon can't be connected to (i.e. it never got the request).
+    :raises DaemonError: When the daemon got the request, but didn't answer it.
+    :return: The status and message of the daemon's response.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(DAEMON_TIMEOUT)
+
+    try:
+        client.connect(socket_path or get_socket_path())
+
+        try:
+            response = _exchange(client, daemon_protocol.encode_request(args, display))
+        except OSError as e:
+            raise DaemonError("The daemon didn't answer: {}".format(e)) from e
+
+        if not response.endswith(daemon_protocol.MESSAGE_TERMINATOR.encode("utf8")):
+            raise DaemonError("The daemon closed the connection without answering")
+
+        return daemon_protocol.decode_response(response)
+    finally:
+        client.close()
+
+
+def _exchange(client: socket.socket, request: bytes) -> bytes:
+    client.sendall(request)
+
+    response = b""
+
+    while not response.endswith(daemon_protocol.MESSAGE_TERMINATOR.encode("utf8")):
+        chunk = client.recv(RESPONSE_BUFFER_SIZE)
+
+        if not chunk:
+            break
+
+        response += chunk
+
+    return response
+
+
+def run_in_process(args: List[str]) -> int:
+    from easywindowswitcher.fast_main import main as run
+
+    return run(args)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+
+    display = os.environ.get("DISPLAY")
+
+    for socket_path in (get_socket_path(display), get_shared_socket_path()):
+        try:
+            status, message = send_request(args, socket_path, display)
+            break
+        except DaemonError as e:
+            # Running the request again could e.g. move a window twice, so it's better to just report it
+            sys.stderr.write("{}\n".format(e))
+            return 1
+        except OSError:
+            # There's no daemon (listening) at this socket, so it never got the request
+            continue
+    else:
+        return run_in_process(args)
+
+    if status == daemon_protocol.RESPONSE_OK:
+        if message:
+            sys.stdout.write("{}\n".format(message))
+
+        return 0
+    elif status == daemon_protocol.RESPONSE_ERROR:
+        sys.stderr.write("{}\n".format(message))
+        return 1
+    else:
+        return run_in_process(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,6 @@
 import click  # noqa
 from typing import List  # noqa
-from . import root
+from . import daemon, root
 
-groups = []  # type: List[click.Group]
+groups = [daemon.serve, daemon.stats]  # type: List[click.Command]
 root_group = root.root
@@ -0,0 +1,95 @@
+import click
+import logging
+from easywindowswitcher.commands import root
+from easywindowswitcher.utils import daemon_protocol
+from easywindowswitcher.utils.command_helpers import log_command_args_factory
+from easywindowswitcher.utils.paths import get_shared_socket_path, get_socket_path
+
+
+logger = logging.getLogger(__name__)
+log_command_args = log_command_args_factory(logger, "Daemon '{}' args")
+
+
+@click.command()
+@click.option(
+    "--socket", "socket_path", default=None,
+    help="Path of the Unix socket to listen on. Defaults to one per DISPLAY in ~/.easywindowswitcher."
+)
+@click.option(
+    "--coalesce-ms", type=click.IntRange(min=0), default=0,
+    help="Merge direction requests that arrive within this many milliseconds of each other (e.g. from a held key)."
+)
+@click.option(
+    "--all-displays", is_flag=True,
+    help="Serve the requests of every X display (e.g. many VNC/Xvfb desktops) from this one process, "
+    "instead of just the current DISPLAY's."
+)
+@click.option(
+    "--workers", type=click.IntRange(min=1), default=None,
+    help="With --all-displays, how many requests can be handled at the same time across all of the displays."
+)
+@click.pass_context
+@log_command_args
+def serve(ctx: click.Context, socket_path: str, coalesce_ms: int, all_displays: bool, workers: int) -> None:
+    """
+    Runs a resident daemon that keeps the window switching state warm.
+
+    Bind your keyboard shortcuts to `easywindowswitcher-client` (which takes the same arguments)
+    to have them handled by the daemon.
+    """
+    if all_displays:
+        if coalesce_ms:
+            raise click.BadOptionUsage("coalesce_ms", "--coalesce-ms can't be used with --all-displays")
+
+        _serve_all_displays(socket_path or get_shared_socket_path(), ctx.find_root().params.get("backend"), workers)
+        return
+
+    if workers is not None:
+        raise click.BadOptionUsage("workers", "--workers can only be used with --all-displays")
+
+    # Imported here so that the regular commands don't pay for the socket server machinery
+    from easywindowswitcher.services.daemon import SwitcherDaemon
+
+    # Share the CLI's focuser so that the daemon uses whichever backend the root group was configured with
+    SwitcherDaemon(
+        socket_path or get_socket_path(), window_focuser=root.window_focuser_service, coalesce_window=coalesce_ms / 1000
+    ).serve_forever()
+
+
+def _serve_all_displays(socket_path: str, backend_name: str, workers: int) -> None:
+    from easywindowswitcher.external_services.backends import create_backend
+    from easywindowswitcher.services.display_router import DEFAULT_WORKERS, DisplayRouter
+    from easywindowswitcher.services.window_focuser import WindowFocuser
+
+    across_workspaces = root.window_focuser_service.across_workspaces
+
+    def create_focuser(display: str) -> WindowFocuser:
+        return WindowFocuser(backend=create_backend(backend_name, display=display), across_workspaces=across_workspaces)
+
+    DisplayRouter(socket_path, create_focuser=create_focuser, workers=workers or DEFAULT_WORKERS).serve_forever()
+
+
+@click.command()
+@click.option(
+    "--socket", "socket_path", default=None,
+    help="Path of the daemon's Unix socket. Defaults to the one for the current DISPLAY."
+)
+@log_command_args
+def stats(socket_path: str) -> None:
+    """
+    Prints the daemon's latency percentiles (p50/p95/p99) for each command it has handled, as JSON.
+
+    When pointed at the socket of `serve --all-displays`, prints the request counts, request rates (over the
+    last minute), and latency percentiles of each display instead.
+    """
+    from easywindowswitcher.client import send_request
+
+    try:
+        status, message = send_request(["stats"], socket_path=socket_path or get_socket_path())
+    except OSError as e:
+        raise click.ClickException("Couldn't reach the daemon: {}".format(str(e)))
+
+    if status != daemon_protocol.RESPONSE_OK:
+        raise click.ClickException(message or "The daemon couldn't report its stats")
+
+    click.echo(message)
@@ -1,7 +1,11 @@
 import click
 import logging
+from typing import Optional, Tuple
 from easywindowswitcher.utils.command_helpers import log_command_args_factory
+from easywindowswitcher.external_services.backends import BACKENDS, BACKEND_ENVIRONMENT_VARIABLE, create_backend
 from easywindowswitcher.services import window_focuser
+from easywindowswitcher.services.monitor_detection import get_monitor_topology
+from easywindowswitcher.utils import profiler
 
 
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"], max_content_width=180)
@@ -14,8 +18,33 @@ window_focuser_service = window_focuser.WindowFocuser()
 
 
 @click.group(context_settings=CONTEXT_SETTINGS, help=DOCSTRING)
-def root():
-    window_focuser_service.setup()
+@click.option(
+    "--backend", type=click.Choice(BACKENDS), default=None,
+    help="What to query the windows with. Can also be set with the {} environment variable.".format(
+        BACKEND_ENVIRONMENT_VARIABLE
+    )
+)
+@click.option(
+    "--across-workspaces", is_flag=True,
+    help="Have directions continue onto the next workspace over, instead of wrapping around the current one. "
+    "Can also be set with the {} environment variable.".format(window_focuser.ACROSS_WORKSPACES_ENVIRONMENT_VARIABLE)
+)
+@click.option("--profile", is_flag=True, help="Print how long each phase of the command took, as JSON lines on stderr.")
+@click.option(
+    "--profile-trace", type=click.Path(dir_okay=False, writable=True), default=None,
+    help="Also write the phases to this file as a Chrome trace (see chrome://tracing). Implies --profile."
+)
+@click.pass_context
+def root(ctx: click.Context, backend: str, across_workspaces: bool, profile: bool, profile_trace: str) -> None:
+    if backend:
+        window_focuser_service.backend = create_backend(backend)
+
+    if across_workspaces:
+        window_focuser_service.across_workspaces = True
+
+    if profile or profile_trace:
+        profiler.enable(trace_path=profile_trace)
+        ctx.call_on_close(profiler.finish)
 
 
 @root.command()
@@ -27,7 +56,8 @@ def monitor(index: int) -> None:
 
     The index is 0 based and increases from left-to-right.
     """
-    window_focuser_service.focus_by_monitor_index(index)
+    with profiler.span("monitor", profiler.CATEGORY_COMMAND, value=str(index)):
+        window_focuser_service.focus_by_monitor_index(index)
 
 
 @root.command()
@@ -35,8 +65,102 @@ def monitor(index: int) -> None:
 @log_command_args
 def direction(direction_value: str) -> None:
     """
-    Focuses onto the closest window in the given direction. Wraps around until a window is found.
+    Focuses onto the closest window in the given direction.
+
+    Valid directions are [left, right, up, down]. Left and right wrap around the monitors until a window is found.
+    """
+    with profiler.span("direction", profiler.CATEGORY_COMMAND, value=direction_value):
+        window_focuser_service.focus_by_direction(direction_value)
+
+
+@root.command()
+@click.argument("index", type=int)
+@click.argument("monitor_index", metavar="[MONITOR]", type=int, required=False)
+@log_command_args
+def workspace(index: int, monitor_index: Optional[int]) -> None:
+    """
+    Focuses onto a window on the workspace with the given index, on any workspace.
+
+    Workspaces are 0 based and indexed from left-to-right, top-to-bottom. Optionally, the window is taken
+    from the given monitor of the workspace (see `monitor`); otherwise, from the first monitor with any windows.
+    """
+    with profiler.span("workspace", profiler.CATEGORY_COMMAND, value=str(index)):
+        window_focuser_service.focus_by_workspace_index(index, monitor_index)
+
+
+@root.command()
+@log_command_args
+def back() -> None:
+    """
+    Focuses back onto the previously focused window.
+    """
+    with profiler.span("back", profiler.CATEGORY_COMMAND):
+        window_focuser_service.focus_by_history(1)
+
+
+@root.command()
+@click.argument("position", type=click.IntRange(min=1))
+@log_command_args
+def mru(position: int) -> None:
+    """
+    Focuses onto the window that was focused the given number of focuses ago.
+
+    i.e. 1 is the previously focused window (the same as `back`), 2 is the one before that, etc.
+    """
+    with profiler.span("mru", profiler.CATEGORY_COMMAND, value=str(position)):
+        window_focuser_service.focus_by_history(position)
+
+
+@root.command()
+@click.argument("query", nargs=-1, required=True)
+@log_command_args
+def find(query: Tuple[str, ...]) -> None:
+    """
+    Focuses onto the window whose title or class best matches the query.
+
+    The match is fuzzy and case insensitive, e.g. `find inbox chrome` or `find term`.
+    """
+    joined_query = " ".join(query)
+
+    with profiler.span("find", profiler.CATEGORY_COMMAND, value=joined_query):
+        window_focuser_service.focus_by_search(joined_query)
+
+
+@root.command()
+@click.argument("operations", nargs=-1)
+@log_command_args
+def batch(operations: Tuple[str, ...]) -> None:
+    """
+    Runs a sequence of `monitor`/`direction` operations, only focusing the window that they end up on.
+
+    The operations are read from stdin when none are given, e.g. `batch direction right direction right monitor 3`
+    or `echo "right right monitor 3" | easywindowswitcher batch`. Directions can also be given on their own.
+    """
+    tokens = list(operations) if operations else click.get_text_stream("stdin").read().split()
+
+    try:
+        parsed_operations = window_focuser.parse_batch_operations(tokens)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="OPERATIONS")
+
+    with profiler.span("batch", profiler.CATEGORY_COMMAND, operations=len(parsed_operations)):
+        window_focuser_service.focus_by_batch(parsed_operations)
+
+
+@root.command()
+@click.option("--refresh", is_flag=True, help="Detect the monitors again, even if their layout is already cached.")
+@log_command_args
+def monitors(refresh: bool) -> None:
+    """
+    Lists the monitors by the index that the other commands use for them.
 
-    Valid directions are [left, right].
+    The monitors are detected automatically and cached until their layout changes.
     """
-    window_focuser_service.focus_by_direction(direction_value)
+    topology = get_monitor_topology(
+        window_focuser_service.workspace_config[0],
+        display=getattr(window_focuser_service.backend, "display", None),
+        refresh=refresh
+    )
+
+    for index, monitor in enumerate(topology.monitors):
+        click.echo("{}: {}".format(index, monitor))
@@ -1,5 +1,7 @@
+from .monitor import Monitor  # noqa
+from .monitor_topology import MonitorTopology  # noqa
 from .window import Window  # noqa
 from .workspace import Workspace  # noqa
 from .workspace_grid import WorkspaceGrid  # noqa
 
-__all__ = ["Window", "Workspace", "WorkspaceGrid"]
+__all__ = ["Monitor", "MonitorTopology", "Window", "Workspace", "WorkspaceGrid"]
@@ -0,0 +1,52 @@
+import re
+
+# Matches the geometry and name of a monitor in `xrandr --listmonitors`, e.g. "1920/531x1080/299+0+0  DP-1"
+RAW_CONFIG_PATTERN = re.compile(r"(\d+)/\d+x(\d+)/\d+\+(-?\d+)\+(-?\d+)\s+(\S+)")
+
+
+class Monitor:
+    """
+    Models the attributes of a single monitor; specifically, where it is positioned
+    (relative to the top-left corner of the whole screen) and how big it is.
+    """
+
+    def __init__(
+        self,
+        raw_config: str = "",
+        x_offset: int = 0,
+        y_offset: int = 0,
+        width: int = 0,
+        height: int = 0,
+        name: str = "",
+    ) -> None:
+        if raw_config:
+            self._process_raw_config(raw_config)
+        else:
+            self.x_offset = x_offset
+            self.y_offset = y_offset
+            self.width = width
+            self.height = height
+            self.name = name
+
+    def __repr__(self):
+        return "{}: {}x{}+{}+{}".format(self.name, self.width, self.height, self.x_offset, self.y_offset)
+
+    def _process_raw_config(self, raw_config: str) -> None:
+        """
+        Processes a line of `xrandr --listmonitors` output into the attributes of the monitor.
+
+        Example: " 0: +*DP-1 1920/531x1080/299+0+0  DP-1"
+
+        The "1920/531x1080/299" portion is the width (in pixels/millimeters) and the height (in pixels/millimeters),
+        the "+0+0" portion is the x and y offsets, and the last column is the name of the monitor's output.
+        """
+        match = RAW_CONFIG_PATTERN.search(raw_config)
+
+        if not match:
+            raise ValueError("Invalid monitor config: '{}'".format(raw_config))
+
+        self.width = int(match.group(1))
+        self.height = int(match.group(2))
+        self.x_offset = int(match.group(3))
+        self.y_offset = int(match.group(4))
+        self.name = match.group(5)
@@ -0,0 +1,107 @@
+import bisect
+from typing import Any, Dict, List, Sequence, Tuple
+from .monitor import Monitor
+
+# The quad-monitor setup that the tool was originally written for; used whenever the monitors can't be detected.
+#
+# [1920x1080]
+#               [3440x1440]     [1440x2560]
+# [1920x1080]
+DEFAULT_MONITORS = [
+    Monitor(x_offset=0, y_offset=0, width=1920, height=1080, name="default-0"),
+    Monitor(x_offset=0, y_offset=1080, width=1920, height=1080, name="default-1"),
+    Monitor(x_offset=1920, y_offset=0, width=3440, height=1440, name="default-2"),
+    Monitor(x_offset=5360, y_offset=0, width=1440, height=2560, name="default-3"),
+]
+
+
+class MonitorTopology:
+    """
+    Models how the monitors are laid out, compiled into a lookup table for finding which monitor a point is on.
+
+    Monitors are indexed in order from left to right, top to bottom (i.e. by their top-left corners).
+
+    The lookup table splits the screen into vertical slabs at every left/right edge of every monitor,
+    so that each slab is crossed by a fixed set of monitors that are stacked on top of each other.
+    Finding a point's monitor is then a bisect over the slab boundaries, followed by a bisect over
+    the top edges of the monitors in that slab; i.e. O(log m) for m monitors.
+
+    Points that don't fall on any monitor (e.g. in the gaps of an uneven layout) go to the closest
+    monitor above them in their slab, or the top one if there isn't one.
+    """
+
+    def __init__(self, monitors: Sequence[Monitor]) -> None:
+        if not monitors:
+            raise ValueError("A monitor topology needs at least one monitor")
+
+        self.monitors = sorted(monitors, key=lambda monitor: (monitor.x_offset, monitor.y_offset))
+
+        # Everything is relative to the top-left corner of the whole screen
+        self.x_offset = min(monitor.x_offset for monitor in self.monitors)
+        self.y_offset = min(monitor.y_offset for monitor in self.monitors)
+        self.width = max(monitor.x_offset + monitor.width for monitor in self.monitors) - self.x_offset
+        self.height = max(monitor.y_offset + monitor.height for monitor in self.monitors) - self.y_offset
+
+        self.slab_boundaries, self.slab_top_edges, self.slab_monitor_indices = self._compile()
+
+    def __len__(self) -> int:
+        return len(self.monitors)
+
+    def __repr__(self):
+        return "MonitorTopology({})".format(self.monitors)
+
+    def get_monitor_index(self, x: int, y: int) -> int:
+        """
+        Gets the index of the monitor that the given point (relative to the top-left corner
+        of the whole screen) is on.
+        """
+        slab = max(bisect.bisect_right(self.slab_boundaries, x + self.x_offset) - 1, 0)
+        row = max(bisect.bisect_right(self.slab_top_edges[slab], y + self.y_offset) - 1, 0)
+
+        return self.slab_monitor_indices[slab][row]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "monitors": [
+                [monitor.name, monitor.x_offset, monitor.y_offset, monitor.width, monitor.height]
+                for monitor in self.monitors
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, topology: Dict[str, Any]) -> "MonitorTopology":
+        return cls([
+            Monitor(name=name, x_offset=x_offset, y_offset=y_offset, width=width, height=height)
+            for name, x_offset, y_offset, width, height in topology["monitors"]
+        ])
+
+    def _compile(self) -> Tuple[List[int], List[List[int]], List[List[int]]]:
+        """
+        Builds the lookup table: the left edge of every slab, plus the top edges (and indices) of the monitors
+        crossing each slab, sorted top to bottom.
+        """
+        edges = sorted(
+            {monitor.x_offset for monitor in self.monitors}
+            | {monitor.x_offset + monitor.width for monitor in self.monitors}
+        )
+
+        slab_boundaries = []  # type: List[int]
+        slab_top_edges = []  # type: List[List[int]]
+        slab_monitor_indices = []  # type: List[List[int]]
+
+        for left, right in zip(edges, edges[1:]):
+            crossing_monitors = sorted(
+                (monitor.y_offset, index)
+                for index, monitor in enumerate(self.monitors)
+                if monitor.x_offset < right and monitor.x_offset + monitor.width > left
+            )
+
+            # Gaps between monitors are merged into the slab to their left
+            if not crossing_monitors:
+                continue
+
+            slab_boundaries.append(left)
+            slab_top_edges.append([top_edge for top_edge, _ in crossing_monitors])
+            slab_monitor_indices.append([index for _, index in crossing_monitors])
+
+        return slab_boundaries, slab_top_edges, slab_monitor_indices
@@ -1,14 +1,21 @@
 # The height of the window decoration that is constant in Ubuntu.
 WINDOW_DECORATION = 24
 
+# The column of `wmctrl -l -G -x` output where the window title starts (see Window._process_raw_config)
+TITLE_COLUMN = 8
+
 
 class Window:
     """
     Models the attributes of a single window (on a monitor, in a workspace, in the workspace grid).
     Specifically, it cares about things like where the window is positioned relative to the current
     workspace (i.e. x and y offset) as well as the ID/title of the window.
+
+    Snapshots can hold hundreds of windows, so windows are slotted to keep each one small and quick to create.
     """
 
+    __slots__ = ("id", "x_offset", "y_offset", "height", "width", "window_class", "title")
+
     def __init__(
         self,
         raw_config: str = "",
@@ -79,8 +86,8 @@ class Window:
         Column 7 is presumably just the hostname (devin-Desktop)
         Everything after column 7 is the title of the window (Terminal)
         """
-        # Need to remove any empty strings that are left after splitting
-        split_config = list(filter(None, raw_config.split(" ")))
+        # Splitting on any whitespace skips over the column padding, and stopping at the title keeps it intact
+        split_config = raw_config.split(None, TITLE_COLUMN)
 
         self.id = int(split_config[0], 16)
         self.x_offset = int(split_config[2])
@@ -88,4 +95,4 @@ class Window:
         self.width = int(split_config[4])
         self.height = int(split_config[5])
         self.window_class = split_config[6]
-        self.title = " ".join(split_config[8:])
+        self.title = split_config[TITLE_COLUMN].rstrip() if len(split_config) > TITLE_COLUMN else ""
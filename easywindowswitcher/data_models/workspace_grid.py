@@ -1,7 +1,8 @@
-from typing import List
+from typing import List, Optional
 from .workspace import Workspace
 
-# These are assumptions about how the user's workspaces are setup (based on their monitors).
+# These are the defaults for how the user's workspaces are setup (based on their monitors). They are only used
+# until the real dimensions are known from the monitor topology (see set_workspace_size).
 #
 # For example, three horizontally-aligned 1920x1080 monitors would have a single workspace dimension of:
 #
@@ -86,6 +87,52 @@ class WorkspaceGrid:
 
         return self.workspace_indices[vertical_index][horizontal_index]
 
+    def get_workspace_index_at(self, x: int, y: int) -> Optional[int]:
+        """
+        Gets the index of the workspace that contains the given position of the whole workspace grid.
+
+        :return: The workspace's index, or None if the position is outside of the grid.
+        """
+        horizontal_index = x // self.workspace_width
+        vertical_index = y // self.workspace_height
+
+        if not (0 <= horizontal_index < self.workspace_horizontal_count):
+            return None
+
+        if not (0 <= vertical_index < self.workspace_vertical_count):
+            return None
+
+        return self.workspace_indices[vertical_index][horizontal_index]
+
+    def get_adjacent_workspace_index(self, index: int, horizontal_step: int, vertical_step: int) -> Optional[int]:
+        """
+        Gets the index of the workspace that is the given number of steps away from the given workspace.
+
+        :return: The workspace's index, or None if that would be off the edge of the grid (i.e. it doesn't wrap).
+        """
+        vertical_index, horizontal_index = divmod(index, self.workspace_horizontal_count)
+
+        return self.get_workspace_index_at(
+            (horizontal_index + horizontal_step) * self.workspace_width,
+            (vertical_index + vertical_step) * self.workspace_height
+        )
+
+    def set_workspace_size(self, workspace_width: int, workspace_height: int) -> None:
+        """
+        Sets the dimensions of a single workspace (i.e. of the whole screen, across all monitors),
+        deriving how many workspaces there are from the dimensions of the whole grid.
+        """
+        self.workspace_width = workspace_width
+        self.workspace_height = workspace_height
+
+        if self.width and self.height:
+            self.workspace_horizontal_count = max(self.width // workspace_width, 1)
+            self.workspace_vertical_count = max(self.height // workspace_height, 1)
+
+        self.workspace_indices = self._generate_workspace_indices(
+            self.workspace_horizontal_count, self.workspace_vertical_count
+        )
+
     def __repr__(self):
         return "{}x{}".format(self.width, self.height)
 
@@ -0,0 +1,40 @@
+import os
+from typing import TYPE_CHECKING, Optional, Union
+from easywindowswitcher.external_services import wmctrl
+
+if TYPE_CHECKING:  # pragma: no cover
+    from easywindowswitcher.external_services import x11
+
+BACKEND_WMCTRL = "wmctrl"
+BACKEND_X11 = "x11"
+
+BACKENDS = (BACKEND_WMCTRL, BACKEND_X11)
+
+DEFAULT_BACKEND = BACKEND_WMCTRL
+
+# Lets the backend be chosen without passing `--backend` every time (e.g. in keyboard shortcuts)
+BACKEND_ENVIRONMENT_VARIABLE = "EASYWINDOWSWITCHER_BACKEND"
+
+# Both backends expose the same interface: get_workspace_config, get_windows_config,
+# get_current_focused_window_id, and focus_window_by_id.
+Backend = Union["wmctrl.WMCtrl", "x11.X11"]
+
+
+def create_backend(name: Optional[str] = None, display: Optional[str] = None) -> Backend:
+    """
+    Creates the backend used for querying (and controlling) the desktop's windows.
+
+    :param name: One of BACKENDS; defaults to the backend named by the environment, falling back to DEFAULT_BACKEND.
+    :param display: The X display to talk to; defaults to the DISPLAY environment variable.
+    """
+    name = name or os.environ.get(BACKEND_ENVIRONMENT_VARIABLE) or DEFAULT_BACKEND
+
+    if name == BACKEND_WMCTRL:
+        return wmctrl.WMCtrl(display=display)
+    elif name == BACKEND_X11:
+        # Imported here so that the default backend doesn't pay for importing the X11 protocol implementation
+        from easywindowswitcher.external_services import x11
+
+        return x11.X11(display=display)
+    else:
+        raise ValueError("Invalid backend: {}. Valid backends are: [{}]".format(name, ", ".join(BACKENDS)))
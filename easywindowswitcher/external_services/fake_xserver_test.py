@@ -0,0 +1,217 @@
+import socket
+import struct
+import threading
+from typing import List
+from typing import Dict, Optional, Tuple  # noqa
+
+ROOT_WINDOW = 0x100
+SCREEN_WIDTH = 6800
+SCREEN_HEIGHT = 2560
+
+ERROR_BAD_WINDOW = 3
+
+# The opcode that the RandR extension gets
+RANDR_OPCODE = 140
+
+EVENT_PROPERTY_NOTIFY = 28
+EVENT_MASK_PROPERTY_CHANGE = 0x400000
+
+
+class FakeXServer:
+    """
+    A tiny stand-in for an X server that understands just the requests that XConnection makes,
+    so that the X11 backend can be tested without Xvfb.
+
+    Windows are modelled by their absolute position and size; properties are stored as raw bytes.
+    """
+
+    def __init__(self) -> None:
+        self.client_socket, self.server_socket = socket.socketpair()
+
+        self.atoms = {}  # type: Dict[str, int]
+        self.properties = {}  # type: Dict[Tuple[int, int], Tuple[int, int, bytes]]
+        self.windows = {ROOT_WINDOW: (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)}  # type: Dict[int, Tuple[int, int, int, int]]
+
+        self.event_masks = {}  # type: Dict[int, int]
+        self.sent_events = []  # type: List[Tuple[int, int, bytes]]
+        self.request_counts = {}  # type: Dict[int, int]
+
+        # Whether to act like a window manager, and activate (and raise) windows when asked to with a
+        # _NET_ACTIVE_WINDOW message
+        self.activates_windows = False
+
+        # RandR's timestamps of the last (monitor) configuration and output change; None to not have RandR at all
+        self.randr_timestamps = (5000, 4000)  # type: Optional[Tuple[int, int]]
+
+        self.sequence = 0
+        self.time = 1000
+        self.write_lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.client_socket.close()
+        self.server_socket.close()
+
+    # State setup
+
+    def atom(self, name: str) -> int:
+        return self.atoms.setdefault(name, len(self.atoms) + 1)
+
+    def set_cardinals(self, window: int, name: str, values: List[int]) -> None:
+        self.properties[(window, self.atom(name))] = (6, 32, struct.pack("<{}I".format(len(values)), *values))
+
+    def set_string(self, window: int, name: str, value: bytes) -> None:
+        self.properties[(window, self.atom(name))] = (31, 8, value)
+
+    def add_window(
+        self, window: int, x: int, y: int, width: int, height: int, window_class: bytes, title: bytes
+    ) -> None:
+        self.windows[window] = (x, y, width, height)
+        self.set_string(window, "WM_CLASS", window_class)
+        self.set_string(window, "_NET_WM_NAME", title)
+
+    def send_event(self, event: bytes) -> None:
+        self._write(event)
+
+    # Protocol handling
+
+    def _recv_exactly(self, size: int) -> bytes:
+        data = b""
+
+        while len(data) < size:
+            chunk = self.server_socket.recv(size - len(data))
+
+            if not chunk:
+                raise ConnectionError()
+
+            data += chunk
+
+        return data
+
+    def _serve(self) -> None:
+        try:
+            self._handshake()
+
+            while True:
+                header = self._recv_exactly(4)
+                opcode, data_byte, length = struct.unpack("<BBH", header)
+                body = self._recv_exactly((length * 4) - 4)
+
+                self.sequence += 1
+                self.request_counts[opcode] = self.request_counts.get(opcode, 0) + 1
+
+                self._handle(opcode, data_byte, body)
+        except (ConnectionError, OSError):
+            pass
+
+    def _handshake(self) -> None:
+        header = self._recv_exactly(12)
+        name_length, data_length = struct.unpack_from("<HH", header, 6)
+        self._recv_exactly(((name_length + 3) // 4 * 4) + ((data_length + 3) // 4 * 4))
+
+        vendor = b"fake"
+        screen = struct.pack(
+            "<IIIIIHHHHHHIBBBB", ROOT_WINDOW, 0, 0, 0, 0, SCREEN_WIDTH, SCREEN_HEIGHT, 0, 0, 1, 1, 0, 0, 0, 24, 0
+        )
+        body = struct.pack(
+            "<IIIIHHBBBBBBBB4x", 0, 0x400000, 0x1fffff, 0, len(vendor), 0xffff, 1, 0, 0, 0, 32, 32, 8, 255
+        )
+        body += vendor + screen
+
+        self._write(struct.pack("<BxHHH", 1, 11, 0, len(body) // 4) + body)
+
+    def _handle(self, opcode: int, data_byte: int, body: bytes) -> None:
+        if opcode == 16:  # InternAtom
+            name_length, = struct.unpack_from("<H", body, 0)
+            self._reply(0, struct.pack("<I", self.atom(body[4:4 + name_length].decode("latin1"))))
+        elif opcode == 20:  # GetProperty
+            window, property, _, _, _ = struct.unpack_from("<IIIII", body, 0)
+
+            if window not in self.windows:
+                return self._error(ERROR_BAD_WINDOW, window, opcode)
+
+            type, format, value = self.properties.get((window, property), (0, 0, b""))
+            units = len(value) // (format // 8) if format else 0
+            padded_value = value + b"\0" * (-len(value) % 4)
+
+            self._reply(format, struct.pack("<III12x", type, 0, units), padded_value)
+        elif opcode == 14:  # GetGeometry
+            window, = struct.unpack_from("<I", body, 0)
+
+            if window not in self.windows:
+                return self._error(ERROR_BAD_WINDOW, window, opcode)
+
+            _, _, width, height = self.windows[window]
+            self._reply(24, struct.pack("<IhhHHH", ROOT_WINDOW, 0, 0, width, height, 0))
+        elif opcode == 40:  # TranslateCoordinates
+            window, _, x, y = struct.unpack_from("<IIhh", body, 0)
+
+            if window not in self.windows:
+                return self._error(ERROR_BAD_WINDOW, window, opcode)
+
+            window_x, window_y, _, _ = self.windows[window]
+            self._reply(1, struct.pack("<Ihh", 0, window_x + x, window_y + y))
+        elif opcode == 2:  # ChangeWindowAttributes (only the event mask is supported)
+            window, _, event_mask = struct.unpack_from("<III", body, 0)
+            self.event_masks[window] = event_mask
+        elif opcode == 18:  # ChangeProperty
+            window, property, type, format, length = struct.unpack_from("<IIIB3xI", body, 0)
+            value = body[20:20 + (length * (format // 8))]
+
+            if data_byte == 2:  # Append
+                value = self.properties.get((window, property), (type, format, b""))[2] + value
+
+            self.properties[(window, property)] = (type, format, value)
+            self._notify_property_change(window, property)
+        elif opcode == 25:  # SendEvent
+            destination, event_mask = struct.unpack_from("<II", body, 0)
+            self.sent_events.append((destination, event_mask, body[8:40]))
+
+            window, message_type = struct.unpack_from("<II", body, 12)
+
+            if self.activates_windows and message_type == self.atoms.get("_NET_ACTIVE_WINDOW"):
+                self._raise_window(window)
+                self.set_cardinals(ROOT_WINDOW, "_NET_ACTIVE_WINDOW", [window])
+                self._notify_property_change(ROOT_WINDOW, message_type)
+        elif opcode == 43:  # GetInputFocus
+            self._reply(1, struct.pack("<I", ROOT_WINDOW))
+        elif opcode == 98:  # QueryExtension
+            name_length, = struct.unpack_from("<H", body, 0)
+            has_extension = body[4:4 + name_length] == b"RANDR" and self.randr_timestamps is not None
+
+            self._reply(0, struct.pack("<BBBB", int(has_extension), RANDR_OPCODE if has_extension else 0, 0, 0))
+        elif opcode == RANDR_OPCODE and self.randr_timestamps is not None:
+            if data_byte == 0:  # QueryVersion
+                self._reply(0, body[:8])
+            elif data_byte == 25:  # GetScreenResourcesCurrent (just the timestamps)
+                self._reply(0, struct.pack("<II", *self.randr_timestamps))
+
+    def _raise_window(self, window: int) -> None:
+        stacking_key = (ROOT_WINDOW, self.atom("_NET_CLIENT_LIST_STACKING"))
+
+        if stacking_key in self.properties:
+            stacking = [other for other in struct.unpack(
+                "<{}I".format(len(self.properties[stacking_key][2]) // 4), self.properties[stacking_key][2]
+            ) if other != window]
+
+            self.set_cardinals(ROOT_WINDOW, "_NET_CLIENT_LIST_STACKING", stacking + [window])
+
+    def _notify_property_change(self, window: int, property: int) -> None:
+        if self.event_masks.get(window, 0) & EVENT_MASK_PROPERTY_CHANGE:
+            self.time += 1
+            self._write(struct.pack(
+                "<BxHIIIB15x", EVENT_PROPERTY_NOTIFY, self.sequence & 0xffff, window, property, self.time, 0
+            ))
+
+    def _reply(self, data_byte: int, data: bytes, extra: bytes = b"") -> None:
+        reply = struct.pack("<BBHI", 1, data_byte, self.sequence & 0xffff, len(extra) // 4) + data
+        self._write(reply + b"\0" * (32 - len(reply)) + extra)
+
+    def _error(self, code: int, bad_value: int, opcode: int) -> None:
+        self._write(struct.pack("<BBHIHB21x", 0, code, self.sequence & 0xffff, bad_value, 0, opcode))
+
+    def _write(self, data: bytes) -> None:
+        with self.write_lock:
+            self.server_socket.sendall(data)
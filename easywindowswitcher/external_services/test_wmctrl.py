@@ -0,0 +1,34 @@
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher.data_models import Window
+from easywindowswitcher.external_services.wmctrl import WMCtrl
+
+WINDOWS_CONFIG = """0x02000001 -1 0    24   64   1056 N/A                   N/A unity-launcher
+0x03000001  0 0    24   6800 2560 nemo-desktop.Nemo-desktop  devin-Desktop Desktop
+0x05000006  0 1920 24   1920 1056 gnome-terminal-server.Gnome-terminal  devin-Desktop Terminal
+0x04400001  0 0    1104 1920 1056 google-chrome.Google-chrome  devin-Desktop Inbox  —  Chrome
+0x04600001  0 5360 0    1440 2560 nautilus.Nautilus  devin-Desktop Files
+
+0x04800001  0 1920 24   800  600  code.Code  devin-Desktop"""
+
+
+class TestWMCtrl(CustomTestCase):
+    def test_parsing_windows_config_skips_non_navigable_windows(self):
+        windows = WMCtrl()._parse_windows_config(WINDOWS_CONFIG)
+
+        self.assertEqual(
+            [(w.id, w.x_offset, w.y_offset, w.width, w.height, w.window_class, w.title) for w in windows],
+            [
+                (0x05000006, 1920, 24, 1920, 1056, "gnome-terminal-server.Gnome-terminal", "Terminal"),
+                (0x04400001, 0, 1104, 1920, 1056, "google-chrome.Google-chrome", "Inbox  —  Chrome"),
+                (0x04800001, 1920, 24, 800, 600, "code.Code", ""),
+            ]
+        )
+
+    def test_window_parses_the_same_as_the_windows_config(self):
+        window = Window(raw_config=WINDOWS_CONFIG.split("\n")[3])
+        parsed_window = WMCtrl()._parse_windows_config(WINDOWS_CONFIG)[1]
+
+        self.assertEqual(
+            [getattr(window, name) for name in Window.__slots__],
+            [getattr(parsed_window, name) for name in Window.__slots__]
+        )
@@ -0,0 +1,192 @@
+import os
+import socket
+import struct
+import tempfile
+from unittest import mock
+from utils.helpers_test import CustomTestCase
+from external_services.fake_xserver_test import ROOT_WINDOW, FakeXServer
+from easywindowswitcher.external_services.wmctrl import WMCtrl
+from easywindowswitcher.external_services.x11 import ROOT_MESSAGE_EVENT_MASK, SOURCE_INDICATION_PAGER, X11
+from easywindowswitcher.external_services.xconnection import (
+    FAMILY_INTERNET, FAMILY_INTERNET6, FAMILY_LOCAL, FAMILY_WILD, XConnection, get_auth, get_auth_address,
+    parse_display
+)
+
+TERMINAL_WINDOW = 0x05000006
+CHROME_WINDOW = 0x04400001
+DESKTOP_WINDOW = 0x03000001
+LAUNCHER_WINDOW = 0x02000001
+
+
+class TestX11(CustomTestCase):
+    def setUp(self):
+        self.server = FakeXServer()
+
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_DESKTOP_GEOMETRY", [20400, 7680])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_DESKTOP_VIEWPORT", [6800, 2560])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_CURRENT_DESKTOP", [0])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_ACTIVE_WINDOW", [CHROME_WINDOW])
+
+        self.server.add_window(
+            TERMINAL_WINDOW, 1920, 24, 1920, 1056, b"gnome-terminal-server\0Gnome-terminal\0", b"Terminal"
+        )
+        self.server.add_window(
+            CHROME_WINDOW, 0, 1104, 1920, 1056, b"google-chrome\0Google-chrome\0", "Inbox — Chrome".encode("utf8")
+        )
+        self.server.add_window(DESKTOP_WINDOW, 0, 24, 6800, 2560, b"nemo-desktop\0Nemo-desktop\0", b"Desktop")
+        self.server.add_window(LAUNCHER_WINDOW, 0, 24, 64, 1056, b"", b"unity-launcher")
+
+        # The last window was closed before the backend got around to querying it
+        self.server.set_cardinals(
+            ROOT_WINDOW,
+            "_NET_CLIENT_LIST",
+            [TERMINAL_WINDOW, CHROME_WINDOW, DESKTOP_WINDOW, LAUNCHER_WINDOW, 0x09999999]
+        )
+
+        self.backend = X11(connection=XConnection(":0", sock=self.server.client_socket))
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_workspace_config_comes_from_the_desktop_properties(self):
+        workspace_grid, current_workspace = self.backend.get_workspace_config()
+
+        self.assertEqual((workspace_grid.width, workspace_grid.height), (20400, 7680))
+        self.assertEqual((current_workspace.width, current_workspace.height), (6800, 2560))
+
+    def test_windows_config_matches_wmctrl(self):
+        windows = self.backend.get_windows_config()
+
+        self.assertEqual(
+            [(w.id, w.x_offset, w.y_offset, w.width, w.height, w.window_class, w.title) for w in windows],
+            [
+                (TERMINAL_WINDOW, 1920, 24, 1920, 1056, "gnome-terminal-server.Gnome-terminal", "Terminal"),
+                (CHROME_WINDOW, 0, 1104, 1920, 1056, "google-chrome.Google-chrome", "Inbox — Chrome"),
+            ]
+        )
+
+    def test_every_reply_is_consumed_even_for_closed_windows(self):
+        self.backend.get_windows_config()
+
+        # Every window gets its geometry queried, but only the ones that still exist get translated
+        self.assertEqual(self.server.request_counts[14], 5)
+        self.assertEqual(self.server.request_counts[40], 4)
+        self.assertEqual(self.backend.connection.replies, {})
+
+    def test_focused_window_is_the_active_window(self):
+        self.assertEqual(self.backend.get_current_focused_window_id(), CHROME_WINDOW)
+
+    def test_focusing_sends_an_active_window_request(self):
+        self.server.activates_windows = True
+        self.server.set_cardinals(TERMINAL_WINDOW, "_NET_WM_DESKTOP", [1])
+
+        with mock.patch.object(WMCtrl, "focus_window_by_id") as wmctrl_focus_window_by_id:
+            self.backend.focus_window_by_id(TERMINAL_WINDOW)
+
+        wmctrl_focus_window_by_id.assert_not_called()
+        self.assertEqual(self.backend.get_current_focused_window_id(), TERMINAL_WINDOW)
+
+        # Switches to the window's desktop first, then activates it with the server's timestamp
+        (_, _, desktop_message), (destination, event_mask, active_window_message) = self.server.sent_events
+        timestamp = self.server.time - 1
+
+        self.assertEqual((destination, event_mask), (ROOT_WINDOW, ROOT_MESSAGE_EVENT_MASK))
+        self.assertEqual(
+            struct.unpack("<BBHII5I", desktop_message)[3:],
+            (ROOT_WINDOW, self.server.atom("_NET_CURRENT_DESKTOP"), 1, timestamp, 0, 0, 0)
+        )
+        self.assertEqual(
+            struct.unpack("<BBHII5I", active_window_message)[3:],
+            (
+                TERMINAL_WINDOW, self.server.atom("_NET_ACTIVE_WINDOW"),
+                SOURCE_INDICATION_PAGER, timestamp, CHROME_WINDOW, 0, 0
+            )
+        )
+
+    def test_unconfirmed_focus_falls_back_to_wmctrl(self):
+        self.backend.focus_confirmation_timeout = 0.01
+
+        with mock.patch.object(WMCtrl, "focus_window_by_id") as wmctrl_focus_window_by_id:
+            self.backend.focus_window_by_id(TERMINAL_WINDOW)
+
+        wmctrl_focus_window_by_id.assert_called_once_with(TERMINAL_WINDOW)
+
+
+class TestParseDisplay(CustomTestCase):
+    def test_parse_display(self):
+        self.assertEqual(parse_display(":0"), ("", 0, 0))
+        self.assertEqual(parse_display("unix:1"), ("", 1, 0))
+        self.assertEqual(parse_display("localhost:10.1"), ("localhost", 10, 1))
+
+
+def make_xauthority_entry(family, address, number, cookie, name=b"MIT-MAGIC-COOKIE-1"):
+    return struct.pack(">H", family) + b"".join(
+        struct.pack(">H", len(field)) + field for field in (address, number, name, cookie)
+    )
+
+
+class TestGetAuth(CustomTestCase):
+    REMOTE_ADDRESS = socket.inet_aton("192.168.1.20")
+    HOSTNAME = socket.gethostname().encode("latin1")
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def write_entries(self, *entries):
+        with open(self.path, "wb") as f:
+            f.write(b"".join(make_xauthority_entry(*entry) for entry in entries))
+
+    def test_matches_family_address_and_display_number(self):
+        self.write_entries(
+            (FAMILY_LOCAL, b"otherhost", b"0", b"other-host"),
+            (FAMILY_INTERNET, socket.inet_aton("192.168.1.21"), b"0", b"other-address"),
+            (FAMILY_INTERNET, self.REMOTE_ADDRESS, b"1", b"other-display"),
+            (FAMILY_INTERNET, self.REMOTE_ADDRESS, b"0", b"remote"),
+            (FAMILY_LOCAL, self.HOSTNAME, b"0", b"local"),
+        )
+
+        self.assertEqual(get_auth(FAMILY_INTERNET, self.REMOTE_ADDRESS, 0, self.path)[1], b"remote")
+        self.assertEqual(get_auth(FAMILY_LOCAL, self.HOSTNAME, 0, self.path)[1], b"local")
+        self.assertEqual(get_auth(FAMILY_INTERNET, self.REMOTE_ADDRESS, 1, self.path)[1], b"other-display")
+
+    def test_wildcards(self):
+        self.write_entries(
+            (FAMILY_INTERNET, self.REMOTE_ADDRESS, b"", b"any-display"),
+            (FAMILY_WILD, b"", b"0", b"any-address"),
+        )
+
+        self.assertEqual(get_auth(FAMILY_INTERNET, self.REMOTE_ADDRESS, 3, self.path)[1], b"any-display")
+        self.assertEqual(get_auth(FAMILY_LOCAL, self.HOSTNAME, 0, self.path)[1], b"any-address")
+
+    def test_no_auth_when_nothing_matches(self):
+        # A remote display shouldn't be sent the cookies of other hosts
+        self.write_entries(
+            (FAMILY_LOCAL, self.HOSTNAME, b"0", b"local"),
+            (FAMILY_INTERNET, socket.inet_aton("192.168.1.21"), b"0", b"other-address"),
+            (FAMILY_INTERNET, self.REMOTE_ADDRESS, b"0", b"wrong-protocol", b"XDM-AUTHORIZATION-1"),
+        )
+
+        self.assertEqual(get_auth(FAMILY_INTERNET, self.REMOTE_ADDRESS, 0, self.path), (b"", b""))
+        self.assertEqual(get_auth(FAMILY_LOCAL, self.HOSTNAME, 0, self.path + ".missing"), (b"", b""))
+
+    def test_auth_address_of_connections(self):
+        def get_address(family, peer):
+            sock = mock.Mock(family=family)
+            sock.getpeername.return_value = peer
+            return get_auth_address(sock)
+
+        local = (FAMILY_LOCAL, self.HOSTNAME)
+
+        self.assertEqual(get_address(socket.AF_UNIX, ""), local)
+        self.assertEqual(get_address(socket.AF_INET, ("127.0.0.1", 6000)), local)
+        self.assertEqual(get_address(socket.AF_INET6, ("::1", 6000, 0, 0)), local)
+        self.assertEqual(get_address(socket.AF_INET, ("192.168.1.20", 6000)), (FAMILY_INTERNET, self.REMOTE_ADDRESS))
+        self.assertEqual(
+            get_address(socket.AF_INET6, ("::ffff:192.168.1.20", 6000, 0, 0)), (FAMILY_INTERNET, self.REMOTE_ADDRESS)
+        )
+        self.assertEqual(
+            get_address(socket.AF_INET6, ("fe80::1", 6000, 0, 0)),
+            (FAMILY_INTERNET6, socket.inet_pton(socket.AF_INET6, "fe80::1"))
+        )
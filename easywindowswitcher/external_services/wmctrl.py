@@ -1,6 +1,10 @@
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
+from typing import Dict  # noqa
 from easywindowswitcher.data_models import Window, Workspace, WorkspaceGrid
+from easywindowswitcher.data_models.window import TITLE_COLUMN
+from easywindowswitcher.utils import profiler
 from easywindowswitcher.utils.service_helpers import get_command_output, call_command
+from easywindowswitcher.utils.window_rules import WindowFilter, get_window_filter
 
 
 class WMCtrl:
@@ -13,23 +17,45 @@ class WMCtrl:
     information in a more useful format.
     """
 
-    def __init__(self):
-        pass
+    # Every query is a separate process, so they can all safely run at the same time.
+    CONCURRENT_QUERIES = True
+
+    def __init__(self, display: Optional[str] = None) -> None:
+        """
+        :param display: The X display to run the commands against; defaults to the DISPLAY environment variable.
+        """
+        self.display = display
+
+        # Only set when talking to a specific display, so that the commands otherwise just inherit the environment
+        self._command_env = {"DISPLAY": display} if display else None  # type: Optional[Dict[str, str]]
 
     def get_workspace_config(self) -> Tuple[WorkspaceGrid, Workspace]:
-        workspace_config = get_command_output(["wmctrl", "-d"])
-        return self._parse_system_config(workspace_config)
+        workspace_config = self._get_command_output(["wmctrl", "-d"])
+
+        with profiler.span("parse_system_config"):
+            return self._parse_system_config(workspace_config)
 
-    def get_windows_config(self):
-        windows_config = get_command_output(["wmctrl", "-l", "-G", "-x"])
-        return self._parse_windows_config(windows_config)
+    def get_windows_config(self) -> List[Window]:
+        windows_config = self._get_command_output(["wmctrl", "-l", "-G", "-x"])
+
+        with profiler.span("parse_windows_config"):
+            return self._parse_windows_config(windows_config)
 
     def get_current_focused_window_id(self) -> int:
         # Note: Unlike `wmctrl`, `xdotool` returns window IDs in decimal, instead of in hex.
-        return int(get_command_output(["xdotool", "getwindowfocus"]))
+        return int(self._get_command_output(["xdotool", "getwindowfocus"]))
 
     def focus_window_by_id(self, window_id: int) -> None:
-        call_command(["wmctrl", "-i", "-a", str(window_id)])
+        # Nothing depends on the window manager having handled it yet, so there's no need to wait for it
+        self._call_command(["wmctrl", "-i", "-a", str(window_id)], wait=False)
+
+    def _get_command_output(self, command: List[str]) -> str:
+        # Every command goes through here (and _call_command), so that a stand-in (e.g. for replaying a recorded
+        # session; see benchmarks/replay.py) can answer them instead
+        return get_command_output(command, env=self._command_env)
+
+    def _call_command(self, command: List[str], wait: bool = True) -> bool:
+        return call_command(command, wait=wait, env=self._command_env)
 
     def _parse_system_config(self, system_config) -> Tuple[WorkspaceGrid, Workspace]:
         # Example system_config: "0  * DG: 17280x3240  VP: 5760,0  WA: 0,24 5760x1056  N/A"
@@ -45,25 +71,49 @@ class WMCtrl:
 
         return (workspace_grid, current_workspace)
 
-    def _parse_windows_config(self, windows_config) -> List[Window]:
-        split_windows_config = windows_config.split("\n")
-        windows = []
-
-        for window_config in split_windows_config:
-            window = Window(raw_config=window_config)
-
-            # Any 'window' that doesn't have a window_class isn't a window (e.g. unity-launcher).
-            # Windows with the nemo-desktop class are just the... well, desktop. And we don't want
-            # to focus the desktop.
-            # Any window where the y-offset is actually 0 means that it doesn't have
-            # any window decoration and is therefore not a window (e.g. Nautilus).
-            # Additionally, I don't think I've seen a negative y-offset value for a legit window,
-            # so we can shortcut that logic.
-            if (
-                window.window_class != "N/A"
-                and window.window_class != "nemo-desktop.Nemo-desktop"
-                and window.y_offset > 0
-            ):
-                windows.append(window)
-
-        return windows
+    def _parse_windows_config(self, windows_config: str) -> List[Window]:
+        return list(iter_windows_config(windows_config))
+
+
+def iter_windows_config(windows_config: str) -> Iterator[Window]:
+    """
+    Parses `wmctrl -l -G -x` output (see Window._process_raw_config) one line at a time,
+    yielding only the windows that can be navigated to (see utils/window_rules.py).
+
+    Each line is only split as far as the title, and checked against the window rules before anything else is done
+    with it, so the lines that get filtered out never turn into Windows at all.
+    """
+    is_navigable = get_window_filter().is_navigable
+
+    for window_config in windows_config.splitlines():
+        split_config = window_config.split(None, TITLE_COLUMN)
+
+        # Blank or truncated lines (i.e. without even a class)
+        if len(split_config) < 7:
+            continue
+
+        window_class = split_config[6]
+        title = split_config[TITLE_COLUMN].rstrip() if len(split_config) > TITLE_COLUMN else ""
+
+        x_offset = int(split_config[2])
+        y_offset = int(split_config[3])
+        width = int(split_config[4])
+        height = int(split_config[5])
+
+        if not is_navigable(window_class, title, x_offset, y_offset, width, height):
+            continue
+
+        yield Window("", int(split_config[0], 16), x_offset, y_offset, height, width, window_class, title)
+
+
+def is_navigable_window(window: Window, window_filter: Optional[WindowFilter] = None) -> bool:
+    """
+    Determines whether a window is something that can actually be navigated to,
+    according to the window rules (see utils/window_rules.py).
+
+    :param window_filter: The filter to check the window with; pass it in when checking many windows at once,
+        so that the rule file is only looked at once for all of them.
+    """
+    return (window_filter or get_window_filter()).is_navigable(
+        window.window_class, window.title, window.x_offset, window.y_offset, window.width, window.height
+    )
@@ -0,0 +1,387 @@
+import logging
+import select
+import struct
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from easywindowswitcher.data_models import Window, Workspace, WorkspaceGrid
+from easywindowswitcher.external_services import wmctrl, xconnection
+from easywindowswitcher.external_services.xconnection import XConnection, XError, unpack_cardinals
+from easywindowswitcher.external_services.xconnection import Geometry  # noqa
+from easywindowswitcher.utils import profiler
+from easywindowswitcher.utils.window_rules import get_window_filter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# All of the atoms that are needed for reading the desktop state; they're interned together in a single batch.
+ATOMS = (
+    "_NET_ACTIVE_WINDOW",
+    "_NET_CLIENT_LIST",
+    "_NET_CURRENT_DESKTOP",
+    "_NET_DESKTOP_GEOMETRY",
+    "_NET_DESKTOP_VIEWPORT",
+    "_NET_WM_DESKTOP",
+    "_NET_WM_NAME",
+    "UTF8_STRING",
+    "WM_CLASS",
+    "WM_NAME",
+    "_EASYWINDOWSWITCHER_TIMESTAMP",
+)
+
+# The (otherwise unused) root window property that gets touched to find out the X server's current time
+TIMESTAMP_PROPERTY = "_EASYWINDOWSWITCHER_TIMESTAMP"
+
+# The EWMH source indication for requests from pagers and other tools that act on the user's behalf,
+# which window managers don't apply their focus stealing prevention to
+SOURCE_INDICATION_PAGER = 2
+
+# The _NET_WM_DESKTOP of windows that are on every desktop
+ALL_DESKTOPS = 0xffffffff
+
+# Client messages to the window manager have to be sent to the root window with these event masks
+ROOT_MESSAGE_EVENT_MASK = xconnection.EVENT_MASK_SUBSTRUCTURE_NOTIFY | xconnection.EVENT_MASK_SUBSTRUCTURE_REDIRECT
+
+# How long (in seconds) to wait for the window manager to confirm that it activated a window
+FOCUS_CONFIRMATION_TIMEOUT = 0.2
+
+# What `wmctrl -x` shows for windows without a WM_CLASS
+NO_WINDOW_CLASS = "N/A"
+
+
+class X11:
+    """
+    Reads the same information about the desktop's workspaces and windows as WMCtrl,
+    but by talking to the X server directly instead of spawning wmctrl/xdotool and parsing their output.
+
+    All of the queries for a snapshot are pipelined, so that reading every window's class, title,
+    and geometry only costs a couple of round trips to the X server, regardless of how many windows there are.
+    """
+
+    # All queries go through the one connection, which can't be shared between threads.
+    CONCURRENT_QUERIES = False
+
+    def __init__(
+        self,
+        display: Optional[str] = None,
+        connection: Optional[XConnection] = None,
+        focus_confirmation_timeout: float = FOCUS_CONFIRMATION_TIMEOUT
+    ) -> None:
+        """
+        :param display: The X display to connect to; defaults to the DISPLAY environment variable.
+        :param connection: An existing connection to use (e.g. to a fake X server).
+        :param focus_confirmation_timeout: How long to wait for the window manager to confirm that it focused
+            a window, before falling back to wmctrl; 0 doesn't wait for it at all.
+        """
+        self.display = display
+        self._connection = connection
+        self.focus_confirmation_timeout = focus_confirmation_timeout
+        self._atoms = {}  # type: Dict[str, int]
+
+    @property
+    def connection(self) -> XConnection:
+        # Connect lazily so that just constructing the backend (e.g. for `--help`) doesn't need an X server
+        if self._connection is None:
+            with profiler.span("x11.connect"):
+                self._connection = XConnection(self.display)
+
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            self._atoms = {}
+
+    @property
+    def atoms(self) -> Dict[str, int]:
+        if not self._atoms:
+            sequences = [self.connection.intern_atom(name) for name in ATOMS]
+            self._atoms = {name: self.connection.get_atom_reply(sequence) for name, sequence in zip(ATOMS, sequences)}
+
+        return self._atoms
+
+    def get_workspace_config(self) -> Tuple[WorkspaceGrid, Workspace]:
+        connection = self.connection
+        atoms = self.atoms
+        root = connection.root
+
+        geometry_sequence = connection.get_property(root, atoms["_NET_DESKTOP_GEOMETRY"])
+        viewport_sequence = connection.get_property(root, atoms["_NET_DESKTOP_VIEWPORT"])
+        current_desktop_sequence = connection.get_property(root, atoms["_NET_CURRENT_DESKTOP"])
+
+        geometry = unpack_cardinals(connection.get_property_reply(geometry_sequence).value)
+        viewports = unpack_cardinals(connection.get_property_reply(viewport_sequence).value)
+        current_desktop = unpack_cardinals(connection.get_property_reply(current_desktop_sequence).value)
+
+        # Without the EWMH desktop geometry, the best we can do is assume that the whole screen is the grid
+        if len(geometry) >= 2:
+            workspace_grid = WorkspaceGrid(width=geometry[0], height=geometry[1])
+        else:
+            workspace_grid = WorkspaceGrid(width=connection.screen_width, height=connection.screen_height)
+
+        # The viewport property has an x,y pair for every desktop; we only care about the current desktop's
+        desktop_index = current_desktop[0] if current_desktop else 0
+        viewport = viewports[desktop_index * 2:(desktop_index * 2) + 2]
+        current_workspace = Workspace(width=viewport[0], height=viewport[1]) if len(viewport) == 2 else Workspace()
+
+        return (workspace_grid, current_workspace)
+
+    def get_windows_config(self) -> List[Window]:
+        window_filter = get_window_filter()
+
+        windows = [
+            window for window in self.get_windows(self.get_client_window_ids())
+            if wmctrl.is_navigable_window(window, window_filter)
+        ]
+
+        # Errors for windows that disappeared in the middle of the queries have been handled as missing windows
+        self.connection.discard_errors()
+
+        return windows
+
+    def get_client_window_ids(self) -> Sequence[int]:
+        connection = self.connection
+
+        client_list_sequence = connection.get_property(connection.root, self.atoms["_NET_CLIENT_LIST"])
+        return unpack_cardinals(connection.get_property_reply(client_list_sequence).value)
+
+    def get_current_focused_window_id(self) -> int:
+        connection = self.connection
+
+        active_window_sequence = connection.get_property(connection.root, self.atoms["_NET_ACTIVE_WINDOW"])
+        active_window = unpack_cardinals(connection.get_property_reply(active_window_sequence).value)
+
+        return active_window[0] if active_window else 0
+
+    def get_snapshot_token(self) -> int:
+        """
+        Gets a cheap fingerprint of the desktop's state (for validating a cached snapshot of it).
+
+        It covers which windows exist and the current workspace, so it changes whenever a window is opened or
+        closed, or the workspace is switched. It costs a single round trip to the X server.
+
+        It deliberately ignores the stacking order: focusing a window raises it, so a token that covered the
+        stacking order would never match the snapshot of the previous switch. Windows that were only moved or
+        resized aren't noticed either; those are left to the snapshot's TTL.
+        """
+        connection = self.connection
+        atoms = self.atoms
+
+        sequences = [
+            connection.get_property(connection.root, atoms[name])
+            for name in ("_NET_CLIENT_LIST", "_NET_DESKTOP_VIEWPORT", "_NET_CURRENT_DESKTOP")
+        ]
+
+        token = 0
+
+        for sequence in sequences:
+            token = zlib.crc32(connection.get_property_reply(sequence).value, token)
+
+        return token
+
+    def focus_window_by_id(self, window_id: int) -> None:
+        """
+        Asks the window manager to activate the window, the same way that `wmctrl -i -a` does, but without spawning it.
+
+        Falls back to wmctrl if the X server can't be reached, or if the window manager doesn't confirm the
+        activation in time.
+        """
+        try:
+            activated = self._activate_window(window_id)
+        except (OSError, ValueError) as e:
+            logger.debug("Couldn't activate the window over the X connection: %s", e)
+            self.close()
+            activated = False
+        except XError as e:
+            logger.debug("Couldn't activate the window over the X connection: %s", e)
+            self.connection.discard_errors()
+            activated = False
+
+        if not activated:
+            wmctrl.WMCtrl(display=self.display).focus_window_by_id(window_id)
+
+    def _activate_window(self, window_id: int) -> bool:
+        """
+        Sends the EWMH _NET_ACTIVE_WINDOW request for the window (switching to its desktop first, if need be).
+
+        :return: Whether the window manager confirmed that the window is now the active window
+            (or, when not waiting for confirmation, that the request was sent).
+        """
+        connection = self.connection
+        atoms = self.atoms
+        root = connection.root
+
+        # Property changes on the root window tell us both the server's current time and when the focus changes
+        connection.change_window_attributes(root, xconnection.EVENT_MASK_PROPERTY_CHANGE)
+
+        active_window_sequence = connection.get_property(root, atoms["_NET_ACTIVE_WINDOW"])
+        current_desktop_sequence = connection.get_property(root, atoms["_NET_CURRENT_DESKTOP"])
+        window_desktop_sequence = connection.get_property(window_id, atoms["_NET_WM_DESKTOP"])
+
+        # Appending nothing to a property doesn't change it, but still generates a (timestamped) PropertyNotify
+        connection.change_property(
+            root, atoms[TIMESTAMP_PROPERTY], xconnection.ATOM_CARDINAL, 32, b"", xconnection.PROPERTY_MODE_APPEND
+        )
+
+        active_window = unpack_cardinals(connection.get_property_reply(active_window_sequence).value)
+        current_desktop = unpack_cardinals(connection.get_property_reply(current_desktop_sequence).value)
+        window_desktop = unpack_cardinals(connection.get_property_reply(window_desktop_sequence).value)
+
+        # The event is generated before the reply to any later request, so it's there once the server has caught up
+        connection.sync()
+        timestamp = self._get_timestamp(connection.poll_events())
+
+        current_active_window = active_window[0] if active_window else xconnection.NONE
+
+        if current_active_window == window_id:
+            return True
+
+        if window_desktop and current_desktop and window_desktop[0] not in (current_desktop[0], ALL_DESKTOPS):
+            connection.send_client_message(
+                root, root, atoms["_NET_CURRENT_DESKTOP"], [window_desktop[0], timestamp], ROOT_MESSAGE_EVENT_MASK
+            )
+
+        connection.send_client_message(
+            root,
+            window_id,
+            atoms["_NET_ACTIVE_WINDOW"],
+            [SOURCE_INDICATION_PAGER, timestamp, current_active_window],
+            ROOT_MESSAGE_EVENT_MASK
+        )
+
+        if self.focus_confirmation_timeout <= 0:
+            connection.flush()
+            return True
+
+        return self._wait_for_active_window(window_id, time.monotonic() + self.focus_confirmation_timeout)
+
+    def _get_timestamp(self, events: List[bytes]) -> int:
+        timestamp_atom = self.atoms[TIMESTAMP_PROPERTY]
+
+        for event in events:
+            if event[0] & 0x7f == xconnection.EVENT_PROPERTY_NOTIFY:
+                window_id, atom, timestamp = struct.unpack_from("<III", event, 4)
+
+                if (window_id, atom) == (self.connection.root, timestamp_atom):
+                    return timestamp
+
+        return xconnection.CURRENT_TIME
+
+    def _wait_for_active_window(self, window_id: int, deadline: float) -> bool:
+        connection = self.connection
+        root = connection.root
+        active_window_atom = self.atoms["_NET_ACTIVE_WINDOW"]
+
+        while True:
+            active_window_changed = any(
+                event[0] & 0x7f == xconnection.EVENT_PROPERTY_NOTIFY
+                and struct.unpack_from("<II", event, 4) == (root, active_window_atom)
+                for event in connection.poll_events()
+            )
+
+            if active_window_changed and self.get_current_focused_window_id() == window_id:
+                return True
+
+            remaining_time = deadline - time.monotonic()
+
+            if remaining_time <= 0:
+                logger.debug("The window manager didn't confirm activating window %s in time", window_id)
+                return False
+
+            if not connection.has_pending_events():
+                select.select([connection], [], [], remaining_time)
+
+    def select_events(self, window_ids: Sequence[int], event_mask: int) -> None:
+        """Subscribes to the given events for all of the given windows (whichever ones still exist)."""
+        for window_id in window_ids:
+            self.connection.change_window_attributes(window_id, event_mask)
+
+        # Make sure the subscriptions are in place before anything else gets queried
+        self.connection.sync()
+        self.connection.discard_errors()
+
+    def get_windows(self, window_ids: Sequence[int]) -> List[Window]:
+        """
+        Gets the geometry, class, and title of all of the given windows using two batches of pipelined requests.
+
+        Any window that no longer exists (i.e. was closed in the middle of the queries) is left out.
+        """
+        with profiler.span("x11.get_windows", windows=len(window_ids)):
+            return self._get_windows(window_ids)
+
+    def _get_windows(self, window_ids: Sequence[int]) -> List[Window]:
+        connection = self.connection
+        atoms = self.atoms
+
+        # First batch: everything that can be asked about the window directly
+        sequences = [
+            (
+                connection.get_geometry(window_id),
+                connection.get_property(window_id, atoms["WM_CLASS"]),
+                connection.get_property(window_id, atoms["_NET_WM_NAME"], atoms["UTF8_STRING"]),
+                connection.get_property(window_id, atoms["WM_NAME"]),
+            )
+            for window_id in window_ids
+        ]
+
+        windows_with_geometry = []  # type: List[Tuple[Window, Geometry]]
+
+        for window_id, (geometry_sequence, class_sequence, net_name_sequence, name_sequence) in zip(
+            window_ids, sequences
+        ):
+            # Every reply has to be read (even if an earlier one failed) so that none of them are left behind
+            geometry = _reply_or_none(connection.get_geometry_reply, geometry_sequence)
+            window_class = _reply_or_none(connection.get_property_reply, class_sequence)
+            net_name = _reply_or_none(connection.get_property_reply, net_name_sequence)
+            name = _reply_or_none(connection.get_property_reply, name_sequence)
+
+            if geometry is None or window_class is None or net_name is None or name is None:
+                continue
+
+            window = Window(
+                id=window_id,
+                width=geometry.width,
+                height=geometry.height,
+                window_class=_format_window_class(window_class.value),
+                title=(net_name.value or name.value).decode("utf8", "replace"),
+            )
+
+            windows_with_geometry.append((window, geometry))
+
+        # Second batch: positions relative to the root window, the same way that `wmctrl -l -G` calculates them
+        translate_sequences = [
+            connection.translate_coordinates(window.id, geometry.root, geometry.x, geometry.y)
+            for window, geometry in windows_with_geometry
+        ]
+
+        windows = []
+
+        for (window, _), translate_sequence in zip(windows_with_geometry, translate_sequences):
+            try:
+                window.x_offset, window.y_offset = connection.get_translate_coordinates_reply(translate_sequence)
+            except XError:
+                continue
+
+            windows.append(window)
+
+        return windows
+
+
+def _format_window_class(raw_window_class: bytes) -> str:
+    """
+    Formats a raw WM_CLASS property (e.g. b"gnome-terminal-server\\0Gnome-terminal\\0")
+    the same way as `wmctrl -x` (e.g. "gnome-terminal-server.Gnome-terminal").
+    """
+    if not raw_window_class:
+        return NO_WINDOW_CLASS
+
+    return ".".join(raw_window_class.rstrip(b"\0").decode("latin1").split("\0"))
+
+
+def _reply_or_none(get_reply: Callable[[int], T], sequence: int) -> Optional[T]:
+    try:
+        return get_reply(sequence)
+    except XError:
+        return None
@@ -0,0 +1,521 @@
+import os
+import socket
+import struct
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from typing import Dict  # noqa
+
+# A minimal, pure Python client for the X11 wire protocol.
+#
+# Only the handful of core requests needed to read the EWMH state of the desktop are implemented (plus sending the
+# requests of extensions, like RandR, whose bodies are packed by their callers). Requests are
+# pipelined: any number of them can be sent before their replies are read, so that a whole batch of queries only
+# costs a single round trip to the X server.
+#
+# See https://www.x.org/releases/X11R7.7/doc/xproto/x11protocol.html for the protocol reference.
+
+X11_UNIX_SOCKET = "/tmp/.X11-unix/X{}"
+X11_TCP_PORT = 6000
+
+AUTH_NAME = b"MIT-MAGIC-COOKIE-1"
+
+# Xauthority entry families
+FAMILY_INTERNET = 0
+FAMILY_INTERNET6 = 6
+FAMILY_LOCAL = 256
+FAMILY_WILD = 0xffff
+
+IPV4_MAPPED_PREFIX = b"\x00" * 10 + b"\xff\xff"
+
+# Core request opcodes
+OPCODE_CHANGE_WINDOW_ATTRIBUTES = 2
+OPCODE_GET_GEOMETRY = 14
+OPCODE_INTERN_ATOM = 16
+OPCODE_CHANGE_PROPERTY = 18
+OPCODE_GET_PROPERTY = 20
+OPCODE_SEND_EVENT = 25
+OPCODE_TRANSLATE_COORDINATES = 40
+OPCODE_GET_INPUT_FOCUS = 43
+OPCODE_QUERY_EXTENSION = 98
+
+# The first byte of every packet sent by the server identifies what it is
+PACKET_ERROR = 0
+PACKET_REPLY = 1
+
+# Every packet sent by the server is at least this big (replies can have more data afterwards)
+PACKET_SIZE = 32
+
+ANY_PROPERTY_TYPE = 0
+NONE = 0
+
+# Predefined atoms
+ATOM_CARDINAL = 6
+
+# ChangeProperty modes
+PROPERTY_MODE_REPLACE = 0
+PROPERTY_MODE_APPEND = 2
+
+# The 'time' that tells the server to use its current time
+CURRENT_TIME = 0
+
+# ChangeWindowAttributes value mask bit for the event mask
+CW_EVENT_MASK = 0x800
+
+# Event masks
+EVENT_MASK_STRUCTURE_NOTIFY = 0x20000
+EVENT_MASK_SUBSTRUCTURE_NOTIFY = 0x80000
+EVENT_MASK_SUBSTRUCTURE_REDIRECT = 0x100000
+EVENT_MASK_PROPERTY_CHANGE = 0x400000
+
+# Event codes (the first byte of an event, with the 'sent by SendEvent' bit masked off)
+EVENT_DESTROY_NOTIFY = 17
+EVENT_UNMAP_NOTIFY = 18
+EVENT_MAP_NOTIFY = 19
+EVENT_CONFIGURE_NOTIFY = 22
+EVENT_PROPERTY_NOTIFY = 28
+EVENT_CLIENT_MESSAGE = 33
+
+# Most properties are small, so a generous upper bound on their length (in 4-byte units) lets us always read
+# them in one request
+MAX_PROPERTY_LENGTH = 0x10000
+
+
+class XError(Exception):
+    """Raised when the X server sends an error in response to a request."""
+
+    def __init__(self, code: int, sequence: int, bad_value: int, opcode: int) -> None:
+        super().__init__(
+            "X error {} (opcode {}, bad value {}) for request {}".format(code, opcode, bad_value, sequence)
+        )
+
+        self.code = code
+        self.sequence = sequence
+        self.bad_value = bad_value
+        self.opcode = opcode
+
+
+class Geometry(NamedTuple):
+    root: int
+    x: int
+    y: int
+    width: int
+    height: int
+    border_width: int
+
+
+class Property(NamedTuple):
+    type: int
+    format: int
+    value: bytes
+
+
+class XConnection:
+    """
+    A connection to an X server.
+
+    Sending a request returns its sequence number (i.e. a 'cookie') right away; the reply is only read once
+    it's asked for, which is what makes it possible to pipeline many requests together.
+    """
+
+    def __init__(self, display: Optional[str] = None, sock: Optional[socket.socket] = None) -> None:
+        """
+        :param display: The X display to connect to (e.g. ":0"); defaults to the DISPLAY environment variable.
+        :param sock: An already connected socket (e.g. to a fake X server); skips opening one for the display.
+        """
+        self.display = display if display is not None else os.environ.get("DISPLAY", "")
+        host, display_number, screen_number = parse_display(self.display)
+
+        self.socket = sock or _open_socket(host, display_number)
+
+        self.sequence = 0
+        self.pending = []  # type: List[bytes]
+
+        # Packets that arrived while waiting on other replies
+        self.replies = {}  # type: Dict[int, bytes]
+        self.errors = {}  # type: Dict[int, XError]
+        self.events = []  # type: List[bytes]
+
+        self._buffer = b""
+        self.next_resource_id = 1
+
+        self._handshake(display_number, screen_number)
+
+    def close(self) -> None:
+        self.socket.close()
+
+    def fileno(self) -> int:
+        return self.socket.fileno()
+
+    def allocate_id(self) -> int:
+        resource_id = self.resource_id_base | (self.next_resource_id & self.resource_id_mask)
+        self.next_resource_id += 1
+
+        return resource_id
+
+    # Requests
+
+    def intern_atom(self, name: str, only_if_exists: bool = False) -> int:
+        name_bytes = name.encode("latin1")
+
+        return self._send(
+            OPCODE_INTERN_ATOM,
+            int(only_if_exists),
+            struct.pack("<H2x", len(name_bytes)) + _pad(name_bytes)
+        )
+
+    def get_property(
+        self, window: int, property: int, type: int = ANY_PROPERTY_TYPE, length: int = MAX_PROPERTY_LENGTH
+    ) -> int:
+        return self._send(OPCODE_GET_PROPERTY, 0, struct.pack("<IIIII", window, property, type, 0, length))
+
+    def get_geometry(self, drawable: int) -> int:
+        return self._send(OPCODE_GET_GEOMETRY, 0, struct.pack("<I", drawable))
+
+    def translate_coordinates(self, source: int, destination: int, x: int, y: int) -> int:
+        return self._send(OPCODE_TRANSLATE_COORDINATES, 0, struct.pack("<IIhh", source, destination, x, y))
+
+    def change_window_attributes(self, window: int, event_mask: int) -> int:
+        return self._send(OPCODE_CHANGE_WINDOW_ATTRIBUTES, 0, struct.pack("<III", window, CW_EVENT_MASK, event_mask))
+
+    def get_input_focus(self) -> int:
+        return self._send(OPCODE_GET_INPUT_FOCUS, 0, b"")
+
+    def change_property(
+        self, window: int, property: int, type: int, format: int, value: bytes, mode: int = PROPERTY_MODE_REPLACE
+    ) -> int:
+        # The length is in units of the format (8, 16, or 32 bits)
+        return self._send(
+            OPCODE_CHANGE_PROPERTY,
+            mode,
+            struct.pack("<IIIB3xI", window, property, type, format, len(value) // (format // 8)) + _pad(value)
+        )
+
+    def send_client_message(
+        self, destination: int, window: int, type: int, data: Sequence[int], event_mask: int
+    ) -> int:
+        """
+        Sends a (format 32) ClientMessage event about the window to whoever selected the event mask on the destination.
+
+        :param data: Up to 5 integers.
+        """
+        event = struct.pack(
+            "<BBHII5I", EVENT_CLIENT_MESSAGE, 32, 0, window, type, *(list(data) + [0] * (5 - len(data)))
+        )
+
+        return self._send(OPCODE_SEND_EVENT, 0, struct.pack("<II", destination, event_mask) + event)
+
+    def query_extension(self, name: str) -> int:
+        name_bytes = name.encode("latin1")
+        return self._send(OPCODE_QUERY_EXTENSION, 0, struct.pack("<H2x", len(name_bytes)) + _pad(name_bytes))
+
+    def send_extension_request(self, major_opcode: int, minor_opcode: int, body: bytes) -> int:
+        """
+        Sends a request of an extension (see query_extension), whose body has already been packed (and padded).
+
+        :param major_opcode: The extension's opcode.
+        :param minor_opcode: The opcode of the request within the extension.
+        """
+        return self._send(major_opcode, minor_opcode, body)
+
+    # Replies
+
+    def flush(self) -> None:
+        if self.pending:
+            self.socket.sendall(b"".join(self.pending))
+            self.pending = []
+
+    def get_reply(self, sequence: int) -> bytes:
+        """
+        Waits for the reply to the request with the given sequence number.
+
+        :raises XError: When the server responded to the request with an error.
+        """
+        self.flush()
+
+        key = sequence & 0xffff
+
+        while key not in self.replies and key not in self.errors:
+            self._read_packet()
+
+        if key in self.errors:
+            raise self.errors.pop(key)
+
+        return self.replies.pop(key)
+
+    def get_atom_reply(self, sequence: int) -> int:
+        return struct.unpack_from("<I", self.get_reply(sequence), 8)[0]
+
+    def get_property_reply(self, sequence: int) -> Property:
+        reply = self.get_reply(sequence)
+
+        format = reply[1]
+        type, _, value_length = struct.unpack_from("<III", reply, 8)
+
+        return Property(type, format, reply[32:32 + (value_length * (format // 8))])
+
+    def get_geometry_reply(self, sequence: int) -> Geometry:
+        reply = self.get_reply(sequence)
+        return Geometry(*struct.unpack_from("<IhhHHH", reply, 8))
+
+    def get_query_extension_reply(self, sequence: int) -> Optional[int]:
+        """Gets the extension's major opcode, or None if the server doesn't have the extension."""
+        reply = self.get_reply(sequence)
+        present, major_opcode = struct.unpack_from("<BB", reply, 8)
+
+        return major_opcode if present else None
+
+    def get_translate_coordinates_reply(self, sequence: int) -> Tuple[int, int]:
+        reply = self.get_reply(sequence)
+        return struct.unpack_from("<hh", reply, 12)
+
+    def sync(self) -> None:
+        """Waits until the server has processed every request sent so far (and reported any errors for them)."""
+        self.get_reply(self.get_input_focus())
+
+    def discard_errors(self) -> None:
+        self.errors = {}
+
+    def has_pending_events(self) -> bool:
+        """Whether there are events that have already been read from the socket, but not yet polled."""
+        return bool(self.events or self._buffer)
+
+    def poll_events(self) -> List[bytes]:
+        """Reads whatever events are available right now, without blocking."""
+        self.flush()
+        self.socket.setblocking(False)
+
+        try:
+            while True:
+                self._read_packet()
+        except (BlockingIOError, InterruptedError):
+            pass
+        finally:
+            self.socket.setblocking(True)
+
+        events, self.events = self.events, []
+        return events
+
+    # Internals
+
+    def _send(self, opcode: int, data_byte: int, body: bytes) -> int:
+        # Request lengths are in 4-byte units and include the 4-byte header
+        self.pending.append(struct.pack("<BBH", opcode, data_byte, 1 + len(body) // 4) + body)
+        self.sequence += 1
+
+        return self.sequence
+
+    def _fill_buffer(self, size: int) -> None:
+        while len(self._buffer) < size:
+            chunk = self.socket.recv(max(4096, size - len(self._buffer)))
+
+            if not chunk:
+                raise ConnectionError("X server closed the connection")
+
+            self._buffer += chunk
+
+    def _recv_exactly(self, size: int) -> bytes:
+        self._fill_buffer(size)
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _read_packet(self) -> None:
+        # Only consume the packet from the buffer once all of it has arrived, so that a non-blocking read
+        # that gets interrupted halfway through doesn't lose anything
+        self._fill_buffer(PACKET_SIZE)
+        packet_type = self._buffer[0]
+        packet_size = PACKET_SIZE
+
+        if packet_type == PACKET_REPLY:
+            packet_size += struct.unpack_from("<I", self._buffer, 4)[0] * 4
+
+        packet = self._recv_exactly(packet_size)
+
+        if packet_type == PACKET_REPLY:
+            self.replies[struct.unpack_from("<H", packet, 2)[0]] = packet
+        elif packet_type == PACKET_ERROR:
+            sequence, bad_value, _, opcode = struct.unpack_from("<HIHB", packet, 2)
+            self.errors[sequence] = XError(packet[1], sequence, bad_value, opcode)
+        else:
+            self.events.append(packet)
+
+    def _handshake(self, display_number: int, screen_number: int) -> None:
+        family, address = get_auth_address(self.socket)
+        auth_name, auth_data = get_auth(family, address, display_number)
+
+        self.socket.sendall(
+            struct.pack("<BxHHHH2x", ord("l"), 11, 0, len(auth_name), len(auth_data))
+            + _pad(auth_name)
+            + _pad(auth_data)
+        )
+
+        header = self._recv_exactly(8)
+        status = header[0]
+        additional_length = struct.unpack_from("<H", header, 6)[0]
+        body = self._recv_exactly(additional_length * 4)
+
+        if status != 1:
+            # The reason is right at the start of the body for both failed (0) and authenticate (2) responses
+            reason_length = header[1] if status == 0 else len(body)
+            reason = body[:reason_length].decode("latin1", "replace").strip("\0 \n")
+
+            raise ConnectionError("X server refused the connection: {}".format(reason))
+
+        self._process_setup(body, screen_number)
+
+    def _process_setup(self, body: bytes, screen_number: int) -> None:
+        (
+            _, self.resource_id_base, self.resource_id_mask, _, vendor_length, _, screen_count, format_count
+        ) = struct.unpack_from("<IIIIHHBB", body, 0)
+
+        if screen_number >= screen_count:
+            raise ConnectionError("Screen {} doesn't exist on display {}".format(screen_number, self.display))
+
+        # Skip over the rest of the fixed part, the vendor string, and the pixmap formats
+        offset = 32 + len(_pad(b"\0" * vendor_length)) + (8 * format_count)
+
+        for screen in range(screen_count):
+            root, = struct.unpack_from("<I", body, offset)
+            width, height = struct.unpack_from("<HH", body, offset + 20)
+            depth_count = body[offset + 39]
+
+            if screen == screen_number:
+                self.root = root
+                self.screen_width = width
+                self.screen_height = height
+                break
+
+            offset += 40
+
+            for _ in range(depth_count):
+                visual_count, = struct.unpack_from("<H", body, offset + 2)
+                offset += 8 + (24 * visual_count)
+
+
+def parse_display(display: str) -> Tuple[str, int, int]:
+    """
+    Parses a DISPLAY string into its host, display number, and screen number.
+
+    e.g. ":0" -> ("", 0, 0), "localhost:10.1" -> ("localhost", 10, 1), "unix:1" -> ("", 1, 0)
+    """
+    if ":" not in display:
+        raise ValueError("Invalid display: '{}'".format(display))
+
+    host, _, display_and_screen = display.rpartition(":")
+    display_number, _, screen_number = display_and_screen.partition(".")
+
+    if host == "unix":
+        host = ""
+
+    return (host, int(display_number), int(screen_number or 0))
+
+
+def unpack_cardinals(value: bytes) -> Sequence[int]:
+    """Unpacks the value of a format 32 property (e.g. CARDINAL or WINDOW) into its integers."""
+    return struct.unpack("<{}I".format(len(value) // 4), value)
+
+
+def get_auth_address(sock: socket.socket) -> Tuple[int, bytes]:
+    """
+    Gets the Xauthority family and address that the cookie for a connection is stored under, the same way
+    Xlib does: remote TCP connections use the server's IP address, while local connections (i.e. over a Unix
+    socket or the loopback interface) use the name of this machine.
+    """
+    if sock.family == socket.AF_INET6:
+        address = socket.inet_pton(socket.AF_INET6, sock.getpeername()[0])
+
+        if address.startswith(IPV4_MAPPED_PREFIX):
+            address = address[len(IPV4_MAPPED_PREFIX):]
+        elif address != socket.inet_pton(socket.AF_INET6, "::1"):
+            return (FAMILY_INTERNET6, address)
+        else:
+            address = b""
+    elif sock.family == socket.AF_INET:
+        address = socket.inet_aton(sock.getpeername()[0])
+    else:
+        address = b""
+
+    if address and not address.startswith(b"\x7f"):
+        return (FAMILY_INTERNET, address)
+
+    return (FAMILY_LOCAL, socket.gethostname().encode("latin1"))
+
+
+def get_auth(
+    family: int, address: bytes, display_number: int, xauthority: Optional[str] = None
+) -> Tuple[bytes, bytes]:
+    """
+    Finds the MIT-MAGIC-COOKIE-1 for the display in the Xauthority file.
+
+    An entry only matches if its family and address match the connection's (or it's a wildcard entry), and its
+    display number matches the display's (or it's empty); the first matching entry wins, like with Xlib and xauth.
+
+    :param family: The Xauthority family of the connection (see get_auth_address).
+    :param address: The address of the connection, in the format of its family.
+    :param xauthority: The Xauthority file; defaults to the XAUTHORITY environment variable, or ~/.Xauthority.
+    :return: The auth protocol name and data; both are empty if no cookie matched.
+    """
+    path = xauthority or os.environ.get("XAUTHORITY") or os.path.join(os.path.expanduser("~"), ".Xauthority")
+    wanted_number = str(display_number).encode("latin1")
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return (b"", b"")
+
+    for entry_family, entry_address, number, name, cookie in _parse_xauthority(data):
+        if name != AUTH_NAME or (number and number != wanted_number):
+            continue
+
+        if entry_family == FAMILY_WILD or (entry_family == family and entry_address == address):
+            return (name, cookie)
+
+    return (b"", b"")
+
+
+def _parse_xauthority(data: bytes) -> List[Tuple[int, bytes, bytes, bytes, bytes]]:
+    entries = []
+    offset = 0
+
+    def read_field() -> bytes:
+        nonlocal offset
+
+        length, = struct.unpack_from(">H", data, offset)
+        field = data[offset + 2:offset + 2 + length]
+        offset += 2 + length
+
+        return field
+
+    try:
+        while offset < len(data):
+            family, = struct.unpack_from(">H", data, offset)
+            offset += 2
+
+            entries.append((family, read_field(), read_field(), read_field(), read_field()))
+    except struct.error:  # Truncated file; use whatever was complete
+        pass
+
+    return entries
+
+
+def _open_socket(host: str, display_number: int) -> socket.socket:
+    if host:
+        return socket.create_connection((host, X11_TCP_PORT + display_number))
+
+    path = X11_UNIX_SOCKET.format(display_number)
+
+    # Prefer the abstract socket (what Xlib tries first on Linux), then the filesystem one
+    for address in ("\0" + path, path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(address)
+            return sock
+        except OSError:
+            sock.close()
+
+    raise ConnectionError("Unable to connect to X display :{}".format(display_number))
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
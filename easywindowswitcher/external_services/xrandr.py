@@ -0,0 +1,99 @@
+import struct
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from easywindowswitcher.data_models import Monitor
+from easywindowswitcher.utils.service_helpers import get_command_output
+
+if TYPE_CHECKING:  # pragma: no cover
+    from easywindowswitcher.external_services.xconnection import XConnection
+
+RANDR_EXTENSION_NAME = "RANDR"
+
+# RandR request (i.e. minor) opcodes
+RANDR_QUERY_VERSION = 0
+RANDR_GET_SCREEN_RESOURCES_CURRENT = 25
+
+# GetScreenResourcesCurrent is new in RandR 1.3
+RANDR_VERSION = (1, 3)
+
+
+class XRandR:
+    """
+    'xrandr' is a command line utility for querying (and configuring) the monitors
+    attached to an X screen, through the RandR extension.
+
+    This class wraps the command line calls to this utility and exposes the
+    information in a more useful format.
+    """
+
+    def __init__(self, display: Optional[str] = None, connection: Optional["XConnection"] = None) -> None:
+        """
+        :param display: The X display to query; defaults to the DISPLAY environment variable.
+        :param connection: An already open connection to the display (e.g. to a fake X server), for the queries
+            that talk to the RandR extension directly; otherwise, a connection is opened just for them.
+        """
+        self.display = display
+        self.connection = connection
+
+    def get_monitors(self) -> List[Monitor]:
+        """
+        Gets all of the active monitors.
+
+        :return: The monitors, or an empty list if they couldn't be queried (e.g. xrandr isn't installed).
+        """
+        monitors_config = get_command_output(
+            ["xrandr", "--listmonitors"], env={"DISPLAY": self.display} if self.display else None
+        )
+        return self._parse_monitors_config(monitors_config)
+
+    def get_config_timestamps(self) -> Optional[Tuple[int, int]]:
+        """
+        Gets RandR's timestamps of when the monitors were last configured (e.g. moved, swapped, or rotated)
+        and of when the outputs last changed (e.g. a monitor was plugged in).
+
+        Both change whenever the layout of the monitors does, even if the desktop stays the same size, and
+        querying them straight from the X server is much cheaper than running xrandr.
+
+        :return: The timestamps, or None if they couldn't be queried (e.g. the server doesn't have RandR 1.3).
+        """
+        # Imported here so that the default backend only pays for importing the X11 protocol implementation
+        # when the monitors are actually looked up
+        from easywindowswitcher.external_services.xconnection import XConnection, XError
+
+        try:
+            connection = self.connection or XConnection(self.display)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            major_opcode = connection.get_query_extension_reply(connection.query_extension(RANDR_EXTENSION_NAME))
+
+            if major_opcode is None:
+                return None
+
+            # The server only answers the requests of the RandR version that the client says it knows
+            connection.send_extension_request(major_opcode, RANDR_QUERY_VERSION, struct.pack("<II", *RANDR_VERSION))
+
+            reply = connection.get_reply(connection.send_extension_request(
+                major_opcode, RANDR_GET_SCREEN_RESOURCES_CURRENT, struct.pack("<I", connection.root)
+            ))
+
+            return struct.unpack_from("<II", reply, 8)
+        except (OSError, XError):
+            return None
+        finally:
+            if connection is not self.connection:
+                connection.close()
+
+    def _parse_monitors_config(self, monitors_config: str) -> List[Monitor]:
+        # Example monitors_config:
+        #
+        # Monitors: 2
+        #  0: +*DP-1 1920/531x1080/299+0+0  DP-1
+        #  1: +HDMI-1 1920/527x1080/296+1920+0  HDMI-1
+        #
+        # The first line is just the count, so it's skipped.
+        return [
+            Monitor(raw_config=monitor_config)
+            for monitor_config in monitors_config.split("\n")[1:]
+            if monitor_config.strip()
+        ]
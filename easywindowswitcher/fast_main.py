@@ -0,0 +1,156 @@
+"""
+The entry point of the `easywindowswitcher` command.
+
+Since the CLI is run on every keystroke of a keyboard shortcut, most of the time of a window switch is just Python
+starting up and importing things. So the hot commands (`monitor`, `direction`, `mru` and `back`) are parsed by hand
+here and run without ever importing click or the rest of the command tree. Everything else (help, other commands,
+invalid args) is handed off to the full CLI in main.py, which then handles it exactly as before.
+
+Keep the imports at the top of this module to the standard library's bare minimum; `make import-time` reports
+what the hot path costs to import.
+"""
+
+import sys
+from typing import List, NamedTuple, Optional
+from typing import Dict  # noqa
+
+# The options of the root command that are understood here, and whether each of them takes a value.
+# These have to match the options of the root command (see commands/root.py), by whether they take a value.
+ROOT_OPTIONS = {"--backend": True, "--across-workspaces": False, "--profile": False, "--profile-trace": True}
+
+# Modules that the hot commands must not import, since they are only needed by the full CLI (or only some of the time)
+DEFERRED_MODULES = ("click", "logging.handlers", "concurrent.futures", "shlex")
+
+# Everything that the hot commands import before they start querying windows
+HOT_PATH_MODULES = (
+    "easywindowswitcher.fast_main",
+    "easywindowswitcher.external_services.backends",
+    "easywindowswitcher.services.window_focuser",
+    "easywindowswitcher.utils.logger",
+)
+
+
+class HotCommand(NamedTuple):
+    name: str
+    value: str
+    backend: Optional[str] = None
+    profile: bool = False
+    profile_trace: Optional[str] = None
+    across_workspaces: bool = False
+
+
+def parse_hot_command(args: List[str]) -> Optional[HotCommand]:
+    """
+    Parses the args, if they are just a `monitor`, `direction`, `mru` or `back` command (with any of the ROOT_OPTIONS).
+
+    :return: The parsed command, or None if the args need the full CLI.
+    """
+    from easywindowswitcher.external_services.backends import BACKENDS
+
+    args = list(args)
+    options = {}  # type: Dict[str, str]
+
+    while args and args[0].startswith("--"):
+        option, has_value, option_value = args.pop(0).partition("=")
+
+        if option not in ROOT_OPTIONS or option in options:
+            return None
+
+        if ROOT_OPTIONS[option] and not has_value:
+            if not args:
+                return None
+
+            option_value = args.pop(0)
+        elif has_value and not ROOT_OPTIONS[option]:
+            return None
+
+        options[option] = option_value
+
+    backend = options.get("--backend")
+
+    # Let the full CLI report invalid backends, the same way it always has
+    if backend is not None and backend not in BACKENDS:
+        return None
+
+    # `back` is just a shorthand for `mru 1`
+    if args == ["back"]:
+        args = ["mru", "1"]
+
+    if len(args) != 2:
+        return None
+
+    name, value = args
+
+    # Anything that looks like an option (e.g. `--help`) is left to the full CLI
+    if value.startswith("-"):
+        return None
+
+    is_index = value.isdigit()
+
+    if name == "direction" or (name == "monitor" and is_index) or (name == "mru" and is_index and int(value) > 0):
+        return HotCommand(
+            name,
+            value,
+            backend,
+            profile="--profile" in options,
+            profile_trace=options.get("--profile-trace"),
+            across_workspaces="--across-workspaces" in options
+        )
+    else:
+        return None
+
+
+def run_hot_command(command: HotCommand) -> int:
+    from easywindowswitcher.external_services.backends import create_backend
+    from easywindowswitcher.services.window_focuser import WindowFocuser
+    from easywindowswitcher.utils import profiler
+    from easywindowswitcher.utils.logger import create_logger
+
+    if command.profile or command.profile_trace:
+        profiler.enable(trace_path=command.profile_trace)
+
+    try:
+        with profiler.span(command.name, profiler.CATEGORY_COMMAND, value=command.value):
+            logger = create_logger()
+            logger.debug("Root '%s' args: %s", command.name, command.value)
+
+            # Without the option, whether to go across workspaces is up to the environment (like the full CLI)
+            window_focuser = WindowFocuser(
+                create_backend(command.backend), across_workspaces=True if command.across_workspaces else None
+            )
+
+            if command.name == "monitor":
+                window_focuser.focus_by_monitor_index(int(command.value))
+            elif command.name == "mru":
+                window_focuser.focus_by_history(int(command.value))
+            else:
+                window_focuser.focus_by_direction(command.value)
+    finally:
+        profiler.finish()
+
+    return 0
+
+
+def run_full_cli(args: List[str]) -> int:
+    from easywindowswitcher.main import cli
+
+    return cli.main(args=args, prog_name="easywindowswitcher")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+
+    # Does nothing unless a trace is being recorded (see utils/recorder.py)
+    from easywindowswitcher.utils import recorder
+    recorder.record(recorder.EVENT_INVOCATION, args=args)
+
+    command = parse_hot_command(args)
+
+    if command is None:
+        return run_full_cli(args)
+
+    return run_hot_command(command)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
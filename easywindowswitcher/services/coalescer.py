@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Callable, List
+from typing import Optional  # noqa
+
+
+class _Batch:
+    """The requests that are being coalesced together."""
+
+    def __init__(self) -> None:
+        self.values = []  # type: List[str]
+        self.done = threading.Event()
+        self.error = None  # type: Optional[BaseException]
+
+
+class RequestCoalescer:
+    """
+    Merges requests that arrive in quick succession (e.g. from a held key repeating) into a single batch.
+
+    The first request of a batch waits for the coalescing window to pass, then resolves every request that arrived
+    in the meantime all at once; the requests that joined the batch just wait for that to happen. So no matter
+    how fast the requests come in, they are resolved at most once per window.
+
+    Requests have to be submitted from different threads (e.g. one per connection) to be coalesced.
+    """
+
+    def __init__(self, window: float, resolve: Callable[[List[str]], None]) -> None:
+        """
+        :param window: How long (in seconds) the first request of a batch waits for more requests to join it.
+        :param resolve: Resolves a whole batch of requests, in the order they arrived.
+        """
+        self.window = window
+        self.resolve = resolve
+
+        self._lock = threading.Lock()
+        self._pending_batch = None  # type: Optional[_Batch]
+
+    def submit(self, value: str) -> None:
+        """
+        Adds a request to the pending batch (or starts a new one), returning once the batch has been resolved.
+
+        :raises: Whatever resolving the batch raised.
+        """
+        with self._lock:
+            batch = self._pending_batch
+            is_first = batch is None
+
+            if batch is None:
+                batch = self._pending_batch = _Batch()
+
+            batch.values.append(value)
+
+        if is_first:
+            self._resolve_after_window(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error:
+            raise batch.error
+
+    def _resolve_after_window(self, batch: _Batch) -> None:
+        time.sleep(self.window)
+
+        # Anything that comes in from here on starts the next batch
+        with self._lock:
+            self._pending_batch = None
+
+        try:
+            self.resolve(batch.values)
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
@@ -0,0 +1,297 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from typing import Callable, Dict, Tuple  # noqa
+from easywindowswitcher.external_services.x11 import X11
+from easywindowswitcher.services.coalescer import RequestCoalescer
+from easywindowswitcher.services.window_focuser import (
+    BATCH_DIRECTION, DIRECTIONS, WindowFocuser, parse_batch_operations
+)
+from easywindowswitcher.services.window_index import LiveWindowIndex
+from easywindowswitcher.services.window_watcher import WindowWatcher
+from easywindowswitcher.utils import daemon_protocol, profiler, service_helpers
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedRequest(Exception):
+    """Raised when the daemon is asked to run a command that only the full CLI knows how to run."""
+    pass
+
+
+class SwitcherDaemon:
+    """
+    Long-running process that keeps a WindowFocuser warm and serves focus requests
+    from the thin client (see client.py) over a Unix socket.
+
+    Requests are handled one at a time, in the order they arrive, so that rapid keystrokes
+    can't race each other. Optionally, direction requests that arrive in quick succession (i.e. from a held
+    key repeating) are coalesced, so that they are resolved all at once and only focus a single window.
+
+    With the X11 backend, the focuser's indices are kept up to date from X events, so requests
+    don't need to take a new snapshot at all. Otherwise, every request takes its own snapshot.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str],
+        window_focuser: Optional[WindowFocuser] = None,
+        watch_events: Optional[bool] = None,
+        coalesce_window: float = 0
+    ) -> None:
+        """
+        :param socket_path: Where to create the Unix socket; None for a daemon whose requests are routed to it
+            by a DisplayRouter instead (see services/display_router.py).
+        :param window_focuser: The focuser to handle requests with.
+        :param watch_events: Whether to keep the focuser's indices live from X events;
+            defaults to doing so whenever the focuser uses the X11 backend.
+        :param coalesce_window: How long (in seconds) to wait for more direction requests to coalesce
+            with the first one; 0 to handle every direction request on its own.
+        """
+        self.socket_path = socket_path
+        self.window_focuser = window_focuser or WindowFocuser()
+
+        # The daemon keeps its state warm on its own, so it would only ever be reading back its own snapshots
+        self.window_focuser.snapshot_cache = None
+
+        # The daemon runs for long enough that importing NumPy (if it's installed) to index big desktops pays off
+        self.window_focuser.use_window_table = True
+
+        if watch_events is None:
+            watch_events = isinstance(self.window_focuser.backend, X11)
+
+        self.live_index = None  # type: Optional[LiveWindowIndex]
+        self.watcher = None  # type: Optional[WindowWatcher]
+
+        if watch_events:
+            self.live_index = LiveWindowIndex(self.window_focuser)
+            self.watcher = WindowWatcher(
+                self.live_index, display=getattr(self.window_focuser.backend, "display", None)
+            )
+
+        # Maps each command to its handler and how many arguments it takes (None for any number of them).
+        # Handlers can return a message for the client (e.g. to be printed).
+        self.commands = {
+            "monitor": (self._monitor, 1),
+            "direction": (self._direction, 1),
+            "workspace": (self._workspace, None),
+            "back": (self._back, 0),
+            "mru": (self._mru, 1),
+            "find": (self._find, None),
+            "batch": (self._batch, None),
+            "stats": (self._stats, 0),
+        }  # type: Dict[str, Tuple[Callable[..., Optional[str]], Optional[int]]]
+
+        # How long each command took to handle, for the `stats` command
+        self.latencies = profiler.LatencyHistograms()
+
+        # Coalescing needs the requests to be read concurrently, so the focuser is guarded by this lock instead
+        self.request_lock = threading.RLock()
+        self.coalescer = None  # type: Optional[RequestCoalescer]
+
+        if coalesce_window > 0:
+            self.coalescer = RequestCoalescer(coalesce_window, self._focus_by_directions)
+
+        self.server = None  # type: Optional[socketserver.UnixStreamServer]
+
+    def serve_forever(self) -> None:
+        assert self.socket_path is not None, "Only a daemon with its own socket can serve requests"
+
+        remove_stale_socket(self.socket_path)
+
+        daemon = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(daemon.handle_request(self.rfile.readline()))
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        if self.coalescer:
+            self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, RequestHandler)
+            self.server.daemon_threads = True
+        else:
+            self.server = socketserver.UnixStreamServer(self.socket_path, RequestHandler)
+
+        # Only the user running the daemon should be able to control their windows
+        os.chmod(self.socket_path, 0o600)
+
+        logger.info("Listening on %s", self.socket_path)
+
+        self.start()
+
+        # The daemon runs for long enough that keeping shells around to run the backend's commands in pays off
+        service_helpers.enable_command_pool()
+
+        try:
+            self.server.serve_forever()
+        finally:
+            service_helpers.disable_command_pool()
+
+            self.stop()
+
+            self.server.server_close()
+            remove_socket(self.socket_path)
+
+    def shutdown(self) -> None:
+        if self.server:
+            self.server.shutdown()
+
+    def start(self) -> None:
+        """Starts keeping the focuser's state live (if watching events), without serving any requests itself."""
+        if self.watcher:
+            self.watcher.start()
+
+    def stop(self) -> None:
+        if self.watcher:
+            self.watcher.stop()
+
+    def handle_request(self, data: bytes) -> bytes:
+        """Handles a single encoded request, returning the encoded response."""
+        return self.handle_args(daemon_protocol.decode_request(data))
+
+    def handle_args(self, args: List[str]) -> bytes:
+        """Handles the (already decoded) args of a request, returning the encoded response."""
+        try:
+            logger.debug("Daemon request: %s", args)
+
+            message = self.execute(args)
+
+            return daemon_protocol.encode_response(daemon_protocol.RESPONSE_OK, message or "")
+        except UnsupportedRequest as e:
+            return daemon_protocol.encode_response(daemon_protocol.RESPONSE_UNSUPPORTED, str(e))
+        except Exception as e:  # Who knows what else went wrong; the daemon must stay up regardless
+            logger.debug("Exception occured while handling request: %s", e)
+            logger.debug("Stacktrace: ", exc_info=True)
+
+            return daemon_protocol.encode_response(daemon_protocol.RESPONSE_ERROR, str(e))
+        finally:
+            profiler.flush()
+
+    def execute(self, args: List[str]) -> Optional[str]:
+        if not args or args[0] not in self.commands:
+            raise UnsupportedRequest(" ".join(args))
+
+        command, *command_args = args
+        handler, argument_count = self.commands[command]
+
+        if argument_count is not None and len(command_args) != argument_count:
+            # Let the full CLI produce the proper usage error
+            raise UnsupportedRequest(" ".join(args))
+
+        start_time = time.perf_counter()
+
+        try:
+            with profiler.span(command, profiler.CATEGORY_COMMAND, args=command_args):
+                return handler(*command_args)
+        finally:
+            self.latencies.record(command, time.perf_counter() - start_time)
+
+    def _monitor(self, index: str) -> None:
+        if not index.lstrip("-").isdigit():
+            raise UnsupportedRequest("monitor {}".format(index))
+
+        with self._window_state():
+            self.window_focuser.focus_by_monitor_index(int(index))
+
+    def _direction(self, direction: str) -> None:
+        if self.coalescer and direction in DIRECTIONS:
+            self.coalescer.submit(direction)
+            return
+
+        with self._window_state():
+            self.window_focuser.focus_by_direction(direction)
+
+    def _focus_by_directions(self, directions: List[str]) -> None:
+        """Resolves a batch of coalesced direction requests with (at most) a single focus."""
+        with profiler.span("coalesced_directions", directions=len(directions)):
+            with self._window_state():
+                self.window_focuser.focus_by_batch([(BATCH_DIRECTION, direction) for direction in directions])
+
+    def _workspace(self, *indices: str) -> None:
+        if len(indices) not in (1, 2) or not all(index.lstrip("-").isdigit() for index in indices):
+            raise UnsupportedRequest(" ".join(("workspace",) + indices))
+
+        with self._window_state():
+            self.window_focuser.focus_by_workspace_index(*map(int, indices))
+
+    def _back(self) -> None:
+        with self._window_state():
+            self.window_focuser.focus_by_history(1)
+
+    def _mru(self, position: str) -> None:
+        if not position.isdigit() or int(position) < 1:
+            raise UnsupportedRequest("mru {}".format(position))
+
+        with self._window_state():
+            self.window_focuser.focus_by_history(int(position))
+
+    def _find(self, *query: str) -> None:
+        if not query:
+            raise UnsupportedRequest("find")
+
+        with self._window_state():
+            self.window_focuser.focus_by_search(" ".join(query))
+
+    def _batch(self, *tokens: str) -> None:
+        # A batch on stdin (or an invalid one) is left to the full CLI, which can read (or report on) it
+        try:
+            operations = parse_batch_operations(tokens)
+        except ValueError:
+            operations = []
+
+        if not operations:
+            raise UnsupportedRequest(" ".join(("batch",) + tokens))
+
+        with self._window_state():
+            self.window_focuser.focus_by_batch(operations)
+
+    def _stats(self) -> str:
+        """The latency percentiles of every command handled so far (as JSON)."""
+        return json.dumps(self.latencies.report())
+
+    @contextmanager
+    def _window_state(self) -> Iterator[None]:
+        """Makes sure the focuser's state is up to date (and stays that way) while handling a request."""
+        with self.request_lock:
+            if not self.live_index or not self.watcher:
+                self.window_focuser.invalidate()
+                yield
+                return
+
+            with self.live_index.lock:
+                # Until the watcher has (re)synced the live index, fall back to a fresh snapshot
+                if not self.watcher.is_healthy():
+                    self.window_focuser.invalidate()
+
+                yield
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """Removes a leftover socket file, unless another daemon is still actively listening on it."""
+    if not os.path.exists(socket_path):
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        remove_socket(socket_path)
+    else:
+        raise RuntimeError("A daemon is already listening on {}".format(socket_path))
+    finally:
+        probe.close()
+
+
+def remove_socket(socket_path: str) -> None:
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from typing import Deque  # noqa
+from easywindowswitcher.external_services.backends import create_backend
+from easywindowswitcher.services.daemon import SwitcherDaemon, remove_socket, remove_stale_socket
+from easywindowswitcher.services.window_focuser import WindowFocuser
+from easywindowswitcher.utils import daemon_protocol, profiler, service_helpers
+
+logger = logging.getLogger(__name__)
+
+# How many requests can be handled at the same time, across all of the displays
+DEFAULT_WORKERS = 4
+
+# How many requests for a single display can be waiting on it before the rest are turned away
+DEFAULT_MAX_PENDING_REQUESTS = 4
+
+# How long (in seconds) a request can wait for its display and a worker before it's turned away;
+# this has to stay under the client's timeout, so that the client doesn't give up on a request that then still runs
+REQUEST_TIMEOUT = 1.5
+
+# How long (in seconds) a display can go without any requests before its state is dropped (e.g. its session ended)
+DISPLAY_IDLE_TIMEOUT = 60 * 60.0
+
+# How far back (in seconds) the request rates are measured over
+RATE_WINDOW = 60.0
+
+
+class DisplayState:
+    """Everything the router keeps for a single display: its daemon, and the stats of its requests."""
+
+    def __init__(self, daemon: SwitcherDaemon) -> None:
+        self.daemon = daemon
+
+        # Held while one of the display's requests is being handled (or waiting for a worker), so that a display
+        # can only ever tie up a single worker at a time
+        self.lock = threading.Lock()
+
+        self.pending_requests = 0
+        self.total_requests = 0
+        self.rejected_requests = 0
+
+        self.request_times = deque()  # type: Deque[float]
+        self.last_request_time = time.monotonic()
+
+    def record_request(self, now: float) -> None:
+        self.total_requests += 1
+        self.last_request_time = now
+        self.request_times.append(now)
+
+        while self.request_times and self.request_times[0] < now - RATE_WINDOW:
+            self.request_times.popleft()
+
+    def report(self, now: float) -> Dict[str, object]:
+        recent_requests = sum(1 for request_time in self.request_times if request_time >= now - RATE_WINDOW)
+
+        return {
+            "requests": self.total_requests,
+            "rejected_requests": self.rejected_requests,
+            "pending_requests": self.pending_requests,
+            "requests_per_second": round(recent_requests / RATE_WINDOW, 3),
+            "latencies": self.daemon.latencies.report(),
+        }
+
+
+class DisplayRouter:
+    """
+    Long-running process that serves the requests of many X displays (e.g. a bunch of VNC/Xvfb desktops),
+    instead of running a separate daemon (see SwitcherDaemon) for each of them.
+
+    Every request names the display it's for (see daemon_protocol), and is routed to that display's own daemon,
+    which is created the first time the display sends a request. Each display's daemon has its own focuser and
+    backend, so the displays never share any state.
+
+    Requests are handled by a bounded number of workers. A display's requests are handled one at a time, and only
+    take up a worker while they're actually being handled, so a slow (or hung) X server can only ever tie up a single
+    worker; the other displays keep being served by the rest. Requests that would have to wait on a backed up
+    display (or for a worker) for too long are turned away, instead of piling up.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        create_focuser: Optional[Callable[[str], WindowFocuser]] = None,
+        workers: int = DEFAULT_WORKERS,
+        max_pending_requests: int = DEFAULT_MAX_PENDING_REQUESTS
+    ) -> None:
+        """
+        :param socket_path: Where to create the Unix socket.
+        :param create_focuser: Creates the focuser for a display; defaults to one with the default backend.
+        :param workers: How many requests can be handled at the same time, across all of the displays.
+        :param max_pending_requests: How many requests for a single display can be in flight at once.
+        """
+        self.socket_path = socket_path
+        self.create_focuser = create_focuser or (lambda display: WindowFocuser(backend=create_backend(display=display)))
+        self.max_pending_requests = max_pending_requests
+        self.workers = workers
+
+        self.worker_slots = threading.BoundedSemaphore(workers)
+
+        self.displays = {}  # type: Dict[str, DisplayState]
+        self.displays_lock = threading.Lock()
+
+        self.server = None  # type: Optional[socketserver.ThreadingUnixStreamServer]
+
+    def serve_forever(self) -> None:
+        remove_stale_socket(self.socket_path)
+
+        router = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(router.handle_request(self.rfile.readline()))
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        # Connections are read on their own threads, but only ever handled by one of the workers
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, RequestHandler)
+        self.server.daemon_threads = True
+
+        # Only the user running the router should be able to control their windows
+        os.chmod(self.socket_path, 0o600)
+
+        logger.info("Listening on %s for all displays (with %s workers)", self.socket_path, self.workers)
+
+        # A session for every worker, so that the displays don't end up waiting on each other for one
+        service_helpers.enable_command_pool(size=self.workers)
+
+        try:
+            self.server.serve_forever()
+        finally:
+            service_helpers.disable_command_pool()
+
+            with self.displays_lock:
+                displays, self.displays = self.displays, {}
+
+            for display_state in displays.values():
+                display_state.daemon.stop()
+
+            self.server.server_close()
+            remove_socket(self.socket_path)
+
+    def shutdown(self) -> None:
+        if self.server:
+            self.server.shutdown()
+
+    def handle_request(self, data: bytes) -> bytes:
+        """Handles a single encoded request, returning the encoded response."""
+        display, args = daemon_protocol.decode_routed_request(data)
+
+        if args == ["stats"]:
+            return daemon_protocol.encode_response(daemon_protocol.RESPONSE_OK, self._stats())
+
+        if not display:
+            # Without a display, there's nothing to route the request to; the client can still run it itself
+            return daemon_protocol.encode_response(daemon_protocol.RESPONSE_UNSUPPORTED, "No display given")
+
+        display_state = self._admit_request(display)
+
+        if display_state is None:
+            return self._busy(display)
+
+        try:
+            return self._handle_display_request(display, display_state, args)
+        finally:
+            with self.displays_lock:
+                display_state.pending_requests -= 1
+
+    def _handle_display_request(self, display: str, display_state: DisplayState, args: List[str]) -> bytes:
+        deadline = time.monotonic() + REQUEST_TIMEOUT
+
+        # The display comes first, so that its requests only take up a worker once it can actually handle them
+        if not display_state.lock.acquire(timeout=REQUEST_TIMEOUT):
+            return self._reject(display, display_state)
+
+        try:
+            if not self.worker_slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                return self._reject(display, display_state)
+
+            try:
+                with profiler.span("display_request", display=display):
+                    return display_state.daemon.handle_args(args)
+            finally:
+                self.worker_slots.release()
+        finally:
+            display_state.lock.release()
+
+    def _admit_request(self, display: str) -> Optional[DisplayState]:
+        """
+        Counts a new request against its display, creating the state of a display that's new (and dropping the state
+        of any displays that have gone idle).
+
+        :return: The display's state, or None if the display already has too many requests pending.
+        """
+        now = time.monotonic()
+        idle_displays = []  # type: List[DisplayState]
+
+        with self.displays_lock:
+            for other_display, other_display_state in list(self.displays.items()):
+                if other_display != display and self._is_idle(other_display_state, now):
+                    logger.info("Dropping the state of idle display %s", other_display)
+                    idle_displays.append(self.displays.pop(other_display))
+
+            display_state = self.displays.get(display)
+
+            if display_state is None:
+                logger.info("Serving display %s", display)
+
+                # A daemon without a socket of its own; the router hands it its requests. Creating the focuser doesn't
+                # talk to the display yet (backends connect lazily), so it's fine to do while holding the lock.
+                daemon = SwitcherDaemon(None, window_focuser=self.create_focuser(display))
+                daemon.start()
+
+                display_state = self.displays[display] = DisplayState(daemon)
+
+            display_state.record_request(now)
+
+            if display_state.pending_requests >= self.max_pending_requests:
+                display_state.rejected_requests += 1
+                display_state = None
+            else:
+                display_state.pending_requests += 1
+
+        for idle_display_state in idle_displays:
+            idle_display_state.daemon.stop()
+
+        return display_state
+
+    def _is_idle(self, display_state: DisplayState, now: float) -> bool:
+        return not display_state.pending_requests and now - display_state.last_request_time > DISPLAY_IDLE_TIMEOUT
+
+    def _reject(self, display: str, display_state: DisplayState) -> bytes:
+        with self.displays_lock:
+            display_state.rejected_requests += 1
+
+        return self._busy(display)
+
+    def _busy(self, display: str) -> bytes:
+        logger.debug("Turning away a request for busy display %s", display)
+
+        return daemon_protocol.encode_response(
+            daemon_protocol.RESPONSE_ERROR, "Display {} is too busy to handle the request".format(display)
+        )
+
+    def _stats(self) -> str:
+        """The request counts, rates, and latency percentiles of every display (as JSON)."""
+        now = time.monotonic()
+
+        with self.displays_lock:
+            return json.dumps({
+                display: display_state.report(now) for display, display_state in sorted(self.displays.items())
+            })
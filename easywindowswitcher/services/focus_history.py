@@ -0,0 +1,113 @@
+import logging
+import os
+import struct
+from typing import Collection, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# How many of the most recently focused windows are remembered
+FOCUS_HISTORY_SIZE = 64
+
+# Each window ID is stored as a little-endian unsigned 32-bit int (X window IDs are 29 bits), most recent first.
+# So the whole history is at most 256 bytes, and is read and written in a single system call each.
+HISTORY_FORMAT = "<{}I"
+WINDOW_ID_SIZE = struct.calcsize(HISTORY_FORMAT.format(1))
+
+
+class FocusHistory:
+    """
+    The most recently used (i.e. focused) windows, most recent first, persisted between invocations.
+
+    Several processes (e.g. the daemon and the CLI) can share the same history file; the history is
+    reloaded whenever the file has been changed by someone else.
+    """
+
+    def __init__(self, path: Optional[str] = None, size: int = FOCUS_HISTORY_SIZE) -> None:
+        """
+        :param path: The file to persist the history in; the history is only kept in memory when not given.
+        :param size: How many windows to remember.
+        """
+        self.path = path
+        self.size = size
+
+        self._window_ids = None  # type: Optional[List[int]]
+        self._loaded_mtime = None  # type: Optional[int]
+
+    @property
+    def window_ids(self) -> List[int]:
+        """The IDs of the most recently focused windows, most recent first."""
+        if self._window_ids is None or self._is_stale():
+            self._window_ids = self._load()
+
+        return self._window_ids
+
+    def record(self, *window_ids: int) -> None:
+        """Moves the given windows (in the order given, so the last one ends up first) to the front of the history."""
+        history = list(self.window_ids)
+
+        for window_id in window_ids:
+            if history and history[0] == window_id:
+                continue
+
+            if window_id in history:
+                history.remove(window_id)
+
+            history.insert(0, window_id)
+
+        if history[:self.size] != self.window_ids:
+            self._save(history[:self.size])
+
+    def evict(self, open_window_ids: Collection[int]) -> None:
+        """Forgets the windows that aren't open anymore."""
+        history = [window_id for window_id in self.window_ids if window_id in open_window_ids]
+
+        if history != self.window_ids:
+            self._save(history)
+
+    def _is_stale(self) -> bool:
+        return self.path is not None and self._get_mtime() != self._loaded_mtime
+
+    def _get_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns if self.path else None
+        except OSError:
+            return None
+
+    def _load(self) -> List[int]:
+        if not self.path:
+            return []
+
+        self._loaded_mtime = self._get_mtime()
+
+        try:
+            with open(self.path, "rb") as history_file:
+                data = history_file.read(self.size * WINDOW_ID_SIZE)
+        except OSError:
+            # There's just no history yet
+            return []
+
+        # Ignore a partially written ID, rather than throwing out the whole history
+        count = len(data) // WINDOW_ID_SIZE
+
+        return list(struct.unpack(HISTORY_FORMAT.format(count), data[:count * WINDOW_ID_SIZE]))
+
+    def _save(self, window_ids: List[int]) -> None:
+        self._window_ids = window_ids
+
+        if not self.path:
+            return
+
+        temporary_path = "{}.{}.tmp".format(self.path, os.getpid())
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            with open(temporary_path, "wb") as history_file:
+                history_file.write(struct.pack(HISTORY_FORMAT.format(len(window_ids)), *window_ids))
+
+            # Renaming is atomic, so concurrent invocations never see a half-written history
+            os.replace(temporary_path, self.path)
+
+            self._loaded_mtime = self._get_mtime()
+        except OSError as e:
+            logger.debug("Couldn't save the focus history: %s", e)
@@ -0,0 +1,103 @@
+from typing import Optional, Sequence
+from typing import Dict, List, Tuple  # noqa
+from easywindowswitcher.data_models import MonitorTopology, Window, Workspace, WorkspaceGrid
+from easywindowswitcher.data_models.window import WINDOW_DECORATION
+from easywindowswitcher.services.spatial_index import DIRECTION_DOWN, DIRECTION_LEFT, DIRECTION_RIGHT, DIRECTION_UP
+
+# How many workspaces over (horizontally, vertically) each direction goes
+WORKSPACE_STEPS = {
+    DIRECTION_LEFT: (-1, 0),
+    DIRECTION_RIGHT: (1, 0),
+    DIRECTION_UP: (0, -1),
+    DIRECTION_DOWN: (0, 1),
+}  # type: Dict[str, Tuple[int, int]]
+
+
+class GridWindowIndex:
+    """
+    Indexes every window of the workspace grid (not just the current workspace's) by workspace, then by monitor.
+
+    Window offsets are relative to the current workspace, so windows on other workspaces have offsets that are off
+    the screen (e.g. negative ones for the workspaces to the left); adding the current workspace's position gives
+    every window's position in the whole grid, which is what places it in a workspace.
+
+    The index is built in a single pass over the windows; after that, finding the window on a given workspace
+    and monitor, or the window to land on when moving into a workspace from any direction, is a lookup.
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[Window],
+        workspace_grid: WorkspaceGrid,
+        current_workspace: Workspace,
+        monitor_topology: MonitorTopology
+    ) -> None:
+        self.current_workspace_index = workspace_grid.get_workspace_index_at(
+            current_workspace.width, current_workspace.height
+        )
+
+        # Workspace index -> monitor index -> the monitor's window IDs, sorted left-to-right
+        self.windows_by_workspace = {}  # type: Dict[int, Dict[int, List[int]]]
+
+        # Workspace index -> direction of travel -> the window to land on when moving into the workspace that way
+        self.entry_windows = {}  # type: Dict[int, Dict[str, int]]
+
+        # The topmost and bottommost window of each workspace, as (y-offset, window ID)
+        topmost = {}  # type: Dict[int, Tuple[int, int]]
+        bottommost = {}  # type: Dict[int, Tuple[int, int]]
+
+        workspace_width = workspace_grid.workspace_width
+        workspace_height = workspace_grid.workspace_height
+
+        for window in sorted(windows, key=lambda window: window.x_offset):
+            x = current_workspace.width + window.x_offset
+            y = current_workspace.height + window.y_offset
+
+            workspace_index = workspace_grid.get_workspace_index_at(x, y)
+
+            if workspace_index is None:
+                continue
+
+            # The window's position within its own workspace (accounting for the title bar, like the focuser does)
+            monitor_index = monitor_topology.get_monitor_index(
+                x % workspace_width, y % workspace_height - WINDOW_DECORATION
+            )
+
+            monitors = self.windows_by_workspace.setdefault(workspace_index, {})
+            monitors.setdefault(monitor_index, []).append(window.id)
+
+            if workspace_index not in topmost or y < topmost[workspace_index][0]:
+                topmost[workspace_index] = (y, window.id)
+
+            if workspace_index not in bottommost or y > bottommost[workspace_index][0]:
+                bottommost[workspace_index] = (y, window.id)
+
+        for workspace_index, monitors in self.windows_by_workspace.items():
+            first_monitor = min(monitors)
+            last_monitor = max(monitors)
+
+            self.entry_windows[workspace_index] = {
+                # Moving right lands on the leftmost window of the leftmost monitor, and vice versa
+                DIRECTION_RIGHT: monitors[first_monitor][0],
+                DIRECTION_LEFT: monitors[last_monitor][-1],
+                # Moving down lands on the topmost window, and vice versa
+                DIRECTION_DOWN: topmost[workspace_index][1],
+                DIRECTION_UP: bottommost[workspace_index][1],
+            }
+
+    def get_window(self, workspace_index: int, monitor_index: Optional[int] = None) -> Optional[int]:
+        """
+        Gets the (leftmost) window on the given monitor of the given workspace.
+
+        :param monitor_index: The monitor to get the window from; defaults to the first monitor with any windows.
+        """
+        if monitor_index is None:
+            return self.entry_windows.get(workspace_index, {}).get(DIRECTION_RIGHT)
+
+        window_ids = self.windows_by_workspace.get(workspace_index, {}).get(monitor_index)
+
+        return window_ids[0] if window_ids else None
+
+    def get_entry_window(self, workspace_index: int, direction: str) -> Optional[int]:
+        """Gets the window to land on when moving into the given workspace in the given direction."""
+        return self.entry_windows.get(workspace_index, {}).get(direction)
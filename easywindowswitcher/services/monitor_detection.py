@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+from typing import Optional
+from easywindowswitcher.data_models import MonitorTopology, WorkspaceGrid
+from easywindowswitcher.data_models.monitor_topology import DEFAULT_MONITORS
+from easywindowswitcher.external_services.xrandr import XRandR
+from easywindowswitcher.utils.paths import get_project_folder
+
+logger = logging.getLogger(__name__)
+
+TOPOLOGY_CACHE_FILE = "monitor_topology.json"
+
+
+def get_monitor_topology(
+    workspace_grid: WorkspaceGrid, display: Optional[str] = None, refresh: bool = False
+) -> MonitorTopology:
+    """
+    Gets the layout of the monitors, only querying RandR when the layout isn't already cached.
+
+    The cache is keyed by a fingerprint of the monitors' layout (see get_layout_fingerprint), so it's thrown out on
+    its own whenever the monitors change (even in ways that keep the desktop the same size, like swapping them).
+
+    :param workspace_grid: The (already queried) workspace grid of the desktop.
+    :param display: The X display (e.g. ":0"); defaults to the DISPLAY environment variable.
+    :param refresh: Whether to ignore the cache and detect the monitors again regardless.
+
+    :return: The detected topology, or the default one if the monitors couldn't be detected.
+    """
+    fingerprint = get_layout_fingerprint(workspace_grid, display)
+    cache_path = get_topology_cache_path()
+
+    # Without a fingerprint, a cached layout can't be told apart from any other one
+    if fingerprint is not None and not refresh:
+        topology = _read_cached_topology(cache_path, fingerprint)
+
+        if topology:
+            return topology
+
+    monitors = XRandR(display=display).get_monitors()
+
+    if not monitors:
+        # Not caching this, so that the monitors are detected as soon as it's possible to
+        logger.debug("Couldn't detect the monitors; falling back to the default monitor topology")
+        return MonitorTopology(DEFAULT_MONITORS)
+
+    topology = MonitorTopology(monitors)
+
+    if fingerprint is not None:
+        _write_cached_topology(cache_path, fingerprint, topology)
+
+    logger.debug("Detected monitor topology: %s", topology)
+
+    return topology
+
+
+def get_layout_fingerprint(workspace_grid: WorkspaceGrid, display: Optional[str] = None) -> Optional[str]:
+    """
+    Fingerprints the layout of the monitors by the desktop's geometry (which was already queried anyways) and RandR's
+    timestamps of when the monitors were last configured, which change even when the desktop's size doesn't
+    (e.g. when two monitors are swapped, or one is rotated).
+
+    :return: The fingerprint, or None if the RandR timestamps couldn't be queried.
+    """
+    timestamps = XRandR(display=display).get_config_timestamps()
+
+    if timestamps is None:
+        return None
+
+    display = display if display is not None else os.environ.get("DISPLAY", "")
+    return "{}/{}x{}/{}/{}".format(display, workspace_grid.width, workspace_grid.height, *timestamps)
+
+
+def get_topology_cache_path() -> str:
+    return os.path.join(get_project_folder(), TOPOLOGY_CACHE_FILE)
+
+
+def _read_cached_topology(cache_path: str, fingerprint: str) -> Optional[MonitorTopology]:
+    try:
+        with open(cache_path) as cache_file:
+            cache = json.load(cache_file)
+
+        if cache.get("fingerprint") == fingerprint:
+            return MonitorTopology.from_dict(cache["topology"])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        # A missing cache is normal; a corrupt one just gets overwritten
+        logger.debug("Couldn't read the cached monitor topology: %s", e)
+
+    return None
+
+
+def _write_cached_topology(cache_path: str, fingerprint: str, topology: MonitorTopology) -> None:
+    temporary_path = "{}.{}.tmp".format(cache_path, os.getpid())
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+        with open(temporary_path, "w") as cache_file:
+            json.dump({"fingerprint": fingerprint, "topology": topology.to_dict()}, cache_file)
+
+        # Renaming is atomic, so concurrent invocations never see a half-written cache
+        os.replace(temporary_path, cache_path)
+    except OSError as e:
+        logger.debug("Couldn't cache the monitor topology: %s", e)
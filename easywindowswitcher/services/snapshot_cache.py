@@ -0,0 +1,200 @@
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from easywindowswitcher.data_models import Monitor, MonitorTopology, Window, Workspace, WorkspaceGrid
+from easywindowswitcher.utils.paths import get_snapshot_path
+
+logger = logging.getLogger(__name__)
+
+# How long (in seconds) a snapshot can be reused for; snapshots are disabled (the default) when unset or 0
+SNAPSHOT_TTL_ENVIRONMENT_VARIABLE = "EASYWINDOWSWITCHER_SNAPSHOT_TTL"
+
+SNAPSHOT_MAGIC = b"EWSS"
+SNAPSHOT_VERSION = 1
+
+# The layout of the snapshot file (all little-endian, fixed size records, no padding):
+#
+# - The header: magic, version, (unused) flags, creation time, validity token, the grid's width and height,
+#   the current workspace's x and y, then how many monitors and windows there are and how big the string table is.
+# - A record per monitor: x, y, width, height, and where its name is in the string table.
+# - A record per window, sorted left-to-right: ID, x, y, width, height, the monitor it's on (or -1 if it isn't
+#   in the current workspace), and where its class and title are in the string table.
+# - The string table (UTF-8).
+HEADER = struct.Struct("<4sHHdQiiiiIII")
+MONITOR_RECORD = struct.Struct("<iiiiII")
+WINDOW_RECORD = struct.Struct("<IiiiiiIIII")
+
+NOT_IN_CURRENT_WORKSPACE = -1
+
+
+class Snapshot(NamedTuple):
+    """The state of the desktop that WindowFocuser queries and indexes, minus the focus (which changes too often)."""
+
+    workspace_grid: WorkspaceGrid
+    current_workspace: Workspace
+    monitor_topology: MonitorTopology
+    windows: List[Window]
+    current_workspace_windows: List[Window]
+    windows_by_monitor_index: Dict[int, List[int]]
+    monitors_by_window_index: Dict[int, int]
+
+
+class SnapshotCache:
+    """
+    Shares a snapshot of the desktop between short-lived invocations, through a fixed-layout binary file.
+
+    Loading a snapshot maps the file read-only and unpacks the records straight out of the mapping, without
+    querying the windows or rebuilding the per-monitor index. A snapshot is only reused while it's younger than
+    the TTL and its validity token (e.g. a hash of the window list, see X11.get_snapshot_token)
+    still matches the desktop's.
+    """
+
+    def __init__(self, path: str, ttl: float) -> None:
+        """
+        :param path: The snapshot file.
+        :param ttl: How long (in seconds) a snapshot can be reused for.
+        """
+        self.path = path
+        self.ttl = ttl
+
+    def load(self, token: int) -> Optional[Snapshot]:
+        """
+        :param token: The desktop's current validity token.
+
+        :return: The snapshot, or None if there isn't a valid one.
+        """
+        try:
+            with open(self.path, "rb") as snapshot_file:
+                with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                    return self._unpack(mapping, token)
+        except (OSError, ValueError, BufferError, struct.error) as e:
+            # A missing snapshot is normal; a corrupt one just gets overwritten
+            logger.debug("Couldn't load the snapshot: %s", e)
+            return None
+
+    def save(self, token: int, snapshot: Snapshot) -> None:
+        strings = bytearray()
+
+        def add_string(value: str) -> Tuple[int, int]:
+            encoded_value = value.encode("utf8")
+            strings.extend(encoded_value)
+
+            return (len(strings) - len(encoded_value), len(encoded_value))
+
+        monitors = snapshot.monitor_topology.monitors
+        monitor_records = [
+            MONITOR_RECORD.pack(
+                monitor.x_offset, monitor.y_offset, monitor.width, monitor.height, *add_string(monitor.name)
+            )
+            for monitor in monitors
+        ]
+
+        # Sorting the windows the same way the focuser does means that they load already sorted
+        windows = sorted(snapshot.windows, key=lambda window: window.x_offset)
+
+        window_records = [
+            WINDOW_RECORD.pack(
+                window.id, window.x_offset, window.y_offset, window.width, window.height,
+                snapshot.monitors_by_window_index.get(window.id, NOT_IN_CURRENT_WORKSPACE),
+                *add_string(window.window_class), *add_string(window.title)
+            )
+            for window in windows
+        ]
+
+        header = HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, time.time(), token,
+            snapshot.workspace_grid.width, snapshot.workspace_grid.height,
+            snapshot.current_workspace.width, snapshot.current_workspace.height,
+            len(monitor_records), len(window_records), len(strings)
+        )
+
+        temporary_path = "{}.{}.tmp".format(self.path, os.getpid())
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            with open(temporary_path, "wb") as snapshot_file:
+                snapshot_file.write(b"".join([header] + monitor_records + window_records + [bytes(strings)]))
+
+            # Renaming is atomic, so an invocation that has the old snapshot mapped keeps reading the old file
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            logger.debug("Couldn't save the snapshot: %s", e)
+
+    def _unpack(self, mapping: mmap.mmap, token: int) -> Optional[Snapshot]:
+        (
+            magic, version, _, created_at, snapshot_token, grid_width, grid_height,
+            workspace_x, workspace_y, monitor_count, window_count, strings_size
+        ) = HEADER.unpack_from(mapping, 0)
+
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            return None
+
+        if snapshot_token != token or not (0 <= time.time() - created_at <= self.ttl):
+            return None
+
+        monitors_offset = HEADER.size
+        windows_offset = monitors_offset + (monitor_count * MONITOR_RECORD.size)
+        strings_offset = windows_offset + (window_count * WINDOW_RECORD.size)
+
+        if len(mapping) != strings_offset + strings_size:
+            return None
+
+        with memoryview(mapping) as view:
+            strings = view[strings_offset:]
+
+            try:
+                monitors = [
+                    Monitor(
+                        x_offset=x, y_offset=y, width=width, height=height,
+                        name=str(strings[name_offset:name_offset + name_length], "utf8")
+                    )
+                    for x, y, width, height, name_offset, name_length
+                    in MONITOR_RECORD.iter_unpack(view[monitors_offset:windows_offset])
+                ]
+
+                windows = []  # type: List[Window]
+                current_workspace_windows = []  # type: List[Window]
+                windows_by_monitor_index = {}  # type: Dict[int, List[int]]
+                monitors_by_window_index = {}  # type: Dict[int, int]
+
+                for (
+                    id, x, y, width, height, monitor_index, class_offset, class_length, title_offset, title_length
+                ) in WINDOW_RECORD.iter_unpack(view[windows_offset:strings_offset]):
+                    window = Window(
+                        id=id, x_offset=x, y_offset=y, width=width, height=height,
+                        window_class=str(strings[class_offset:class_offset + class_length], "utf8"),
+                        title=str(strings[title_offset:title_offset + title_length], "utf8")
+                    )
+
+                    windows.append(window)
+
+                    if monitor_index != NOT_IN_CURRENT_WORKSPACE:
+                        current_workspace_windows.append(window)
+                        windows_by_monitor_index.setdefault(monitor_index, []).append(id)
+                        monitors_by_window_index[id] = monitor_index
+            finally:
+                strings.release()
+
+        return Snapshot(
+            WorkspaceGrid(width=grid_width, height=grid_height),
+            Workspace(width=workspace_x, height=workspace_y),
+            MonitorTopology(monitors),
+            windows,
+            current_workspace_windows,
+            windows_by_monitor_index,
+            monitors_by_window_index
+        )
+
+
+def create_snapshot_cache(display: Optional[str] = None) -> Optional[SnapshotCache]:
+    """Creates the display's snapshot cache, if snapshots are enabled (see SNAPSHOT_TTL_ENVIRONMENT_VARIABLE)."""
+    try:
+        ttl = float(os.environ.get(SNAPSHOT_TTL_ENVIRONMENT_VARIABLE) or 0)
+    except ValueError:
+        ttl = 0
+
+    return SnapshotCache(get_snapshot_path(display), ttl) if ttl > 0 else None
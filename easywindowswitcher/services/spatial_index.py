@@ -0,0 +1,78 @@
+import bisect
+from typing import Optional, Sequence, Tuple
+from typing import Dict, List  # noqa
+from easywindowswitcher.data_models import Window
+
+DIRECTION_LEFT = "left"
+DIRECTION_RIGHT = "right"
+DIRECTION_UP = "up"
+DIRECTION_DOWN = "down"
+
+# How much more being off to the side counts against a window than being further away in the direction of travel.
+# This makes e.g. 'up' prefer the window right above over one that's slightly closer but way off to the side.
+OFF_AXIS_WEIGHT = 2
+
+# Center coordinates (along the axis of travel, across it) plus the window ID
+AxisEntry = Tuple[int, int, int]
+
+
+class SpatialIndex:
+    """
+    Indexes windows by their centers along both axes, for finding the nearest window in a given direction.
+
+    Each axis is a sorted list of window centers, so a query bisects to the windows just past the current one
+    and then walks outward, stopping as soon as no further window could possibly beat the best one found so far.
+    For typical layouts that's a logarithmic search plus a handful of steps, and it always terminates.
+    """
+
+    def __init__(self, windows: Sequence[Window]) -> None:
+        self.centers = {window.id: _center(window) for window in windows}  # type: Dict[int, Tuple[int, int]]
+
+        self.horizontal_axis = sorted((x, y, id) for id, (x, y) in self.centers.items())  # type: List[AxisEntry]
+        self.vertical_axis = sorted((y, x, id) for id, (x, y) in self.centers.items())  # type: List[AxisEntry]
+
+    def nearest(self, window_id: int, direction: str) -> Optional[int]:
+        """
+        Finds the window closest to the given window, in the given direction.
+
+        :return: The ID of the closest window, or None if there aren't any windows in that direction
+            (or the given window isn't indexed).
+        """
+        if window_id not in self.centers:
+            return None
+
+        x, y = self.centers[window_id]
+
+        if direction in (DIRECTION_LEFT, DIRECTION_RIGHT):
+            axis, position, off_axis_position = self.horizontal_axis, x, y
+        else:
+            axis, position, off_axis_position = self.vertical_axis, y, x
+
+        if direction in (DIRECTION_LEFT, DIRECTION_UP):
+            # Walk backwards from the last window strictly before the current position
+            candidates = range(bisect.bisect_left(axis, (position,)) - 1, -1, -1)
+        else:
+            # Walk forwards from the first window strictly after the current position
+            candidates = range(bisect.bisect_left(axis, (position + 1,)), len(axis))
+
+        closest_window = None
+        closest_score = None
+
+        for candidate in candidates:
+            candidate_position, candidate_off_axis_position, candidate_id = axis[candidate]
+            distance = abs(candidate_position - position)
+
+            # Every remaining candidate is at least this far away, so none of them can do any better
+            if closest_score is not None and distance >= closest_score:
+                break
+
+            score = distance + (OFF_AXIS_WEIGHT * abs(candidate_off_axis_position - off_axis_position))
+
+            if closest_score is None or score < closest_score:
+                closest_window, closest_score = candidate_id, score
+
+        return closest_window
+
+
+def _center(window: Window) -> Tuple[int, int]:
+    return (window.x_offset + (window.width // 2), window.y_offset + (window.height // 2))
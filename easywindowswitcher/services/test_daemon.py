@@ -0,0 +1,150 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest import mock
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher import client
+from easywindowswitcher.services.daemon import SwitcherDaemon
+from easywindowswitcher.utils import daemon_protocol
+
+
+class FakeWindowFocuser:
+    def __init__(self):
+        self.backend = None
+        self.calls = []
+
+    def invalidate(self):
+        self.calls.append(("invalidate",))
+
+    def focus_by_monitor_index(self, monitor_index):
+        self.calls.append(("monitor", monitor_index))
+
+    def focus_by_direction(self, direction):
+        self.calls.append(("direction", direction))
+
+    def focus_by_batch(self, operations):
+        self.calls.append(("batch", operations))
+
+
+class TestSwitcherDaemon(CustomTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, "test.sock")
+
+        self.focuser = FakeWindowFocuser()
+        self.daemon = SwitcherDaemon(self.socket_path, window_focuser=self.focuser)
+
+        self.thread = threading.Thread(target=self.daemon.serve_forever, daemon=True)
+        self.thread.start()
+
+        while self.daemon.server is None or not os.path.exists(self.socket_path):
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.daemon.shutdown()
+        self.thread.join()
+        self.temp_dir.cleanup()
+
+    def test_direction_request_is_handled_by_the_daemon(self):
+        status, _ = client.send_request(["direction", "right"], self.socket_path)
+
+        self.assertEqual(status, daemon_protocol.RESPONSE_OK)
+        self.assertEqual(self.focuser.calls, [("invalidate",), ("direction", "right")])
+
+    def test_monitor_request_is_handled_by_the_daemon(self):
+        status, _ = client.send_request(["monitor", "2"], self.socket_path)
+
+        self.assertEqual(status, daemon_protocol.RESPONSE_OK)
+        self.assertEqual(self.focuser.calls, [("invalidate",), ("monitor", 2)])
+
+    def test_batch_request_is_handled_by_the_daemon(self):
+        status, _ = client.send_request(["batch", "right", "monitor", "3"], self.socket_path)
+
+        self.assertEqual(status, daemon_protocol.RESPONSE_OK)
+        self.assertEqual(self.focuser.calls, [("invalidate",), ("batch", [("direction", "right"), ("monitor", "3")])])
+
+    def test_unknown_requests_are_left_to_the_cli(self):
+        for args in (["--help"], ["monitor", "two"], ["direction"], ["batch"], ["batch", "sideways"]):
+            status, _ = client.send_request(args, self.socket_path)
+            self.assertEqual(status, daemon_protocol.RESPONSE_UNSUPPORTED)
+
+        self.assertEqual(self.focuser.calls, [])
+
+    def test_socket_is_removed_on_shutdown(self):
+        self.daemon.shutdown()
+        self.thread.join()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_stats_report_latency_percentiles_per_command(self):
+        for _ in range(3):
+            client.send_request(["direction", "left"], self.socket_path)
+
+        status, message = client.send_request(["stats"], self.socket_path)
+        report = json.loads(message)
+
+        self.assertEqual(status, daemon_protocol.RESPONSE_OK)
+        self.assertEqual(report["direction"]["count"], 3)
+        self.assertLessEqual(report["direction"]["p50_ms"], report["direction"]["p99_ms"])
+
+
+class TestCoalescingSwitcherDaemon(CustomTestCase):
+    def test_rapid_direction_requests_are_coalesced(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            socket_path = os.path.join(temp_dir, "test.sock")
+
+            focuser = FakeWindowFocuser()
+            daemon = SwitcherDaemon(socket_path, window_focuser=focuser, coalesce_window=0.2)
+
+            thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+            thread.start()
+
+            while daemon.server is None or not os.path.exists(socket_path):
+                time.sleep(0.01)
+
+            requests = [
+                threading.Thread(target=client.send_request, args=(["direction", "right"], socket_path))
+                for _ in range(5)
+            ]
+
+            for request in requests:
+                request.start()
+
+            for request in requests:
+                request.join()
+
+            daemon.shutdown()
+            thread.join()
+
+        self.assertEqual(focuser.calls, [("invalidate",), ("batch", [("direction", "right")] * 5)])
+
+
+class TestClient(CustomTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+
+        self.socket_path = os.path.join(temp_dir.name, "test.sock")
+
+        mock.patch.object(client, "get_socket_path", return_value=self.socket_path).start()
+        mock.patch.object(client, "get_shared_socket_path", return_value=self.socket_path + ".missing").start()
+        mock.patch.object(client, "DAEMON_TIMEOUT", 0.05).start()
+        self.run_in_process = mock.patch.object(client, "run_in_process", return_value=0).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_request_runs_in_process_without_a_daemon(self):
+        self.assertEqual(client.main(["direction", "right"]), 0)
+        self.run_in_process.assert_called_once_with(["direction", "right"])
+
+    def test_request_is_not_run_again_when_the_daemon_times_out(self):
+        # A daemon that takes the request, but is too slow to answer it
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen(1)
+        self.addCleanup(server.close)
+
+        self.assertEqual(client.main(["direction", "right"]), 1)
+        self.run_in_process.assert_not_called()
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher import client
+from easywindowswitcher.services.display_router import DisplayRouter
+from easywindowswitcher.services.test_daemon import FakeWindowFocuser
+from easywindowswitcher.utils import daemon_protocol
+
+
+class SlowWindowFocuser(FakeWindowFocuser):
+    """A focuser for a display whose X server is slow to respond (until it's released)."""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def focus_by_direction(self, direction):
+        self.released.wait(5)
+        super().focus_by_direction(direction)
+
+
+class TestDisplayRouter(CustomTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, "test.sock")
+
+        self.focusers = {":0": SlowWindowFocuser(), ":1": FakeWindowFocuser(), ":2": FakeWindowFocuser()}
+        self.router = DisplayRouter(
+            self.socket_path, create_focuser=self.focusers.__getitem__, workers=2, max_pending_requests=1
+        )
+
+        self.thread = threading.Thread(target=self.router.serve_forever, daemon=True)
+        self.thread.start()
+
+        while self.router.server is None or not os.path.exists(self.socket_path):
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.focusers[":0"].released.set()
+
+        self.router.shutdown()
+        self.thread.join()
+        self.temp_dir.cleanup()
+
+    def test_requests_are_routed_to_their_display(self):
+        client.send_request(["direction", "left"], self.socket_path, display=":1")
+        client.send_request(["monitor", "2"], self.socket_path, display=":2")
+
+        self.assertEqual(self.focusers[":1"].calls, [("invalidate",), ("direction", "left")])
+        self.assertEqual(self.focusers[":2"].calls, [("invalidate",), ("monitor", 2)])
+
+    def test_requests_without_a_display_are_left_to_the_cli(self):
+        status, _ = client.send_request(["direction", "left"], self.socket_path)
+
+        self.assertEqual(status, daemon_protocol.RESPONSE_UNSUPPORTED)
+
+    def test_slow_display_doesnt_stall_the_others(self):
+        slow_request = threading.Thread(
+            target=client.send_request, args=(["direction", "left"], self.socket_path, ":0")
+        )
+        slow_request.start()
+
+        while not self.focusers[":0"].calls:
+            time.sleep(0.01)
+
+        # The slow display already has as many requests as it can have pending
+        busy_status, _ = client.send_request(["direction", "right"], self.socket_path, display=":0")
+
+        for _ in range(3):
+            status, _ = client.send_request(["monitor", "1"], self.socket_path, display=":1")
+            self.assertEqual(status, daemon_protocol.RESPONSE_OK)
+
+        self.focusers[":0"].released.set()
+        slow_request.join()
+
+        self.assertEqual(busy_status, daemon_protocol.RESPONSE_ERROR)
+        self.assertEqual(self.focusers[":0"].calls, [("invalidate",), ("direction", "left")])
+
+    def test_stats_are_reported_per_display(self):
+        for _ in range(3):
+            client.send_request(["direction", "left"], self.socket_path, display=":1")
+
+        client.send_request(["direction", "left"], self.socket_path, display=":2")
+
+        status, message = client.send_request(["stats"], self.socket_path)
+        report = json.loads(message)
+
+        self.assertEqual(status, daemon_protocol.RESPONSE_OK)
+        self.assertEqual(sorted(report), [":1", ":2"])
+        self.assertEqual(report[":1"]["requests"], 3)
+        self.assertEqual(report[":1"]["latencies"]["direction"]["count"], 3)
+        self.assertGreater(report[":2"]["requests_per_second"], 0)
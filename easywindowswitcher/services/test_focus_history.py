@@ -0,0 +1,34 @@
+import os
+import tempfile
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher.services.focus_history import WINDOW_ID_SIZE, FocusHistory
+
+
+class TestFocusHistory(CustomTestCase):
+    def test_history_is_kept_most_recent_first(self):
+        history = FocusHistory(size=3)
+
+        history.record(1, 2)
+        history.record(3)
+        history.record(1)
+        history.record(4)
+
+        self.assertEqual(history.window_ids, [4, 1, 3])
+
+        history.evict({1, 4})
+
+        self.assertEqual(history.window_ids, [4, 1])
+
+    def test_history_is_persisted_compactly(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "history.bin")
+
+            history = FocusHistory(path)
+            history.record(0x04400001, 0x05000006)
+
+            self.assertEqual(os.path.getsize(path), 2 * WINDOW_ID_SIZE)
+            self.assertEqual(FocusHistory(path).window_ids, [0x05000006, 0x04400001])
+
+            # Changes made by other processes are picked up
+            FocusHistory(path).record(0x03000001)
+            self.assertEqual(history.window_ids, [0x03000001, 0x05000006, 0x04400001])
@@ -0,0 +1,41 @@
+from utils.helpers_test import CustomTestCase, make_window
+from easywindowswitcher.data_models import MonitorTopology, Workspace, WorkspaceGrid
+from easywindowswitcher.data_models.monitor_topology import DEFAULT_MONITORS
+from easywindowswitcher.services.grid_index import GridWindowIndex
+
+
+class TestGridWindowIndex(CustomTestCase):
+    def setUp(self):
+        self.workspace_grid = WorkspaceGrid(width=20400, height=7680)
+        self.workspace_grid.set_workspace_size(6800, 2560)
+
+    def test_windows_are_indexed_by_workspace_and_monitor(self):
+        # The current workspace is the center one, so the offsets are relative to it
+        index = GridWindowIndex(
+            [
+                make_window(1, 0), make_window(2, 2600), make_window(3, 100, 1200),
+                make_window(4, -6800), make_window(5, -4000), make_window(6, 6000, -2560 + 24),
+                make_window(7, 30000), make_window(8, 1920, 2560 + 24)
+            ],
+            self.workspace_grid,
+            Workspace(width=6800, height=2560),
+            MonitorTopology(DEFAULT_MONITORS)
+        )
+
+        self.assertEqual(index.current_workspace_index, 4)
+        self.assertEqual(index.windows_by_workspace, {
+            4: {0: [1], 1: [3], 2: [2]},
+            3: {0: [4], 2: [5]},
+            1: {3: [6]},
+            7: {2: [8]},
+        })
+
+        self.assertEqual(index.get_window(3), 4)
+        self.assertEqual(index.get_window(3, 2), 5)
+        self.assertIsNone(index.get_window(3, 1))
+        self.assertIsNone(index.get_window(0))
+
+        self.assertEqual(index.get_entry_window(4, "left"), 2)
+        self.assertEqual(index.get_entry_window(4, "right"), 1)
+        self.assertEqual(index.get_entry_window(4, "up"), 3)
+        self.assertEqual(index.get_entry_window(4, "down"), 1)
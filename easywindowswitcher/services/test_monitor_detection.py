@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+from unittest import mock
+from utils.helpers_test import CustomTestCase
+from external_services.fake_xserver_test import FakeXServer
+from easywindowswitcher.data_models import Monitor, MonitorTopology, WorkspaceGrid
+from easywindowswitcher.data_models.monitor_topology import DEFAULT_MONITORS
+from easywindowswitcher.external_services.xconnection import XConnection
+from easywindowswitcher.external_services.xrandr import XRandR
+from easywindowswitcher.services import monitor_detection
+
+XRANDR_OUTPUT = """Monitors: 3
+ 0: +*DP-1 1920/531x1080/299+0+0  DP-1
+ 1: +HDMI-1 1920/527x1080/296+1920+0  HDMI-1
+ 2: +DP-2 1920/527x1080/296+3840+0  DP-2"""
+
+
+class TestMonitorTopology(CustomTestCase):
+    def test_parsing_xrandr_monitors(self):
+        monitors = XRandR()._parse_monitors_config(XRANDR_OUTPUT)
+
+        self.assertEqual([(m.name, m.x_offset, m.width) for m in monitors], [
+            ("DP-1", 0, 1920), ("HDMI-1", 1920, 1920), ("DP-2", 3840, 1920)
+        ])
+
+    def test_querying_the_randr_config_timestamps(self):
+        server = FakeXServer()
+        self.addCleanup(server.close)
+
+        self.assertEqual(
+            XRandR(connection=XConnection(":0", sock=server.client_socket)).get_config_timestamps(), (5000, 4000)
+        )
+
+    def test_config_timestamps_without_randr(self):
+        server = FakeXServer()
+        server.randr_timestamps = None
+        self.addCleanup(server.close)
+
+        self.assertIsNone(XRandR(connection=XConnection(":0", sock=server.client_socket)).get_config_timestamps())
+
+    def test_default_topology_matches_the_quad_monitor_setup(self):
+        topology = MonitorTopology(DEFAULT_MONITORS)
+
+        self.assertEqual((topology.width, topology.height), (6800, 2560))
+        self.assertEqual(
+            [topology.get_monitor_index(x, y) for x, y in [(0, 0), (100, 1100), (1920, 2000), (6799, 2559)]],
+            [0, 1, 2, 3]
+        )
+
+    def test_uneven_layouts(self):
+        # A monitor that sits off-center below two others, leaving a gap between the top two
+        topology = MonitorTopology([
+            Monitor(x_offset=0, y_offset=0, width=1000, height=500),
+            Monitor(x_offset=1200, y_offset=0, width=1000, height=500),
+            Monitor(x_offset=500, y_offset=500, width=1000, height=500),
+        ])
+
+        self.assertEqual(
+            [topology.get_monitor_index(x, y) for x, y in [(200, 800), (600, 800), (1100, 100), (1300, 100)]],
+            [0, 1, 1, 2]
+        )
+
+
+class TestMonitorDetection(CustomTestCase):
+    def setUp(self):
+        self.project_folder = tempfile.mkdtemp()
+
+        patcher = mock.patch.object(monitor_detection, "get_project_folder", return_value=self.project_folder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.xrandr = mock.patch.object(XRandR, "get_monitors", return_value=[
+            Monitor(x_offset=x_offset, y_offset=0, width=1920, height=1080) for x_offset in (0, 1920, 3840)
+        ]).start()
+        self.config_timestamps = mock.patch.object(XRandR, "get_config_timestamps", return_value=(5000, 4000)).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def tearDown(self):
+        shutil.rmtree(self.project_folder)
+
+    def test_topology_is_cached_per_layout(self):
+        grid = WorkspaceGrid(width=17280, height=3240)
+
+        self.assertEqual(len(monitor_detection.get_monitor_topology(grid, ":0")), 3)
+        self.assertEqual(len(monitor_detection.get_monitor_topology(grid, ":0")), 3)
+        self.assertEqual(self.xrandr.call_count, 1)
+
+        # Adding a monitor changes the size of the desktop, so the cached layout gets thrown out
+        self.xrandr.return_value = self.xrandr.return_value + [
+            Monitor(x_offset=5760, y_offset=0, width=1920, height=1080)
+        ]
+        topology = monitor_detection.get_monitor_topology(WorkspaceGrid(width=23040, height=3240), ":0")
+
+        self.assertEqual((len(topology), topology.width), (4, 7680))
+        self.assertEqual(self.xrandr.call_count, 2)
+
+    def test_falls_back_to_the_default_topology(self):
+        self.xrandr.return_value = []
+
+        topology = monitor_detection.get_monitor_topology(WorkspaceGrid(width=20400, height=7680), ":0")
+
+        self.assertEqual((topology.width, topology.height), (6800, 2560))
+
+    def test_topology_is_detected_again_when_the_monitors_are_rearranged(self):
+        grid = WorkspaceGrid(width=17280, height=3240)
+
+        monitor_detection.get_monitor_topology(grid, ":0")
+
+        # Swapping two monitors keeps the desktop the same size, but RandR's timestamps still change
+        self.xrandr.return_value = list(reversed(self.xrandr.return_value))
+        self.config_timestamps.return_value = (6000, 4000)
+
+        monitor_detection.get_monitor_topology(grid, ":0")
+        monitor_detection.get_monitor_topology(grid, ":0")
+
+        self.assertEqual(self.xrandr.call_count, 2)
+
+    def test_topology_is_not_cached_without_randr_timestamps(self):
+        grid = WorkspaceGrid(width=17280, height=3240)
+        self.config_timestamps.return_value = None
+
+        monitor_detection.get_monitor_topology(grid, ":0")
+        monitor_detection.get_monitor_topology(grid, ":0")
+
+        self.assertEqual(self.xrandr.call_count, 2)
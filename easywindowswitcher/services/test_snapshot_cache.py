@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+from unittest import mock
+from utils.helpers_test import CustomTestCase, FakeBackend, make_focuser, make_window
+from external_services.fake_xserver_test import ROOT_WINDOW, FakeXServer
+from easywindowswitcher.external_services.x11 import X11
+from easywindowswitcher.external_services.xconnection import XConnection
+from easywindowswitcher.services.snapshot_cache import SnapshotCache
+
+
+class TestSnapshotCache(CustomTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = SnapshotCache(os.path.join(self.temp_dir.name, "snapshot.bin"), ttl=60)
+
+        self.windows = [
+            make_window(1, 0, title="Inbox — Chrome"), make_window(2, 1920), make_window(3, 2600), make_window(4, -6000)
+        ]
+
+        self.first_focuser = self.create_focuser(FakeBackend(self.windows, 2))
+        self.first_focuser.focus_by_monitor_index(2)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_focuser(self, backend):
+        return make_focuser(backend, snapshot_cache=self.cache)
+
+    def test_next_invocation_reuses_the_snapshot(self):
+        backend = FakeBackend(None, 2)
+        focuser = self.create_focuser(backend)
+
+        focuser.focus_by_direction("right")
+
+        self.assertEqual(backend.focused_windows, [3])
+        self.assertEqual(focuser.current_windows_by_monitor_index, {0: [1], 2: [2, 3]})
+        self.assertEqual(
+            [(w.id, w.x_offset, w.title) for w in focuser.windows],
+            [(4, -6000, ""), (1, 0, "Inbox — Chrome"), (2, 1920, ""), (3, 2600, "")]
+        )
+
+    def test_stale_snapshots_are_ignored(self):
+        backend = FakeBackend(self.windows, 2)
+        backend.snapshot_token = 2
+
+        self.assertIsNone(self.cache.load(2))
+        self.assertIsNotNone(self.cache.load(1))
+
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(self.cache.load(1))
+
+        # Which falls back to querying the windows (and saving a new snapshot)
+        self.create_focuser(backend).focus_by_monitor_index(0)
+
+        self.assertEqual(backend.focused_windows, [1])
+        self.assertIsNotNone(self.cache.load(2))
+
+
+class TestSnapshotCacheWithX11(CustomTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = SnapshotCache(os.path.join(self.temp_dir.name, "snapshot.bin"), ttl=60)
+
+        self.server = FakeXServer()
+        self.server.activates_windows = True
+
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_DESKTOP_GEOMETRY", [20400, 7680])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_DESKTOP_VIEWPORT", [0, 0])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_CURRENT_DESKTOP", [0])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_ACTIVE_WINDOW", [0x200])
+
+        for window, x_offset in [(0x101, 0), (0x200, 1920), (0x300, 2600), (0x400, 6000)]:
+            self.server.add_window(window, x_offset, 24, 800, 600, b"a\0A\0", b"")
+            self.server.set_cardinals(window, "_NET_WM_DESKTOP", [0])
+
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_CLIENT_LIST", [0x101, 0x200, 0x300, 0x400])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_CLIENT_LIST_STACKING", [0x101, 0x200, 0x300, 0x400])
+
+        self.backend = X11(connection=XConnection(":0", sock=self.server.client_socket))
+
+    def tearDown(self):
+        self.server.close()
+        self.temp_dir.cleanup()
+
+    def focus_right(self):
+        # Every invocation starts out with a fresh focuser, like a separate process would
+        make_focuser(self.backend, snapshot_cache=self.cache).focus_by_direction("right")
+
+        return self.server.request_counts.get(14, 0)
+
+    def test_switching_windows_keeps_the_snapshot_valid(self):
+        geometry_requests = self.focus_right()
+
+        # Focusing raised the window, but the second invocation still gets its windows from the snapshot
+        self.assertEqual(self.focus_right(), geometry_requests)
+        self.assertEqual(self.backend.get_current_focused_window_id(), 0x400)
+
+    def test_opening_a_window_invalidates_the_snapshot(self):
+        geometry_requests = self.focus_right()
+
+        self.server.add_window(0x500, 3000, 24, 800, 600, b"a\0A\0", b"")
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_CLIENT_LIST", [0x101, 0x200, 0x300, 0x400, 0x500])
+
+        self.assertGreater(self.focus_right(), geometry_requests)
+        self.assertEqual(self.backend.get_current_focused_window_id(), 0x500)
@@ -0,0 +1,29 @@
+from utils.helpers_test import CustomTestCase, make_window
+from easywindowswitcher.services.spatial_index import SpatialIndex
+
+
+class TestSpatialIndex(CustomTestCase):
+    def setUp(self):
+        # 1 2 3
+        # 4 5 6
+        #   7
+        self.index = SpatialIndex([
+            make_window(1, 0, 0, 100, 100), make_window(2, 200, 0, 100, 100), make_window(3, 400, 0, 100, 100),
+            make_window(4, 0, 200, 100, 100), make_window(5, 200, 200, 100, 100), make_window(6, 400, 200, 100, 100),
+            make_window(7, 250, 400, 100, 100),
+        ])
+
+    def test_nearest_in_each_direction(self):
+        self.assertEqual(self.index.nearest(5, "up"), 2)
+        self.assertEqual(self.index.nearest(5, "down"), 7)
+        self.assertEqual(self.index.nearest(5, "left"), 4)
+        self.assertEqual(self.index.nearest(5, "right"), 6)
+
+    def test_prefers_aligned_windows_over_slightly_closer_ones(self):
+        self.assertEqual(self.index.nearest(7, "up"), 5)
+        self.assertEqual(self.index.nearest(3, "down"), 6)
+
+    def test_no_window_in_direction(self):
+        self.assertIsNone(self.index.nearest(2, "up"))
+        self.assertIsNone(self.index.nearest(4, "left"))
+        self.assertIsNone(self.index.nearest(99, "left"))
@@ -0,0 +1,126 @@
+from utils.helpers_test import CustomTestCase, FakeBackend, make_focuser, make_window
+from easywindowswitcher.data_models import Workspace
+from easywindowswitcher.services.window_focuser import parse_batch_operations
+
+
+class TestWindowFocuser(CustomTestCase):
+    def setUp(self):
+        self.backend = FakeBackend(
+            [make_window(1, 0), make_window(2, 1920), make_window(3, 2600), make_window(4, 6000)],
+            focused_window_id=2,
+            concurrent_queries=True
+        )
+        self.focuser = make_focuser(self.backend)
+
+    def test_setup_runs_the_queries_concurrently(self):
+        self.focuser.setup()
+
+        self.assertEqual(self.focuser.current_windows_by_monitor_index, {0: [1], 2: [2, 3], 3: [4]})
+        self.assertEqual(self.focuser.current_monitor, 2)
+
+    def test_state_is_only_queried_when_needed(self):
+        self.backend.barrier = None
+
+        self.focuser.focus_by_monitor_index(3)
+        self.focuser.focus_by_monitor_index(0)
+
+        self.assertEqual(self.backend.focused_windows, [4, 1])
+        self.assertEqual(sorted(self.backend.queries), ["windows", "workspace_config"])
+
+    def test_invalidate_forgets_everything(self):
+        self.focuser.setup()
+        self.assertEqual(self.focuser.current_monitor, 2)
+
+        self.backend.barrier = None
+        self.backend.focused_window_id = 4
+        self.focuser.invalidate()
+
+        self.assertEqual(self.focuser.current_monitor, 3)
+
+    def test_focus_by_direction(self):
+        self.focuser.setup()
+
+        self.focuser.focus_by_direction("right")
+        self.focuser.focus_by_direction("right")
+        self.focuser.focus_by_direction("right")
+
+        self.assertEqual(self.backend.focused_windows, [3, 4, 1])
+
+    def test_focus_up_and_down_across_stacked_monitors(self):
+        self.backend.barrier = None
+        self.backend.windows.append(make_window(5, 100, 1200))
+        self.backend.focused_window_id = 1
+
+        self.focuser.focus_by_direction("down")
+        self.focuser.focus_by_direction("down")
+        self.focuser.focus_by_direction("up")
+
+        self.assertEqual(self.backend.focused_windows, [5, 1])
+
+    def test_focus_by_batch_only_focuses_where_it_ends_up(self):
+        self.focuser.setup()
+
+        # 2 -> 3 -> 4 -> (monitor 0) 1 -> 4
+        focused_window = self.focuser.focus_by_batch(
+            parse_batch_operations(["right", "direction", "right", "monitor", "0", "left"])
+        )
+
+        self.assertEqual(focused_window, 4)
+        self.assertEqual(self.backend.focused_windows, [4])
+        self.assertEqual(self.focuser.current_monitor, 3)
+
+        # Ending up back where it started doesn't need to focus anything
+        self.assertIsNone(self.focuser.focus_by_batch(parse_batch_operations(["left", "right"])))
+        self.assertEqual(self.backend.focused_windows, [4])
+
+    def test_parsing_invalid_batches(self):
+        for tokens in [["sideways"], ["monitor"], ["monitor", "two"], ["direction", "forward"], ["direction"]]:
+            with self.assertRaises(ValueError, msg=tokens):
+                parse_batch_operations(tokens)
+
+    def test_focus_by_history_skips_closed_windows(self):
+        self.backend.barrier = None
+
+        self.focuser.focus_by_direction("right")
+        self.focuser.focus_by_monitor_index(3)
+        self.focuser.focus_by_history(1)
+
+        self.assertEqual(self.backend.focused_windows, [3, 4, 3])
+
+        self.backend.windows = [window for window in self.backend.windows if window.id != 4]
+        self.backend.focused_window_id = 3
+        self.focuser.invalidate()
+        self.focuser.focus_by_history(1)
+
+        self.assertEqual(self.backend.focused_windows, [3, 4, 3, 2])
+        self.assertEqual(self.focuser.focus_history.window_ids, [2, 3])
+
+    def test_focus_by_direction_across_workspaces(self):
+        self.backend.barrier = None
+        self.backend.windows += [make_window(5, 6800 + 100), make_window(6, 6800 + 6000)]
+        self.backend.focused_window_id = 4
+        self.focuser.across_workspaces = True
+
+        # Right goes onto the next workspace over, instead of wrapping around to monitor 0
+        self.focuser.focus_by_direction("right")
+
+        # Focusing a window on another workspace switches to that workspace, so the offsets are relative to it now
+        self.backend.workspace = Workspace(width=6800, height=0)
+        self.backend.windows = [make_window(window.id, window.x_offset - 6800) for window in self.backend.windows]
+        self.backend.focused_window_id = 5
+        self.focuser.invalidate()
+
+        self.focuser.focus_by_direction("left")
+        self.focuser.focus_by_direction("up")
+
+        self.assertEqual(self.backend.focused_windows, [5, 4])
+
+    def test_focus_by_workspace_index(self):
+        self.backend.barrier = None
+        self.backend.windows += [make_window(5, 6800 + 100), make_window(6, 6800 + 6000)]
+
+        self.focuser.focus_by_workspace_index(1)
+        self.focuser.focus_by_workspace_index(1, 3)
+        self.focuser.focus_by_workspace_index(2)
+
+        self.assertEqual(self.backend.focused_windows, [5, 6])
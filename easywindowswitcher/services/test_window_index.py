@@ -0,0 +1,137 @@
+import struct
+from utils.helpers_test import CustomTestCase, make_focuser, make_window
+from external_services.fake_xserver_test import ROOT_WINDOW, FakeXServer
+from easywindowswitcher.data_models import Workspace, WorkspaceGrid
+from easywindowswitcher.external_services import xconnection
+from easywindowswitcher.external_services.x11 import X11
+from easywindowswitcher.services.window_index import LiveWindowIndex
+from easywindowswitcher.services.window_watcher import WindowWatcher
+
+
+def index_state(focuser):
+    return (
+        [window.id for window in focuser.current_workspace_windows],
+        focuser.current_windows_by_monitor_index,
+        focuser.current_monitors_by_window_index,
+        focuser.current_monitor,
+    )
+
+
+class TestLiveWindowIndex(CustomTestCase):
+    def setUp(self):
+        self.workspace_grid = WorkspaceGrid(width=20400, height=7680)
+        self.current_workspace = Workspace(width=0, height=0)
+
+        self.windows = [make_window(1, 0), make_window(2, 1920), make_window(3, 2600), make_window(4, 6000)]
+
+        self.focuser = make_focuser()
+        self.index = LiveWindowIndex(self.focuser)
+        self.index.resync(self.workspace_grid, self.current_workspace, list(self.windows), 3)
+
+    def assert_matches_full_rebuild(self, windows, focused_window_id):
+        rebuilt = make_focuser()
+        rebuilt.load_snapshot(self.workspace_grid, self.current_workspace, windows, focused_window_id)
+
+        self.assertEqual(index_state(self.focuser), index_state(rebuilt))
+
+    def test_moving_a_window_between_monitors(self):
+        self.index.update_window(make_window(3, 100, 1200))
+
+        self.assertEqual(self.focuser.current_windows_by_monitor_index[1], [3])
+        self.assertEqual(self.focuser.current_monitor, 1)
+        self.assert_matches_full_rebuild(
+            [make_window(1, 0), make_window(2, 1920), make_window(3, 100, 1200), make_window(4, 6000)], 3
+        )
+
+    def test_monitor_lists_stay_sorted_left_to_right(self):
+        self.index.update_window(make_window(5, 2200))
+        self.index.update_window(make_window(2, 3000))
+
+        self.assertEqual(self.focuser.current_windows_by_monitor_index[2], [5, 3, 2])
+
+    def test_windows_leaving_the_workspace_are_unindexed(self):
+        self.index.update_window(make_window(1, 7000))
+        self.index.remove_window(4)
+
+        self.assertNotIn(0, self.focuser.current_windows_by_monitor_index)
+        self.assertNotIn(3, self.focuser.current_windows_by_monitor_index)
+        self.assert_matches_full_rebuild([make_window(1, 7000), make_window(2, 1920), make_window(3, 2600)], 3)
+
+    def test_search_index_is_updated_in_place(self):
+        search_index = self.focuser.search_index
+
+        window = make_window(5, 2200)
+        window.title = "Inbox"
+
+        self.index.update_window(window)
+        self.index.remove_window(1)
+
+        self.assertIs(self.focuser.search_index, search_index)
+        self.assertEqual(search_index.best_match("inbox"), 5)
+        self.assertEqual(set(search_index.names), {2, 3, 4, 5})
+
+    def test_warming_up_rebuilds_the_navigation_table(self):
+        self.focuser.navigation_table
+        self.index.update_window(make_window(5, 2200))
+
+        self.assertNotIn("navigation_table", self.focuser.__dict__)
+
+        self.index.warm_up()
+
+        self.assertEqual(self.focuser.navigation_table[5], (2, 3))
+        self.assertEqual(self.focuser.navigation_table[4], (3, 1))
+
+    def test_focus_changes_update_the_current_monitor(self):
+        self.index.set_focused_window(4)
+
+        self.assertEqual(self.focuser.current_monitor, 3)
+
+
+class TestWindowWatcher(CustomTestCase):
+    def setUp(self):
+        self.server = FakeXServer()
+
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_DESKTOP_GEOMETRY", [20400, 7680])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_DESKTOP_VIEWPORT", [0, 0])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_ACTIVE_WINDOW", [0x500])
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_CLIENT_LIST", [0x500, 0x600])
+
+        self.server.add_window(0x500, 0, 24, 1920, 1056, b"a\0A\0", b"One")
+        self.server.add_window(0x600, 1920, 24, 3440, 1416, b"b\0B\0", b"Two")
+
+        self.focuser = make_focuser()
+        self.index = LiveWindowIndex(self.focuser)
+
+        self.watcher = WindowWatcher(self.index)
+        self.watcher.connect(X11(connection=xconnection.XConnection(":0", sock=self.server.client_socket)))
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_connecting_subscribes_to_events_and_syncs(self):
+        self.assertTrue(self.index.is_synced)
+        self.assertEqual(self.server.event_masks[ROOT_WINDOW], xconnection.EVENT_MASK_PROPERTY_CHANGE)
+        self.assertIn(0x600, self.server.event_masks)
+        self.assertEqual(self.focuser.current_windows_by_monitor_index, {0: [0x500], 2: [0x600]})
+
+    def test_configure_notify_requeries_only_that_window(self):
+        self.server.windows[0x600] = (5400, 24, 1440, 2536)
+        geometry_requests = self.server.request_counts[xconnection.OPCODE_GET_GEOMETRY]
+
+        self.watcher.handle_events([
+            struct.pack("<BxHII24x", xconnection.EVENT_CONFIGURE_NOTIFY, 0, 0x600, 0x600)
+        ])
+
+        self.assertEqual(self.server.request_counts[xconnection.OPCODE_GET_GEOMETRY], geometry_requests + 1)
+        self.assertEqual(self.focuser.current_windows_by_monitor_index, {0: [0x500], 3: [0x600]})
+
+    def test_active_window_changes_update_the_focus(self):
+        self.server.set_cardinals(ROOT_WINDOW, "_NET_ACTIVE_WINDOW", [0x600])
+
+        self.watcher.handle_events([
+            struct.pack(
+                "<BxHII20x", xconnection.EVENT_PROPERTY_NOTIFY, 0, ROOT_WINDOW, self.server.atom("_NET_ACTIVE_WINDOW")
+            )
+        ])
+
+        self.assertEqual((self.focuser.current_focused_window_id, self.focuser.current_monitor), (0x600, 2))
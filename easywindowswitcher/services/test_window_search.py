@@ -0,0 +1,46 @@
+from utils.helpers_test import CustomTestCase, make_window
+from easywindowswitcher.services.window_search import WindowSearchIndex
+
+
+class TestWindowSearchIndex(CustomTestCase):
+    def setUp(self):
+        self.index = WindowSearchIndex([
+            make_window(1, window_class="google-chrome.Google-chrome", title="Inbox — Chrome"),
+            make_window(
+                2, window_class="google-chrome.Google-chrome", title="Pull requests · easy-window-switcher — Chrome"
+            ),
+            make_window(3, window_class="gnome-terminal-server.Gnome-terminal", title="Terminal"),
+            make_window(
+                4, window_class="code.Code", title="window_focuser.py — easy-window-switcher — Visual Studio Code"
+            ),
+        ])
+
+    def test_ranks_fuzzy_matches(self):
+        self.assertEqual(self.index.best_match("inbox"), 1)
+        self.assertEqual(self.index.best_match("TERM"), 3)
+        self.assertEqual(self.index.best_match("focuser"), 4)
+        self.assertEqual(self.index.best_match("pull reqests"), 2)
+        self.assertCountEqual(self.index.search("easy-window-switcher"), [2, 4])
+        self.assertIsNone(self.index.best_match("spotify"))
+
+    def test_ties_are_broken_by_recency(self):
+        self.index.add(make_window(5, window_class="gnome-terminal-server.Gnome-terminal", title="Terminal"))
+
+        self.assertEqual(self.index.search("terminal", recent_window_ids=[5, 3]), [5, 3])
+        self.assertEqual(self.index.search("terminal", recent_window_ids=[3, 5]), [3, 5])
+
+    def test_windows_can_be_updated_in_place(self):
+        self.index.add(make_window(3, window_class="gnome-terminal-server.Gnome-terminal", title="vim notes.md"))
+        self.index.remove(1)
+
+        self.assertEqual(self.index.best_match("notes"), 3)
+        self.assertIsNone(self.index.best_match("inbox"))
+        self.assertEqual(self.index.postings, WindowSearchIndex([
+            make_window(
+                2, window_class="google-chrome.Google-chrome", title="Pull requests · easy-window-switcher — Chrome"
+            ),
+            make_window(3, window_class="gnome-terminal-server.Gnome-terminal", title="vim notes.md"),
+            make_window(
+                4, window_class="code.Code", title="window_focuser.py — easy-window-switcher — Visual Studio Code"
+            ),
+        ]).postings)
@@ -0,0 +1,46 @@
+import random
+import unittest
+from utils.helpers_test import CustomTestCase, make_focuser
+from easywindowswitcher.data_models import Window, Workspace, WorkspaceGrid
+from easywindowswitcher.services import window_focuser, window_table
+
+
+def load_focuser(windows, use_window_table):
+    focuser = make_focuser(use_window_table=use_window_table)
+    focuser.load_snapshot(WorkspaceGrid(width=20400, height=7680), Workspace(width=0, height=0), windows, 0)
+
+    return focuser
+
+
+@unittest.skipUnless(window_table.is_available(), "NumPy isn't installed")
+class TestWindowTable(CustomTestCase):
+    def setUp(self):
+        generator = random.Random(0)
+
+        # Spread over (and past) the whole workspace grid, including the gaps between the default monitors
+        self.windows = [
+            Window(id=index + 1, x_offset=generator.randrange(-7000, 14000), y_offset=generator.randrange(-100, 5000))
+            for index in range(window_focuser.WINDOW_TABLE_THRESHOLD + 1)
+        ]
+
+    def test_indices_match_indexing_one_window_at_a_time(self):
+        focuser = load_focuser(self.windows, use_window_table=True)
+        expected_focuser = load_focuser(self.windows, use_window_table=False)
+
+        self.assertIsNotNone(focuser.workspace_index)
+        self.assertEqual(focuser.current_workspace_windows, expected_focuser.current_workspace_windows)
+        self.assertEqual(
+            list(focuser.current_windows_by_monitor_index.items()),
+            list(expected_focuser.current_windows_by_monitor_index.items())
+        )
+        self.assertEqual(focuser.current_monitors_by_window_index, expected_focuser.current_monitors_by_window_index)
+
+    def test_indices_of_replaced_windows_are_rebuilt(self):
+        focuser = load_focuser(self.windows, use_window_table=True)
+        focuser.current_workspace_windows
+
+        focuser.windows = self.windows[1:]
+        focuser.forget(["current_workspace_windows"])
+
+        self.assertNotIn(self.windows[0], focuser.current_workspace_windows)
+        self.assertIs(focuser.workspace_index.windows, focuser.windows)
@@ -1,92 +1,513 @@
 import logging
-import math
-from typing import Dict, List, Optional, Union
-from easywindowswitcher.data_models import Window
+import os
+from functools import cached_property, partial
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+from easywindowswitcher.data_models import MonitorTopology, Window, Workspace, WorkspaceGrid
 from easywindowswitcher.data_models.window import WINDOW_DECORATION
-from easywindowswitcher.external_services import wmctrl
+from easywindowswitcher.external_services.backends import Backend, create_backend
+from easywindowswitcher.services.focus_history import FocusHistory
+from easywindowswitcher.services.grid_index import WORKSPACE_STEPS, GridWindowIndex
+from easywindowswitcher.services.monitor_detection import get_monitor_topology
+from easywindowswitcher.services.snapshot_cache import Snapshot, SnapshotCache, create_snapshot_cache
+from easywindowswitcher.services.spatial_index import (
+    DIRECTION_DOWN, DIRECTION_LEFT, DIRECTION_RIGHT, DIRECTION_UP, SpatialIndex
+)
+from easywindowswitcher.services.window_search import WindowSearchIndex
+from easywindowswitcher.utils import profiler, recorder
+from easywindowswitcher.utils.paths import get_focus_history_path
+from easywindowswitcher.utils.service_helpers import run_concurrently
+
+if TYPE_CHECKING:  # pragma: no cover
+    from easywindowswitcher.services.window_table import WorkspaceIndex
 
 logger = logging.getLogger(__name__)
 
-DIRECTION_LEFT = "left"
-DIRECTION_RIGHT = "right"
+DIRECTIONS = (DIRECTION_LEFT, DIRECTION_RIGHT, DIRECTION_UP, DIRECTION_DOWN)
 
-DIRECTIONS = (DIRECTION_LEFT, DIRECTION_RIGHT)
+# Whether directions continue onto the next workspace over (see WindowFocuser), e.g. `1` or `true`
+ACROSS_WORKSPACES_ENVIRONMENT_VARIABLE = "EASYWINDOWSWITCHER_ACROSS_WORKSPACES"
+TRUTHY_VALUES = ("1", "true", "yes", "on")
 
-NUMBER_OF_MONITORS = 4
+# The commands that can be run in a batch (see WindowFocuser.focus_by_batch())
+BATCH_MONITOR = "monitor"
+BATCH_DIRECTION = "direction"
+
+# A batched command and its value, e.g. ("direction", "left") or ("monitor", "3")
+BatchOperation = Tuple[str, str]
+
+# How many windows it takes for indexing them with a (NumPy) window table to beat indexing them one at a time
+# (see WindowFocuser.use_window_table)
+WINDOW_TABLE_THRESHOLD = 500
 
 
 class WindowFocuser:
     """
     Service that handles focusing onto windows using different metrics
     (e.g. absolute monitor position, relative direction, etc).
+
+    All of the state about the desktop (workspaces, windows, focus, and the indices built from them)
+    is computed lazily and memoized, so that each command only pays for the queries and indices it
+    actually uses. Call invalidate() to start over from a fresh view of the desktop.
     """
 
-    def __init__(self):
-        self.wmctrl = wmctrl.WMCtrl()
+    # The state that has to be queried from the backend (i.e. everything else is derived from these)
+    QUERIED_STATE = ("workspace_config", "windows", "current_focused_window_id")
+
+    # The derived state that can't be updated in place when a single window changes (see LiveWindowIndex)
+    GEOMETRY_DERIVED_STATE = ("navigation_table", "spatial_index", "grid_index")
+
+    def __init__(
+        self,
+        backend: Optional[Backend] = None,
+        monitor_topology: Optional[MonitorTopology] = None,
+        focus_history: Optional[FocusHistory] = None,
+        across_workspaces: Optional[bool] = None,
+        snapshot_cache: Optional[SnapshotCache] = None,
+        use_window_table: bool = False
+    ) -> None:
+        """
+        :param backend: What to query (and control) the windows with; see external_services/backends.py.
+        :param monitor_topology: The layout of the monitors; detected automatically when not given.
+        :param focus_history: The most recently focused windows; the display's persisted history when not given.
+        :param across_workspaces: Whether moving in a direction past the last window of the current workspace
+            continues onto the next workspace over (instead of wrapping around the current workspace's monitors);
+            defaults to the ACROSS_WORKSPACES_ENVIRONMENT_VARIABLE environment variable.
+        :param snapshot_cache: Where to share snapshots of the desktop with the next invocations; defaults to the
+            display's snapshot file if snapshots are enabled (see SNAPSHOT_TTL_ENVIRONMENT_VARIABLE).
+        :param use_window_table: Whether to index desktops with lots of windows (see WINDOW_TABLE_THRESHOLD) all at
+            once with NumPy (if it's installed; see services/window_table.py). Importing NumPy takes far longer than
+            it saves a single invocation, so this only pays off for long-running processes (e.g. the daemon).
+        """
+        self.backend = backend or create_backend()
+        self.fixed_monitor_topology = monitor_topology
+        self.focus_history = focus_history or FocusHistory(
+            get_focus_history_path(getattr(self.backend, "display", None))
+        )
+
+        if across_workspaces is None:
+            across_workspaces = os.environ.get(ACROSS_WORKSPACES_ENVIRONMENT_VARIABLE, "").lower() in TRUTHY_VALUES
+
+        self.across_workspaces = across_workspaces
+        self.snapshot_cache = snapshot_cache or create_snapshot_cache(getattr(self.backend, "display", None))
+        self.use_window_table = use_window_table
 
     def setup(self):
-        self.workspace_grid, self.current_workspace = self.wmctrl.get_workspace_config()
-        self.windows = self.wmctrl.get_windows_config()
+        """Eagerly takes a whole new snapshot of the desktop."""
+        self.invalidate()
+        self._prefetch(self.QUERIED_STATE)
 
-        self.current_workspace_windows = self._get_current_workspace_windows()
+    def invalidate(self) -> None:
+        """Forgets all of the memoized state, so that it is re-queried the next time it's needed."""
+        self.forget(_memoized_state_names(type(self)))
 
-        self.current_windows_by_monitor_index = self._index_windows_by_monitor(
-            self.current_workspace_windows
-        )
+    def forget(self, names: Sequence[str]) -> None:
+        """Forgets some of the memoized state, so that it is recalculated the next time it's needed."""
+        for name in names:
+            self.__dict__.pop(name, None)
 
-        self.current_monitors_by_window_index = self._index_monitors_by_window(
-            self.current_workspace_windows
-        )
+    def load_snapshot(
+        self,
+        workspace_grid: WorkspaceGrid,
+        current_workspace: Workspace,
+        windows: List[Window],
+        current_focused_window_id: int
+    ) -> None:
+        """Replaces the queried state with a snapshot of the desktop's state that was taken elsewhere."""
+        self.invalidate()
 
-        self.current_focused_window_id = self.wmctrl.get_current_focused_window_id()
+        self.workspace_config = (workspace_grid, current_workspace)
+        self.windows = windows
+        self.current_focused_window_id = current_focused_window_id
 
-        self.current_monitor = self.current_monitors_by_window_index[
-            self.current_focused_window_id
-        ]
+    @cached_property
+    def workspace_config(self) -> Tuple[WorkspaceGrid, Workspace]:
+        return self.backend.get_workspace_config()
 
-    def focus_by_monitor_index(self, monitor_index: int) -> None:
-        if monitor_index in self.current_windows_by_monitor_index:
-            self.wmctrl.focus_window_by_id(
-                self.current_windows_by_monitor_index[monitor_index][0]
+    @cached_property
+    def monitor_topology(self) -> MonitorTopology:
+        if self.fixed_monitor_topology:
+            return self.fixed_monitor_topology
+
+        workspace_grid = self.workspace_config[0]
+
+        with profiler.span("load_monitor_topology"):
+            monitor_topology = get_monitor_topology(workspace_grid, display=getattr(self.backend, "display", None))
+
+        # The topology is usually cached, so it has to be recorded on its own for a trace to be replayable
+        if recorder.is_recording():
+            recorder.record(recorder.EVENT_MONITOR_TOPOLOGY, topology=monitor_topology.to_dict())
+
+        return monitor_topology
+
+    @cached_property
+    def workspace_grid(self) -> WorkspaceGrid:
+        # A single workspace spans all of the monitors
+        workspace_grid = self.workspace_config[0]
+        workspace_grid.set_workspace_size(self.monitor_topology.width, self.monitor_topology.height)
+
+        return workspace_grid
+
+    @property
+    def current_workspace(self) -> Workspace:
+        return self.workspace_config[1]
+
+    @cached_property
+    def windows(self) -> List[Window]:
+        return self.backend.get_windows_config()
+
+    @cached_property
+    def current_focused_window_id(self) -> int:
+        return self.backend.get_current_focused_window_id()
+
+    @cached_property
+    def current_workspace_windows(self) -> List[Window]:
+        workspace_index = self._get_workspace_index()
+
+        if workspace_index is not None:
+            return workspace_index.current_workspace_windows
+
+        windows = self.windows
+
+        with profiler.span("filter_current_workspace_windows", windows=len(windows)):
+            return self._get_current_workspace_windows()
+
+    @cached_property
+    def current_windows_by_monitor_index(self) -> Dict[int, List[int]]:
+        windows = self.current_workspace_windows
+        workspace_index = self._get_workspace_index(windows)
+
+        if workspace_index is not None:
+            return workspace_index.windows_by_monitor_index
+
+        with profiler.span("index_windows_by_monitor", windows=len(windows)):
+            return self._index_windows_by_monitor(windows)
+
+    @cached_property
+    def current_monitors_by_window_index(self) -> Dict[int, int]:
+        windows = self.current_workspace_windows
+        workspace_index = self._get_workspace_index(windows)
+
+        if workspace_index is not None:
+            return workspace_index.monitors_by_window_index
+
+        with profiler.span("index_monitors_by_window", windows=len(windows)):
+            return self._index_monitors_by_window(windows)
+
+    @cached_property
+    def workspace_index(self) -> "Optional[WorkspaceIndex]":
+        """
+        All of the indices of the current workspace's windows, built at once with a window table
+        (see use_window_table); None when they're built one at a time instead.
+        """
+        windows = self.windows
+
+        if not self.use_window_table or len(windows) < WINDOW_TABLE_THRESHOLD:
+            return None
+
+        # Imported here so that NumPy is only ever imported when it's actually used
+        from easywindowswitcher.services import window_table
+
+        with profiler.span("index_window_table", windows=len(windows)):
+            return window_table.index_current_workspace(
+                windows, self.workspace_grid.workspace_width, self.workspace_grid.workspace_height,
+                self.monitor_topology
             )
 
+    @cached_property
+    def navigation_table(self) -> Dict[int, Tuple[Optional[int], Optional[int]]]:
+        """
+        The windows that moving left and right go to from each window of the current workspace, as (left, right).
+
+        Either of them is None if there's no window that way in the current workspace, which only happens when
+        not wrapping around the monitors (see across_workspaces).
+        """
+        windows_by_monitor_index = self.current_windows_by_monitor_index
+
+        with profiler.span("build_navigation_table", windows=len(self.current_workspace_windows)):
+            return self._build_navigation_table(windows_by_monitor_index)
+
+    @cached_property
+    def spatial_index(self) -> SpatialIndex:
+        windows = self.current_workspace_windows
+
+        with profiler.span("build_spatial_index", windows=len(windows)):
+            return SpatialIndex(windows)
+
+    @cached_property
+    def grid_index(self) -> GridWindowIndex:
+        windows = self.windows
+
+        with profiler.span("build_grid_index", windows=len(windows)):
+            return GridWindowIndex(windows, self.workspace_grid, self.current_workspace, self.monitor_topology)
+
+    @cached_property
+    def search_index(self) -> WindowSearchIndex:
+        # Every window is searchable, not just the ones in the current workspace
+        windows = self.windows
+
+        with profiler.span("build_search_index", windows=len(windows)):
+            return WindowSearchIndex(windows)
+
+    @cached_property
+    def current_monitor(self) -> Optional[int]:
+        # The focused window won't be indexed if it isn't a navigable window (e.g. the desktop)
+        return self.current_monitors_by_window_index.get(self.current_focused_window_id)
+
+    def focus_by_monitor_index(self, monitor_index: int) -> None:
+        self._prefetch(("workspace_config", "windows"))
+
+        window_to_focus = self._get_window_by_monitor_index(monitor_index)
+
+        if window_to_focus is not None:
+            self._focus_window(window_to_focus)
+
     def focus_by_direction(self, direction: str) -> None:
         if direction in DIRECTIONS:
-            window_to_focus = self._get_closest_window(direction)
+            self._prefetch(self.QUERIED_STATE)
+
+        window_to_focus = self._get_window_by_direction(direction)
+
+        if window_to_focus is not None:
+            self._focus_window(window_to_focus)
+
+    def focus_by_workspace_index(self, workspace_index: int, monitor_index: Optional[int] = None) -> None:
+        """
+        Focuses onto a window on any workspace of the grid.
+
+        :param workspace_index: The workspace, indexed from left-to-right, top-to-bottom (see WorkspaceGrid).
+        :param monitor_index: The monitor of the workspace; defaults to the first monitor with any windows.
+        """
+        self._prefetch(("workspace_config", "windows"))
+
+        window_to_focus = self.grid_index.get_window(workspace_index, monitor_index)
 
-            if window_to_focus:
-                self.wmctrl.focus_window_by_id(window_to_focus)
-            else:
-                logger.info("No window to focus to.")
+        if window_to_focus is not None:
+            self._focus_window(window_to_focus)
         else:
-            logger.info(
-                "Invalid direction: {}. Valid directions are: [{}]".format(
-                    direction, ", ".join(DIRECTIONS)
-                )
-            )
+            logger.info("No window to focus to.")
 
-    def _get_current_workspace_windows(self) -> List[Window]:
-        def in_workspace(window: Window) -> bool:
-            # Can find the windows in the current workspace by looking at the x and y offsets.
-            # If x-offset isn't negative, the x-offset doesn't exceed the total width of the workspace,
-            # and the y-offset doesn't exceed the total height of the workspace,
-            # then the window is in the current workspace.
-
-            # Additionally, looking at the x-offset tells us which monitor the window is on:
-            # 0 = leftmost monitor, 1920 = center monitor, 3840 = rightmost monitor (for triple 1080p monitors)
-
-            x_offset = window.x_offset
-            y_offset = window.y_offset
-
-            return (
-                x_offset >= 0
-                and x_offset < self.workspace_grid.workspace_width
-                and y_offset >= 0
-                and y_offset < self.workspace_grid.workspace_height
-            )
+    def focus_by_history(self, position: int = 1) -> None:
+        """
+        Focuses onto one of the most recently focused windows, skipping the windows that have since been closed.
+
+        :param position: How far back to go; 1 is the previously focused window, 2 the one before that, etc.
+        """
+        self._prefetch(("windows", "current_focused_window_id"))
+
+        window_to_focus = self._get_window_from_history(position)
+
+        if window_to_focus is not None:
+            self._focus_window(window_to_focus)
+        else:
+            logger.info("No window to focus to.")
+
+    def focus_by_search(self, query: str) -> None:
+        """
+        Focuses onto the window whose title or class best matches the query (see WindowSearchIndex).
+
+        Equally good matches are broken by which of the windows was focused most recently.
+        """
+        self._prefetch(("windows",))
+
+        with profiler.span("search_windows", query=query):
+            window_to_focus = self.search_index.best_match(query, self.focus_history.window_ids)
+
+        if window_to_focus is not None:
+            self._focus_window(window_to_focus)
+        else:
+            logger.info("No window matches '%s'.", query)
+
+    def focus_by_batch(self, operations: Sequence[BatchOperation]) -> Optional[int]:
+        """
+        Runs a sequence of operations (e.g. right, right, then monitor 3) against a single snapshot of the desktop.
+
+        Each operation moves a simulated focus, so that the next one starts from wherever the previous one
+        ended up, and only the window that the whole sequence ends up on is actually focused.
+
+        :param operations: The operations to run, in order (see parse_batch_operations()).
+
+        :return: The ID of the window that was focused, if the focus had to change at all.
+        """
+        self._prefetch(self.QUERIED_STATE)
+
+        initially_focused_window_id = self.current_focused_window_id
+
+        with profiler.span("simulate_batch", operations=len(operations)):
+            for command, value in operations:
+                if command == BATCH_MONITOR:
+                    window_id = self._get_window_by_monitor_index(int(value))
+                else:
+                    window_id = self._get_window_by_direction(value)
+
+                if window_id is not None:
+                    self._set_focused_window(window_id)
+
+        window_to_focus = self.current_focused_window_id
+
+        # Put the simulated focus back, so that the focus is recorded as moving from where it really was
+        self._set_focused_window(initially_focused_window_id)
+
+        if window_to_focus == initially_focused_window_id:
+            return None
+
+        self._focus_window(window_to_focus)
+
+        return window_to_focus
+
+    def _prefetch(self, names: Sequence[str]) -> None:
+        """
+        Makes sure that the given (queried) state is memoized, querying whatever is missing all at once
+        if the backend allows it.
+        """
+        use_snapshot = self.snapshot_cache is not None and "windows" in names and "windows" not in self.__dict__
+        snapshot_token = self._get_snapshot_token() if use_snapshot else 0
+
+        if use_snapshot and self._restore_snapshot(snapshot_token):
+            use_snapshot = False
+
+        missing_names = [name for name in names if name not in self.__dict__]
+
+        # Backends that spawn a process per query can have all of them in flight at once
+        if len(missing_names) > 1 and self.backend.CONCURRENT_QUERIES:
+            with profiler.span("query_state", state=missing_names):
+                run_concurrently([partial(getattr, self, name) for name in missing_names])
+
+        if use_snapshot:
+            self._save_snapshot(snapshot_token)
+
+    def _get_snapshot_token(self) -> int:
+        # Backends that can't tell cheaply whether the desktop changed only have the snapshot's TTL to go by
+        get_snapshot_token = getattr(self.backend, "get_snapshot_token", None)
+
+        return get_snapshot_token() if get_snapshot_token else 0
+
+    def _restore_snapshot(self, snapshot_token: int) -> bool:
+        """Restores the queried state (and the indices built from it) from the snapshot cache, if it's valid."""
+        if self.snapshot_cache is None:
+            return False
+
+        with profiler.span("load_snapshot"):
+            snapshot = self.snapshot_cache.load(snapshot_token)
+
+        if snapshot is None:
+            return False
+
+        self.workspace_config = (snapshot.workspace_grid, snapshot.current_workspace)
+        self.windows = snapshot.windows
+        self.current_workspace_windows = snapshot.current_workspace_windows
+        self.current_windows_by_monitor_index = snapshot.windows_by_monitor_index
+        self.current_monitors_by_window_index = snapshot.monitors_by_window_index
+
+        if not self.fixed_monitor_topology:
+            self.monitor_topology = snapshot.monitor_topology
+
+        return True
+
+    def _save_snapshot(self, snapshot_token: int) -> None:
+        if self.snapshot_cache is None:
+            return
+
+        with profiler.span("save_snapshot"):
+            self.snapshot_cache.save(snapshot_token, Snapshot(
+                self.workspace_config[0],
+                self.current_workspace,
+                self.monitor_topology,
+                self.windows,
+                self.current_workspace_windows,
+                self.current_windows_by_monitor_index,
+                self.current_monitors_by_window_index
+            ))
+
+    def _focus_window(self, window_id: int) -> None:
+        previous_window_id = self.__dict__.get("current_focused_window_id")
+
+        with profiler.span("focus_window", window_id=window_id):
+            self.backend.focus_window_by_id(window_id)
+
+        # The focus could've changed (e.g. with the mouse) since it was last recorded
+        if previous_window_id is not None:
+            self.focus_history.record(previous_window_id, window_id)
+        else:
+            self.focus_history.record(window_id)
+
+        # Keep track of the new focus right away, so that a long-lived process doesn't act on the old
+        # focus if another request comes in before the window manager has reported the change
+        self._set_focused_window(window_id)
+
+    def _set_focused_window(self, window_id: int) -> None:
+        self.current_focused_window_id = window_id
+
+        # The current monitor gets recalculated from the new focus the next time it's needed
+        self.__dict__.pop("current_monitor", None)
+
+    def _get_window_from_history(self, position: int) -> Optional[int]:
+        # Just a set lookup per remembered window; no need for any of the geometric indices
+        self.focus_history.evict({window.id for window in self.windows})
 
+        recent_window_ids = [
+            window_id for window_id in self.focus_history.window_ids if window_id != self.current_focused_window_id
+        ]
+
+        return recent_window_ids[position - 1] if 0 < position <= len(recent_window_ids) else None
+
+    def _get_window_by_monitor_index(self, monitor_index: int) -> Optional[int]:
+        return self._get_window_from_monitor(monitor_index, 0)
+
+    def _get_window_by_direction(self, direction: str) -> Optional[int]:
+        if direction not in DIRECTIONS:
+            logger.info("Invalid direction: %s. Valid directions are: [%s]", direction, ", ".join(DIRECTIONS))
+            return None
+
+        with profiler.span("find_closest_window", direction=direction):
+            window_to_focus = self._get_closest_window(direction)
+
+        if window_to_focus is None:
+            logger.info("No window to focus to.")
+
+        return window_to_focus
+
+    def _get_workspace_index(
+        self, current_workspace_windows: Optional[List[Window]] = None
+    ) -> "Optional[WorkspaceIndex]":
+        """
+        Gets the window table's indices, as long as they're still of the current windows (e.g. the live index hasn't
+        replaced them since) and, if given, of the current workspace's windows (e.g. not ones from a snapshot).
+        """
+        workspace_index = self.workspace_index
+
+        if workspace_index is not None and workspace_index.windows is not self.windows:
+            self.forget(["workspace_index"])
+            workspace_index = self.workspace_index
+
+        if workspace_index is None or (
+            current_workspace_windows is not None
+            and workspace_index.current_workspace_windows is not current_workspace_windows
+        ):
+            return None
+
+        return workspace_index
+
+    def _get_current_workspace_windows(self) -> List[Window]:
         return sorted(
-            list(filter(in_workspace, self.windows)), key=lambda window: window.x_offset
+            list(filter(self._is_in_current_workspace, self.windows)), key=lambda window: window.x_offset
+        )
+
+    def _is_in_current_workspace(self, window: Window) -> bool:
+        # Can find the windows in the current workspace by looking at the x and y offsets.
+        # If x-offset isn't negative, the x-offset doesn't exceed the total width of the workspace,
+        # and the y-offset doesn't exceed the total height of the workspace,
+        # then the window is in the current workspace.
+
+        # Additionally, looking at the offsets tells us which monitor the window is on (see MonitorTopology).
+
+        x_offset = window.x_offset
+        y_offset = window.y_offset
+
+        return (
+            x_offset >= 0
+            and x_offset < self.workspace_grid.workspace_width
+            and y_offset >= 0
+            and y_offset < self.workspace_grid.workspace_height
         )
 
     def _index_windows_by_monitor(self, windows: List[Window]) -> Dict[int, List[int]]:
@@ -118,88 +539,162 @@ class WindowFocuser:
         }
 
     def _calculate_which_monitor_window_is_on(self, window: Window) -> int:
-        # Note: This logic is hard-coded for my personal quad-monitor setup. Adjust accordingly.
-        # See the top comment in workspace_grid.py explaining the setup.
-
-        # On the left stack of two 1920x1080 monitors.
-        if window.x_offset < 1920:
-            # Determine if the window is on the top or bottom leftmost vertical monitor.
-            return math.floor((window.y_offset - WINDOW_DECORATION) / 1080)
-        # On the 3440x1440 ultrawide in the center.
-        elif window.x_offset >= 1920 and window.x_offset < (1920 + 3440):
-            return 2
-        # On the rightmost 1440x2560 (portrait) monitor.
-        else:
-            return 3
+        # The y-offset is of the window's contents, so the title bar has to be accounted for
+        # for windows that are right at the top of a monitor.
+        return self.monitor_topology.get_monitor_index(window.x_offset, window.y_offset - WINDOW_DECORATION)
 
     def _get_closest_window(self, direction: str) -> Optional[int]:
         if len(self.current_workspace_windows) == 0:
+            if self.across_workspaces:
+                return self._get_window_from_next_workspaces(direction)
+
             logger.info("No windows in current workspace.")
             return None
 
-        current_monitor_windows = self.current_windows_by_monitor_index[
-            self.current_monitor
-        ]
+        current_monitor = self.current_monitor
 
-        current_window_position = current_monitor_windows.index(
-            self.current_focused_window_id
-        )
+        if current_monitor is None:
+            if self.across_workspaces:
+                return self._get_window_from_next_workspaces(direction)
+
+            logger.info("The focused window isn't in the current workspace.")
+            return None
+
+        if direction in (DIRECTION_UP, DIRECTION_DOWN):
+            closest_window = self.spatial_index.nearest(self.current_focused_window_id, direction)
 
-        closest_window = None
-
-        if direction == DIRECTION_LEFT:
-            if self._is_leftmost_window_on_current_monitor(
-                current_monitor_windows, current_window_position
-            ):
-                # The modulus operation wraps the monitor index back around if it goes negative.
-                # i.e. (0 - 1) % 3 = 2
-                left_monitor = self._next_monitor(self.current_monitor, -1)
-
-                while not (
-                    closest_window := self._get_window_from_monitor(left_monitor, -1)
-                ):
-                    left_monitor = self._next_monitor(left_monitor, -1)
-            else:
-                # Find the window on the current monitor that is just left of the current window
-                closest_window = current_monitor_windows[current_window_position - 1]
-        elif direction == DIRECTION_RIGHT:
-            if self._is_rightmost_window_on_current_monitor(
-                current_monitor_windows, current_window_position
-            ):
-                right_monitor = self._next_monitor(self.current_monitor, 1)
-
-                while not (
-                    closest_window := self._get_window_from_monitor(right_monitor, 0)
-                ):
-                    right_monitor = self._next_monitor(right_monitor, 1)
-            else:
-                # Find the window on the current monitor that is just right of the current window
-                closest_window = current_monitor_windows[current_window_position + 1]
+            if closest_window is None and self.across_workspaces:
+                return self._get_window_from_next_workspaces(direction)
+
+            return closest_window
+
+        left_window, right_window = self.navigation_table[self.current_focused_window_id]
+        closest_window = left_window if direction == DIRECTION_LEFT else right_window
+
+        if closest_window is None and self.across_workspaces:
+            return self._get_window_from_next_workspaces(direction)
 
         return closest_window
 
-    def _is_leftmost_window_on_current_monitor(
-        self, current_monitor_windows: List[int], current_window_position: int
-    ) -> bool:
-        return len(current_monitor_windows) == 1 or current_window_position == 0
+    def _build_navigation_table(
+        self, windows_by_monitor_index: Dict[int, List[int]]
+    ) -> Dict[int, Tuple[Optional[int], Optional[int]]]:
+        wrap = not self.across_workspaces
+        navigation_table = {}  # type: Dict[int, Tuple[Optional[int], Optional[int]]]
 
-    def _is_rightmost_window_on_current_monitor(
-        self, current_monitor_windows: List[int], current_window_position: int
-    ) -> bool:
-        return len(current_monitor_windows) == 1 or current_window_position == (
-            len(current_monitor_windows) - 1
-        )
+        for monitor, window_ids in windows_by_monitor_index.items():
+            # Past the leftmost window of a monitor is the rightmost window of the closest monitor to the left
+            # that has any windows, and vice versa
+            left_of_monitor = self._get_window_from_next_monitors(monitor, -1, -1, wrap=wrap)
+            right_of_monitor = self._get_window_from_next_monitors(monitor, 1, 0, wrap=wrap)
+
+            last_position = len(window_ids) - 1
+
+            for position, window_id in enumerate(window_ids):
+                navigation_table[window_id] = (
+                    window_ids[position - 1] if position > 0 else left_of_monitor,
+                    window_ids[position + 1] if position < last_position else right_of_monitor,
+                )
+
+        return navigation_table
 
     def _get_window_from_monitor(self, monitor: int, index: int) -> Union[int, None]:
         try:
             return self.current_windows_by_monitor_index[monitor][index]
-        except KeyError:
+        except (KeyError, IndexError):
             return None
 
+    def _get_window_from_next_monitors(
+        self, current_monitor: int, direction: int, index: int, wrap: bool = True
+    ) -> Union[int, None]:
+        """
+        Goes through the monitors in the given direction, wrapping around, until one of them has a window.
+
+        Every monitor (including the current one, last) is checked at most once, so this always terminates.
+        Without wrapping, only the monitors up to the edge of the workspace are checked.
+        """
+        monitor = current_monitor
+
+        for _ in range(len(self.monitor_topology)):
+            if not wrap and not (0 <= monitor + direction < len(self.monitor_topology)):
+                return None
+
+            # The modulus operation wraps the monitor index back around if it goes negative.
+            # i.e. (0 - 1) % 3 = 2
+            monitor = self._next_monitor(monitor, direction)
+
+            if (window := self._get_window_from_monitor(monitor, index)):
+                return window
+
+        return None
+
+    def _get_window_from_next_workspaces(self, direction: str) -> Optional[int]:
+        """
+        Goes through the workspaces in the given direction (without wrapping around the grid)
+        until one of them has a window, returning the window to land on in it.
+        """
+        workspace_index = self.grid_index.current_workspace_index
+        horizontal_step, vertical_step = WORKSPACE_STEPS[direction]
+
+        while workspace_index is not None:
+            workspace_index = self.workspace_grid.get_adjacent_workspace_index(
+                workspace_index, horizontal_step, vertical_step
+            )
+
+            if workspace_index is not None and (window := self.grid_index.get_entry_window(workspace_index, direction)):
+                return window
+
+        return None
+
     def _next_monitor(self, current_monitor: int, direction: int = 1) -> int:
         """
         Calculates the index of the next monitor in the sequence for the given direction,
         where direction is either 1 (for the next right monitor) or -1 (for the next left monitor).
         """
 
-        return (current_monitor + direction) % NUMBER_OF_MONITORS
+        return (current_monitor + direction) % len(self.monitor_topology)
+
+
+def parse_batch_operations(tokens: Sequence[str]) -> List[BatchOperation]:
+    """
+    Parses a batch of operations from pairs of tokens, e.g. `direction right direction right monitor 3`.
+
+    As a shorthand, a direction can also be given on its own (e.g. `right right monitor 3`).
+
+    :raises ValueError: When the tokens aren't a valid batch of operations.
+    """
+    operations = []  # type: List[BatchOperation]
+    tokens = list(tokens)
+
+    while tokens:
+        command = tokens.pop(0)
+
+        if command in DIRECTIONS:
+            operations.append((BATCH_DIRECTION, command))
+            continue
+
+        if command not in (BATCH_MONITOR, BATCH_DIRECTION):
+            raise ValueError("Unknown operation: {}".format(command))
+
+        if not tokens:
+            raise ValueError("Missing the value of the '{}' operation".format(command))
+
+        value = tokens.pop(0)
+
+        if command == BATCH_MONITOR and not value.lstrip("-").isdigit():
+            raise ValueError("Invalid monitor index: {}".format(value))
+
+        if command == BATCH_DIRECTION and value not in DIRECTIONS:
+            raise ValueError(
+                "Invalid direction: {}. Valid directions are: [{}]".format(value, ", ".join(DIRECTIONS))
+            )
+
+        operations.append((command, value))
+
+    return operations
+
+
+def _memoized_state_names(cls: type) -> List[str]:
+    return [
+        name for klass in cls.__mro__ for name, value in vars(klass).items() if isinstance(value, cached_property)
+    ]
@@ -0,0 +1,170 @@
+import bisect
+import logging
+import threading
+from typing import List, Tuple
+from typing import Dict  # noqa
+from easywindowswitcher.data_models import Window, Workspace, WorkspaceGrid
+from easywindowswitcher.services.window_focuser import WindowFocuser
+
+logger = logging.getLogger(__name__)
+
+# Windows are kept sorted left-to-right by their x-offset; the ID breaks ties so that the keys are unique.
+SortKey = Tuple[int, int]
+
+
+class LiveWindowIndex:
+    """
+    Keeps a WindowFocuser's indices up to date one window at a time, instead of rebuilding them
+    from a whole new snapshot for every command.
+
+    Only the monitor bucket(s) that a changed window moves out of/into are touched, and every bucket
+    stays sorted by x-offset, so the focuser can answer commands straight from the live indices.
+
+    The indices are shared with whatever thread handles commands, so everything that reads or writes
+    them must hold the lock.
+    """
+
+    def __init__(self, window_focuser: WindowFocuser) -> None:
+        self.window_focuser = window_focuser
+        self.lock = threading.RLock()
+
+        # Whether the indices have been built from a full snapshot yet (and haven't gotten out of sync since)
+        self.is_synced = False
+
+        # The sort keys for the focuser's current_workspace_windows and current_windows_by_monitor_index lists
+        self._workspace_keys = []  # type: List[SortKey]
+        self._monitor_keys = {}  # type: Dict[int, List[SortKey]]
+
+        # The sort key that each indexed window was inserted with, so that it can be found again after it moves
+        self._keys_by_window = {}  # type: Dict[int, SortKey]
+
+    def resync(
+        self,
+        workspace_grid: WorkspaceGrid,
+        current_workspace: Workspace,
+        windows: List[Window],
+        current_focused_window_id: int
+    ) -> None:
+        """Rebuilds all of the indices from a full snapshot (e.g. on startup or after missing events)."""
+        with self.lock:
+            focuser = self.window_focuser
+            focuser.load_snapshot(workspace_grid, current_workspace, windows, current_focused_window_id)
+
+            windows_by_id = {window.id: window for window in focuser.current_workspace_windows}
+
+            # The focuser only sorts by x-offset; also sorting by ID makes sure that the keys are in order
+            focuser.current_workspace_windows.sort(key=_sort_key)
+            self._workspace_keys = [_sort_key(window) for window in focuser.current_workspace_windows]
+            self._keys_by_window = {window.id: _sort_key(window) for window in focuser.current_workspace_windows}
+
+            self._monitor_keys = {}
+
+            for monitor, window_ids in focuser.current_windows_by_monitor_index.items():
+                window_ids.sort(key=lambda window_id: _sort_key(windows_by_id[window_id]))
+                self._monitor_keys[monitor] = [_sort_key(windows_by_id[window_id]) for window_id in window_ids]
+
+            self.is_synced = True
+
+    def mark_out_of_sync(self) -> None:
+        with self.lock:
+            self.is_synced = False
+
+    def update_window(self, window: Window) -> None:
+        """Adds a new window, or moves an existing window to wherever its (new) geometry puts it."""
+        with self.lock:
+            focuser = self.window_focuser
+
+            self._remove_from_current_workspace(window.id)
+            focuser.windows = [existing for existing in focuser.windows if existing.id != window.id] + [window]
+
+            if focuser._is_in_current_workspace(window):
+                self._add_to_current_workspace(window)
+
+            # The search index doesn't care about geometry, so it can be updated in place (if it's been built yet)
+            if "search_index" in focuser.__dict__:
+                focuser.search_index.add(window)
+
+            focuser.forget(focuser.GEOMETRY_DERIVED_STATE)
+
+    def remove_window(self, window_id: int) -> None:
+        with self.lock:
+            focuser = self.window_focuser
+
+            self._remove_from_current_workspace(window_id)
+            focuser.windows = [window for window in focuser.windows if window.id != window_id]
+
+            if "search_index" in focuser.__dict__:
+                focuser.search_index.remove(window_id)
+
+            focuser.forget(focuser.GEOMETRY_DERIVED_STATE)
+
+    def warm_up(self) -> None:
+        """
+        Rebuilds the derived state that the next command is most likely to need (i.e. the navigation table), if
+        changes to the windows threw it out; meant to be called on a background thread right after applying them,
+        so that it's already built by the time the next command comes in.
+        """
+        with self.lock:
+            if self.is_synced and "navigation_table" not in self.window_focuser.__dict__:
+                self.window_focuser.navigation_table
+
+    def set_focused_window(self, window_id: int) -> None:
+        with self.lock:
+            focuser = self.window_focuser
+
+            focuser.current_focused_window_id = window_id
+            focuser.current_monitor = focuser.current_monitors_by_window_index.get(window_id)
+
+            # Keeps track of focus changes that didn't go through the focuser too (e.g. clicking on a window)
+            focuser.focus_history.record(window_id)
+
+    def _add_to_current_workspace(self, window: Window) -> None:
+        focuser = self.window_focuser
+        key = _sort_key(window)
+
+        position = bisect.bisect(self._workspace_keys, key)
+        self._workspace_keys.insert(position, key)
+        focuser.current_workspace_windows.insert(position, window)
+
+        monitor = focuser._calculate_which_monitor_window_is_on(window)
+        monitor_keys = self._monitor_keys.setdefault(monitor, [])
+        monitor_windows = focuser.current_windows_by_monitor_index.setdefault(monitor, [])
+
+        position = bisect.bisect(monitor_keys, key)
+        monitor_keys.insert(position, key)
+        monitor_windows.insert(position, window.id)
+
+        focuser.current_monitors_by_window_index[window.id] = monitor
+        self._keys_by_window[window.id] = key
+
+        if window.id == focuser.current_focused_window_id:
+            focuser.current_monitor = monitor
+
+    def _remove_from_current_workspace(self, window_id: int) -> None:
+        focuser = self.window_focuser
+        monitor = focuser.current_monitors_by_window_index.pop(window_id, None)
+
+        if monitor is None:
+            return
+
+        key = self._keys_by_window.pop(window_id)
+
+        position = bisect.bisect_left(self._monitor_keys[monitor], key)
+        del focuser.current_windows_by_monitor_index[monitor][position]
+        del self._monitor_keys[monitor][position]
+
+        # Monitors without any windows aren't indexed at all (see WindowFocuser._get_window_from_monitor)
+        if not focuser.current_windows_by_monitor_index[monitor]:
+            del focuser.current_windows_by_monitor_index[monitor]
+            del self._monitor_keys[monitor]
+
+        position = bisect.bisect_left(self._workspace_keys, key)
+        del focuser.current_workspace_windows[position]
+        del self._workspace_keys[position]
+
+        if window_id == focuser.current_focused_window_id:
+            focuser.current_monitor = None
+
+
+def _sort_key(window: Window) -> SortKey:
+    return (window.x_offset, window.id)
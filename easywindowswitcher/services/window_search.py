@@ -0,0 +1,106 @@
+import math
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence, Set
+from typing import Dict  # noqa
+from easywindowswitcher.data_models import Window
+
+# The length of the substrings that the windows are indexed by
+NGRAM_SIZE = 3
+
+# The share of the query's n-grams that a window has to contain to match at all,
+# which lets typos and abbreviations still match without matching just about anything
+MIN_MATCH_RATIO = 0.6
+
+
+class WindowSearchIndex:
+    """
+    Indexes windows by the n-grams (trigrams) of their titles and classes, for fuzzy searching them by name.
+
+    A query only looks at the windows that share at least one of its n-grams (through the inverted index),
+    instead of scoring every window's title. Matches are ranked by how many of the query's n-grams they contain,
+    then by whether they contain the query outright, then by how short (i.e. specific) their name is.
+
+    Windows can be added and removed one at a time, so a long-lived process can keep the index up to date.
+    """
+
+    def __init__(self, windows: Iterable[Window] = ()) -> None:
+        self.names = {}  # type: Dict[int, str]
+        self.postings = {}  # type: Dict[str, Set[int]]
+
+        for window in windows:
+            self.add(window)
+
+    def add(self, window: Window) -> None:
+        """Indexes a window, replacing whatever it was indexed by before (e.g. if its title changed)."""
+        self.remove(window.id)
+
+        name = _normalize("{} {}".format(window.title, window.window_class))
+        self.names[window.id] = name
+
+        for ngram in _get_ngrams(name):
+            self.postings.setdefault(ngram, set()).add(window.id)
+
+    def remove(self, window_id: int) -> None:
+        name = self.names.pop(window_id, None)
+
+        if name is None:
+            return
+
+        for ngram in _get_ngrams(name):
+            window_ids = self.postings[ngram]
+            window_ids.discard(window_id)
+
+            if not window_ids:
+                del self.postings[ngram]
+
+    def search(self, query: str, recent_window_ids: Sequence[int] = ()) -> List[int]:
+        """
+        Finds the windows whose title or class fuzzily matches the query.
+
+        :param query: What to search for (case insensitive).
+        :param recent_window_ids: The most recently focused windows (most recent first), to break ties between
+            otherwise equally good matches with.
+
+        :return: The IDs of the matching windows, best match first.
+        """
+        query = _normalize(query)
+        query_ngrams = _get_ngrams(query)
+
+        if not query_ngrams:
+            return []
+
+        hits = Counter()  # type: Counter[int]
+
+        for ngram in query_ngrams:
+            hits.update(self.postings.get(ngram, ()))
+
+        min_hits = math.ceil(len(query_ngrams) * MIN_MATCH_RATIO)
+        recency = {window_id: rank for rank, window_id in enumerate(recent_window_ids)}
+
+        return sorted(
+            (window_id for window_id, count in hits.items() if count >= min_hits),
+            key=lambda window_id: (
+                -hits[window_id],
+                query not in self.names[window_id],
+                len(self.names[window_id]),
+                recency.get(window_id, len(recency)),
+            )
+        )
+
+    def best_match(self, query: str, recent_window_ids: Sequence[int] = ()) -> Optional[int]:
+        matches = self.search(query, recent_window_ids)
+        return matches[0] if matches else None
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _get_ngrams(text: str) -> Set[str]:
+    if not text:
+        return set()
+
+    # Padding with spaces gives short words (and queries) n-grams of their own, and favours matching word starts
+    padded_text = " {} ".format(text)
+
+    return {padded_text[i:i + NGRAM_SIZE] for i in range(len(padded_text) - NGRAM_SIZE + 1)}
@@ -0,0 +1,123 @@
+from operator import attrgetter
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from easywindowswitcher.data_models import MonitorTopology, Window
+from easywindowswitcher.data_models.window import WINDOW_DECORATION
+
+# NumPy is optional: without it, the focuser just indexes the windows one at a time (see WindowFocuser).
+# Importing it is slow, so this module is only ever imported for desktops with enough windows to make up for that.
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class WorkspaceIndex(NamedTuple):
+    """The same indices of the current workspace's windows that the focuser builds (see WindowFocuser)."""
+    # The windows that the indices were built from, so that they can be told apart from newer windows
+    windows: Sequence[Window]
+    current_workspace_windows: List[Window]
+    windows_by_monitor_index: Dict[int, List[int]]
+    monitors_by_window_index: Dict[int, int]
+
+
+def is_available() -> bool:
+    return numpy is not None
+
+
+class WindowTable:
+    """
+    The windows of a snapshot as columns (i.e. a struct of arrays), so that whole snapshots can be indexed with
+    vectorized operations instead of a Python loop over every window.
+
+    Workspace membership is a mask over the offsets, the monitor of every window is found by searching the monitor
+    topology's boundaries for all of the windows at once (see get_monitor_indices), and the left-to-right order
+    is a single (stable) argsort of the x offsets.
+    """
+
+    def __init__(self, windows: Sequence[Window]) -> None:
+        if numpy is None:
+            raise RuntimeError("The window table needs NumPy")
+
+        count = len(windows)
+
+        self.windows = windows
+        self.ids = numpy.fromiter(map(attrgetter("id"), windows), dtype=numpy.int64, count=count)
+        self.x_offsets = numpy.fromiter(map(attrgetter("x_offset"), windows), dtype=numpy.int64, count=count)
+        self.y_offsets = numpy.fromiter(map(attrgetter("y_offset"), windows), dtype=numpy.int64, count=count)
+
+    def index_current_workspace(
+        self, workspace_width: int, workspace_height: int, monitor_topology: MonitorTopology
+    ) -> WorkspaceIndex:
+        """Builds all of the focuser's indices of the windows in the current workspace at once."""
+        x_offsets = self.x_offsets
+        y_offsets = self.y_offsets
+
+        # Same as WindowFocuser._is_in_current_workspace
+        in_current_workspace = numpy.flatnonzero(
+            (x_offsets >= 0) & (x_offsets < workspace_width) & (y_offsets >= 0) & (y_offsets < workspace_height)
+        )
+
+        # Left to right; stable, so that windows at the same x offset keep their order (like sorted does)
+        rows = in_current_workspace[numpy.argsort(x_offsets[in_current_workspace], kind="stable")]
+
+        ids = self.ids[rows]
+        monitor_indices = get_monitor_indices(
+            monitor_topology, x_offsets[rows], y_offsets[rows] - WINDOW_DECORATION
+        )
+
+        # Monitors in the order that their first (i.e. leftmost) window comes up, like the focuser's own index;
+        # there are only ever a few monitors, so a mask per monitor is cheap
+        unique_monitor_indices, first_rows = numpy.unique(monitor_indices, return_index=True)
+
+        windows_by_monitor_index = {
+            monitor_index: ids[monitor_indices == monitor_index].tolist()
+            for monitor_index in unique_monitor_indices[numpy.argsort(first_rows)].tolist()
+        }  # type: Dict[int, List[int]]
+
+        return WorkspaceIndex(
+            self.windows,
+            list(map(self.windows.__getitem__, rows.tolist())),
+            windows_by_monitor_index,
+            dict(zip(ids.tolist(), monitor_indices.tolist()))
+        )
+
+
+def get_monitor_indices(
+    monitor_topology: MonitorTopology, x: "numpy.ndarray", y: "numpy.ndarray"
+) -> "numpy.ndarray":
+    """
+    Vectorized MonitorTopology.get_monitor_index: finds the slab of every point with a single searchsorted over the
+    slab boundaries, then its monitor by counting the top edges of the slab's monitors that are above it.
+    """
+    slab_boundaries = numpy.asarray(monitor_topology.slab_boundaries)
+    slab_count = len(slab_boundaries)
+    max_monitors_per_slab = max(len(top_edges) for top_edges in monitor_topology.slab_top_edges)
+
+    # Padded out to the same number of monitors per slab; the padding's edges are below everything
+    top_edges = numpy.full((slab_count, max_monitors_per_slab), numpy.iinfo(numpy.int64).max, dtype=numpy.int64)
+    monitor_indices = numpy.zeros((slab_count, max_monitors_per_slab), dtype=numpy.int64)
+
+    for slab, (slab_top_edges, slab_monitor_indices) in enumerate(
+        zip(monitor_topology.slab_top_edges, monitor_topology.slab_monitor_indices)
+    ):
+        top_edges[slab, :len(slab_top_edges)] = slab_top_edges
+        monitor_indices[slab, :len(slab_monitor_indices)] = slab_monitor_indices
+
+    slabs = numpy.maximum(
+        numpy.searchsorted(slab_boundaries, x + monitor_topology.x_offset, side="right") - 1, 0
+    )
+    rows = numpy.maximum(
+        (top_edges[slabs] <= (y + monitor_topology.y_offset)[:, None]).sum(axis=1) - 1, 0
+    )
+
+    return monitor_indices[slabs, rows]
+
+
+def index_current_workspace(
+    windows: Sequence[Window], workspace_width: int, workspace_height: int, monitor_topology: MonitorTopology
+) -> Optional[WorkspaceIndex]:
+    """Indexes the windows with a WindowTable, or returns None if NumPy isn't installed."""
+    if not is_available():
+        return None
+
+    return WindowTable(windows).index_current_workspace(workspace_width, workspace_height, monitor_topology)
@@ -0,0 +1,221 @@
+import logging
+import select
+import struct
+import threading
+from typing import List, Optional, Set
+from easywindowswitcher.external_services import wmctrl, xconnection
+from easywindowswitcher.external_services.x11 import X11
+from easywindowswitcher.services.window_index import LiveWindowIndex
+from easywindowswitcher.utils.window_rules import get_window_filter
+
+logger = logging.getLogger(__name__)
+
+# Even if no events seem to have been missed, rebuild the whole index from scratch every so often (in seconds)
+# as a safety net, since the index is only as correct as the events it has seen.
+RESYNC_INTERVAL = 60
+
+# How long to wait before reconnecting after the connection to the X server is lost (in seconds)
+RECONNECT_DELAY = 1
+
+ROOT_EVENT_MASK = xconnection.EVENT_MASK_PROPERTY_CHANGE
+CLIENT_EVENT_MASK = xconnection.EVENT_MASK_STRUCTURE_NOTIFY | xconnection.EVENT_MASK_PROPERTY_CHANGE
+
+# Root window properties whose change affects every window's position, so they need a full resync
+RESYNC_PROPERTIES = ("_NET_CURRENT_DESKTOP", "_NET_DESKTOP_GEOMETRY", "_NET_DESKTOP_VIEWPORT")
+
+# Client window properties that affect what the window looks like to the index
+WINDOW_PROPERTIES = ("WM_CLASS", "WM_NAME", "_NET_WM_NAME")
+
+# Events about a client window that can change its geometry
+GEOMETRY_EVENTS = (
+    xconnection.EVENT_CONFIGURE_NOTIFY,
+    xconnection.EVENT_MAP_NOTIFY,
+    xconnection.EVENT_UNMAP_NOTIFY,
+)
+
+
+class WindowWatcher:
+    """
+    Keeps a LiveWindowIndex up to date by listening to X events on a background thread.
+
+    Whenever a window is mapped, unmapped, moved, resized, or renamed, only that window is re-queried
+    and updated in the index. The whole index is only rebuilt when the viewport/desktop changes,
+    when the connection to the X server had to be re-established, or periodically as a safety net.
+    """
+
+    def __init__(self, index: LiveWindowIndex, display: Optional[str] = None) -> None:
+        """
+        :param index: The index to keep up to date.
+        :param display: The X display to watch; defaults to the DISPLAY environment variable.
+        """
+        self.index = index
+        self.display = display
+
+        # The watcher gets its own connection, since connections can't be shared between threads
+        self.backend = None  # type: Optional[X11]
+        self.client_window_ids = set()  # type: Set[int]
+
+        self._stopping = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="window-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+        if self._thread:
+            self._thread.join()
+
+    def is_healthy(self) -> bool:
+        """Whether the index can currently be trusted to answer commands."""
+        return bool(self._thread and self._thread.is_alive() and self.index.is_synced)
+
+    def connect(self, backend: Optional[X11] = None) -> None:
+        self.backend = backend or X11(display=self.display)
+        self.backend.select_events([self.backend.connection.root], ROOT_EVENT_MASK)
+
+        self.resync()
+
+    def resync(self) -> None:
+        backend = self._get_backend()
+
+        # Subscribe to the clients before querying them, so that no change can slip in between the two
+        self.client_window_ids = set(backend.get_client_window_ids())
+        backend.select_events(list(self.client_window_ids), CLIENT_EVENT_MASK)
+
+        workspace_grid, current_workspace = backend.get_workspace_config()
+
+        self.index.resync(
+            workspace_grid,
+            current_workspace,
+            backend.get_windows_config(),
+            backend.get_current_focused_window_id()
+        )
+
+        logger.debug("Resynced the window index")
+
+    def handle_events(self, events: List[bytes]) -> None:
+        """Applies a batch of events to the index, re-querying each affected window only once."""
+        backend = self._get_backend()
+        atoms = backend.atoms
+        root = backend.connection.root
+
+        changed_window_ids = set()  # type: Set[int]
+        needs_resync = False
+        needs_client_list = False
+        needs_focus = False
+
+        for event in events:
+            event_code = event[0] & 0x7f
+
+            if event_code == xconnection.EVENT_PROPERTY_NOTIFY:
+                window_id, atom = struct.unpack_from("<II", event, 4)
+
+                if window_id == root:
+                    needs_resync |= atom in (atoms[name] for name in RESYNC_PROPERTIES)
+                    needs_client_list |= atom == atoms["_NET_CLIENT_LIST"]
+                    needs_focus |= atom == atoms["_NET_ACTIVE_WINDOW"]
+                elif atom in (atoms[name] for name in WINDOW_PROPERTIES):
+                    changed_window_ids.add(window_id)
+            elif event_code == xconnection.EVENT_DESTROY_NOTIFY:
+                window_id, = struct.unpack_from("<I", event, 8)
+                self._remove_windows({window_id})
+            elif event_code in GEOMETRY_EVENTS:
+                window_id, = struct.unpack_from("<I", event, 8)
+                changed_window_ids.add(window_id)
+
+        if needs_resync:
+            return self.resync()
+
+        if needs_client_list:
+            changed_window_ids |= self._update_client_list()
+
+        self._update_windows(changed_window_ids & self.client_window_ids)
+
+        if needs_focus:
+            self.index.set_focused_window(backend.get_current_focused_window_id())
+
+    def _get_backend(self) -> X11:
+        if self.backend is None:
+            raise RuntimeError("The watcher isn't connected to an X server")
+
+        return self.backend
+
+    def _update_client_list(self) -> Set[int]:
+        """Diffs the client list against the last one seen, returning the IDs of any new windows."""
+        backend = self._get_backend()
+        client_window_ids = set(backend.get_client_window_ids())
+
+        new_window_ids = client_window_ids - self.client_window_ids
+        self._remove_windows(self.client_window_ids - client_window_ids)
+
+        backend.select_events(list(new_window_ids), CLIENT_EVENT_MASK)
+        self.client_window_ids = client_window_ids
+
+        return new_window_ids
+
+    def _update_windows(self, window_ids: Set[int]) -> None:
+        if not window_ids:
+            return
+
+        backend = self._get_backend()
+        windows = backend.get_windows(list(window_ids))
+        backend.connection.discard_errors()
+
+        window_filter = get_window_filter()
+
+        for window in windows:
+            if wmctrl.is_navigable_window(window, window_filter):
+                self.index.update_window(window)
+            else:
+                self.index.remove_window(window.id)
+
+        # Windows that couldn't be queried have been closed in the meantime
+        self._remove_windows(window_ids - {window.id for window in windows})
+
+    def _remove_windows(self, window_ids: Set[int]) -> None:
+        for window_id in window_ids:
+            self.index.remove_window(window_id)
+
+        self.client_window_ids -= window_ids
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if self.backend is None:
+                    self.connect()
+
+                self._watch()
+            except (OSError, ConnectionError, xconnection.XError) as e:
+                # Any events that happened while disconnected are lost, so the index can't be trusted anymore
+                logger.debug("Lost the connection to the X server: %s", e)
+                self.index.mark_out_of_sync()
+
+                if self.backend:
+                    self.backend.close()
+                    self.backend = None
+
+                self._stopping.wait(RECONNECT_DELAY)
+
+    def _watch(self) -> None:
+        connection = self._get_backend().connection
+        idle_time = 0.0
+
+        while not self._stopping.is_set():
+            # Wake up regularly to check whether the watcher is being stopped
+            readable, _, _ = select.select([connection], [], [], 1)
+
+            if readable or connection.has_pending_events():
+                self.handle_events(connection.poll_events())
+                idle_time = 0
+            else:
+                idle_time += 1
+
+            if idle_time >= RESYNC_INTERVAL or not self.index.is_synced:
+                self.resync()
+                idle_time = 0
+
+            # Don't leave rebuilding whatever the changes threw out to the next command
+            self.index.warm_up()
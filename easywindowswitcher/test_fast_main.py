@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher import fast_main
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestFastMain(CustomTestCase):
+    def test_parsing_hot_commands(self):
+        self.assertEqual(fast_main.parse_hot_command(["monitor", "2"]), ("monitor", "2", None, False, None, False))
+        self.assertEqual(
+            fast_main.parse_hot_command(["--backend", "x11", "direction", "left"]),
+            ("direction", "left", "x11", False, None, False)
+        )
+        self.assertEqual(
+            fast_main.parse_hot_command(["--profile-trace=t.json", "--backend=wmctrl", "--profile", "direction", "up"]),
+            ("direction", "up", "wmctrl", True, "t.json", False)
+        )
+        self.assertEqual(
+            fast_main.parse_hot_command(["--across-workspaces", "direction", "right"]),
+            ("direction", "right", None, False, None, True)
+        )
+        self.assertEqual(fast_main.parse_hot_command(["back"]), ("mru", "1", None, False, None, False))
+        self.assertEqual(fast_main.parse_hot_command(["mru", "3"]), ("mru", "3", None, False, None, False))
+
+    def test_everything_else_goes_to_the_full_cli(self):
+        for args in [
+            [], ["--help"], ["--version"], ["direction", "--help"], ["monitor", "two"], ["monitor", "-1"],
+            ["--backend", "nope", "direction", "left"], ["--backend"], ["serve"], ["direction", "left", "right"],
+            ["--profile=yes", "direction", "left"], ["--profile", "--profile", "direction", "left"],
+            ["mru", "0"], ["back", "1"], ["--across-workspaces=yes", "direction", "left"],
+        ]:
+            self.assertIsNone(fast_main.parse_hot_command(args), args)
+
+    def test_root_options_match_the_root_command(self):
+        from easywindowswitcher.commands.root import root
+
+        # Eager options (i.e. --version) do their thing and exit, so they're always left to the full CLI
+        self.assertEqual(
+            fast_main.ROOT_OPTIONS,
+            {option: not param.is_flag for param in root.params if not param.is_eager for option in param.opts}
+        )
+
+    def test_hot_path_does_not_import_deferred_modules(self):
+        code = "import sys; import {}; print(' '.join(m for m in {!r} if m in sys.modules))".format(
+            ", ".join(fast_main.HOT_PATH_MODULES), fast_main.DEFERRED_MODULES
+        )
+
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=REPO_FOLDER)
+
+        self.assertEqual(output.decode("utf8").strip(), "")
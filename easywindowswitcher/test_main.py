@@ -1,6 +1,12 @@
 from click.testing import CliRunner
 from utils.helpers_test import CustomTestCase
 from easywindowswitcher import main
+from easywindowswitcher.commands import root
+
+
+class UnusableBackend:
+    def __getattr__(self, name):
+        raise AssertionError("The backend shouldn't have been used")
 
 
 class TestCli(CustomTestCase):
@@ -11,3 +17,14 @@ class TestCli(CustomTestCase):
     def test_short_help_option_enabled(self):
         result = self.runner.invoke(self.cli, ["-h"])
         self.assert_result_ok(result)
+
+    def test_help_and_version_dont_query_windows(self):
+        backend = root.window_focuser_service.backend
+        root.window_focuser_service.backend = UnusableBackend()
+
+        try:
+            self.assert_result_ok(self.runner.invoke(self.cli, ["--help"]))
+            self.assert_result_ok(self.runner.invoke(self.cli, ["--version"]))
+            self.assert_result_ok(self.runner.invoke(self.cli, ["direction", "--help"]))
+        finally:
+            root.window_focuser_service.backend = backend
@@ -0,0 +1,248 @@
+import logging
+import os
+import queue
+import select
+import shlex
+import subprocess
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Every session is a shell that runs one command at a time, read from its stdin
+SHELL = "/bin/sh"
+
+# How many sessions can run commands at the same time (e.g. the queries of a snapshot; see run_concurrently)
+DEFAULT_POOL_SIZE = 3
+
+# How long (in seconds) a command can take before its session is killed (and replaced)
+DEFAULT_TIMEOUT = 5.0
+
+# How the command's stderr is redirected in the shell, by the STDERR_OPTIONS of service_helpers
+STDERR_REDIRECTS = {
+    "STDERR_INTO_OUTPUT": "2>&1",
+    "STDERR_SUPPRESS": "2>/dev/null",
+    "STDERR_DISPLAY": "",
+}
+
+
+class CommandTimeout(Exception):
+    """Raised when a command doesn't finish within its timeout."""
+    pass
+
+
+class CommandResult(NamedTuple):
+    exit_code: int
+    output: bytes
+
+
+class ShellSession:
+    """
+    A long-lived shell that commands are sent to over its stdin, instead of starting a new process for each of them.
+
+    Every command is followed by printing a marker (unique to the session) and the command's exit code,
+    which frames the command's output on stdout; reading up to the marker gets exactly that command's result.
+
+    A command can also be sent without waiting for it (e.g. focusing a window); its result is then read (and thrown
+    away) right before the next command is sent, which also keeps the commands in order.
+    """
+
+    def __init__(self) -> None:
+        self.marker = "__easywindowswitcher_{}__".format(os.urandom(8).hex()).encode("ascii")
+
+        self.process = subprocess.Popen(
+            [SHELL], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=None, start_new_session=True
+        )
+
+        self.unacknowledged_commands = 0
+        self._buffer = b""
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, command: str, timeout: float, wait: bool = True) -> Optional[CommandResult]:
+        """
+        Runs a (shell formatted) command.
+
+        :param wait: Whether to wait for the command to finish; if not, None is returned right away.
+
+        :raises CommandTimeout: When the command (or a previous one that wasn't waited for) doesn't finish in time.
+        :raises OSError: When the session's shell died.
+        """
+        deadline = time.monotonic() + timeout
+
+        while self.unacknowledged_commands:
+            self._read_result(deadline)
+            self.unacknowledged_commands -= 1
+
+        # Commands can't read the session's stdin, since that's where the next commands come from
+        self._write("{} </dev/null; printf '\\n%s %d\\n' {} \"$?\"\n".format(
+            command, self.marker.decode("ascii")
+        ))
+
+        if not wait:
+            self.unacknowledged_commands += 1
+            return None
+
+        return self._read_result(deadline)
+
+    def close(self) -> None:
+        try:
+            if self.process.stdin:
+                self.process.stdin.close()
+
+            self.process.wait(timeout=0.5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self) -> None:
+        try:
+            # The shell's children (e.g. a hung command) are in its process group
+            os.killpg(self.process.pid, 9)
+        except OSError:
+            pass
+
+        self.process.wait()
+
+    def _write(self, data: str) -> None:
+        assert self.process.stdin is not None
+
+        self.process.stdin.write(data.encode("utf8"))
+        self.process.stdin.flush()
+
+    def _read_result(self, deadline: float) -> CommandResult:
+        assert self.process.stdout is not None
+
+        stdout = self.process.stdout.fileno()
+        separator = b"\n" + self.marker + b" "
+
+        while True:
+            marker_index = self._buffer.find(separator)
+
+            if marker_index != -1:
+                end_index = self._buffer.find(b"\n", marker_index + len(separator))
+
+                if end_index != -1:
+                    output = self._buffer[:marker_index]
+                    exit_code = int(self._buffer[marker_index + len(separator):end_index])
+                    self._buffer = self._buffer[end_index + 1:]
+
+                    return CommandResult(exit_code, output)
+
+            remaining_time = deadline - time.monotonic()
+
+            if remaining_time <= 0 or not select.select([stdout], [], [], remaining_time)[0]:
+                raise CommandTimeout()
+
+            chunk = os.read(stdout, 65536)
+
+            if not chunk:
+                raise BrokenPipeError("The session's shell exited")
+
+            self._buffer += chunk
+
+
+class CommandPool:
+    """
+    Runs commands in a pool of long-lived shell sessions (see ShellSession), so that a long-running process
+    (i.e. the daemon) doesn't pay for starting up a new process from Python for every query and action.
+
+    Sessions are started as they're needed, up to the size of the pool. A session whose shell died, or whose
+    command timed out, is thrown away, and the command is retried once on a fresh session.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.timeout = timeout
+
+        self._idle_sessions = queue.LifoQueue()  # type: queue.LifoQueue[Optional[ShellSession]]
+        self._sessions = []  # type: List[ShellSession]
+        self._lock = threading.Lock()
+
+        # Each slot is either an idle session or None (i.e. a session can be started for it)
+        for _ in range(size):
+            self._idle_sessions.put(None)
+
+    def run(
+        self,
+        command: List[str],
+        shell: bool = False,
+        stderr_redirect: str = "STDERR_SUPPRESS",
+        wait: bool = True,
+        env: Optional[Dict[str, str]] = None
+    ) -> Optional[CommandResult]:
+        """
+        Runs a command in one of the sessions, waiting for a session to be free if they're all busy.
+
+        :param command: The command to run.
+        :param shell: Whether the command is already formatted for the shell (i.e. shouldn't be quoted).
+        :param stderr_redirect: Where the command's stderr goes; one of the STDERR_OPTIONS of service_helpers.
+        :param wait: Whether to wait for the command to finish.
+        :param env: Environment variables to set for the command (for a shell command, only its first command).
+
+        :return: The command's exit code and output, or None if it wasn't waited for.
+
+        :raises CommandTimeout: When the command didn't finish within the pool's timeout.
+        """
+        # Grouped, so that the redirection applies to all of a shell command (e.g. a pipeline)
+        formatted_command = "{{ {}{}\n}} {}".format(
+            "".join("{}={} ".format(name, shlex.quote(value)) for name, value in (env or {}).items()),
+            " ".join(command) if shell else " ".join(shlex.quote(arg) for arg in command),
+            STDERR_REDIRECTS.get(stderr_redirect, "2>&1")
+        )
+
+        for attempt in range(2):
+            session = self._acquire()
+
+            try:
+                result = session.run(formatted_command, self.timeout, wait=wait)
+            except CommandTimeout:
+                logger.debug("Command timed out; restarting its session: %s", command)
+                self._discard(session)
+                raise
+            except (OSError, ValueError) as e:
+                logger.debug("Command session died (%s); restarting it: %s", e, command)
+                self._discard(session)
+                continue
+
+            self._release(session)
+
+            return result
+
+        raise BrokenPipeError("Couldn't run the command in a fresh session: {}".format(command))
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+
+        for session in sessions:
+            session.close()
+
+    def _acquire(self) -> ShellSession:
+        session = self._idle_sessions.get()
+
+        if session is not None and session.is_alive():
+            return session
+
+        if session is not None:
+            self._discard(session, release_slot=False)
+
+        session = ShellSession()
+
+        with self._lock:
+            self._sessions.append(session)
+
+        return session
+
+    def _release(self, session: ShellSession) -> None:
+        self._idle_sessions.put(session)
+
+    def _discard(self, session: ShellSession, release_slot: bool = True) -> None:
+        session.kill()
+
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+        if release_slot:
+            self._idle_sessions.put(None)
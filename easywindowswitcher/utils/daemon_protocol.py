@@ -0,0 +1,56 @@
+from typing import List, Optional, Sequence, Tuple
+
+# Note: This module is imported by the thin client, so it must stay free of any non-trivial imports.
+#
+# The protocol between the client and the daemon is intentionally tiny: a request is the command line arguments
+# joined by tabs and terminated by a newline (e.g. "direction\tright\n"), and a response is a status word
+# optionally followed by a tab and a message (e.g. "ok\n" or "error\tInvalid monitor index\n").
+#
+# A request can also name the X display it's for, as a leading field (e.g. "@display=:1\tdirection\tright\n"),
+# so that a daemon serving many displays (see services/display_router.py) knows where to route it.
+
+ARGUMENT_SEPARATOR = "\t"
+MESSAGE_TERMINATOR = "\n"
+
+# No command starts with an "@", so the display field can't be mistaken for one
+DISPLAY_FIELD_PREFIX = "@display="
+
+# The request was handled by the daemon.
+RESPONSE_OK = "ok"
+
+# The request was understood by the daemon, but failed.
+RESPONSE_ERROR = "error"
+
+# The daemon doesn't handle this request; the client should run it in-process instead (e.g. "--help").
+RESPONSE_UNSUPPORTED = "unsupported"
+
+
+def encode_request(args: Sequence[str], display: Optional[str] = None) -> bytes:
+    fields = ([DISPLAY_FIELD_PREFIX + display] if display else []) + list(args)
+    return (ARGUMENT_SEPARATOR.join(fields) + MESSAGE_TERMINATOR).encode("utf8")
+
+
+def decode_request(data: bytes) -> List[str]:
+    """Decodes just the args of a request, ignoring the display that it's for (if any)."""
+    return decode_routed_request(data)[1]
+
+
+def decode_routed_request(data: bytes) -> Tuple[Optional[str], List[str]]:
+    """Decodes a request into the display that it's for (None if it doesn't say) and its args."""
+    line = data.decode("utf8").rstrip(MESSAGE_TERMINATOR)
+    fields = line.split(ARGUMENT_SEPARATOR) if line else []
+
+    if fields and fields[0].startswith(DISPLAY_FIELD_PREFIX):
+        return (fields[0][len(DISPLAY_FIELD_PREFIX):], fields[1:])
+
+    return (None, fields)
+
+
+def encode_response(status: str, message: str = "") -> bytes:
+    response = status if not message else ARGUMENT_SEPARATOR.join([status, message])
+    return (response + MESSAGE_TERMINATOR).encode("utf8")
+
+
+def decode_response(data: bytes) -> Tuple[str, str]:
+    status, _, message = data.decode("utf8").rstrip(MESSAGE_TERMINATOR).partition(ARGUMENT_SEPARATOR)
+    return (status, message)
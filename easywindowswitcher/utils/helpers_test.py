@@ -1,4 +1,9 @@
+import threading
 from unittest import TestCase
+from easywindowswitcher.data_models import MonitorTopology, Window, Workspace, WorkspaceGrid
+from easywindowswitcher.data_models.monitor_topology import DEFAULT_MONITORS
+from easywindowswitcher.services.focus_history import FocusHistory
+from easywindowswitcher.services.window_focuser import WindowFocuser
 
 
 class CustomTestCase(TestCase):
@@ -7,3 +12,74 @@ class CustomTestCase(TestCase):
 
     def assert_result_bad(self, result):
         self.assertEqual(result.exit_code, 1)
+
+
+class FakeBackend:
+    """
+    A backend with a fixed snapshot of the desktop (the default workspace grid, with the first workspace current),
+    that keeps track of what was queried and which windows were focused.
+    """
+
+    CONCURRENT_QUERIES = False
+
+    def __init__(self, windows, focused_window_id, concurrent_queries=False):
+        """
+        :param windows: The windows; None if they should never be queried (e.g. because they come from a snapshot).
+        :param concurrent_queries: Whether the queries have to run concurrently; every query then waits on the others,
+            so a snapshot only succeeds if all of its queries run at once.
+        """
+        self.windows = windows
+        self.focused_window_id = focused_window_id
+        self.workspace = Workspace(width=0, height=0)
+        self.snapshot_token = 1
+
+        self.queries = []
+        self.focused_windows = []
+
+        self.CONCURRENT_QUERIES = concurrent_queries
+        self.barrier = threading.Barrier(3, timeout=5) if concurrent_queries else None
+
+    def get_workspace_config(self):
+        self._query("workspace_config")
+        return (WorkspaceGrid(width=20400, height=7680), self.workspace)
+
+    def get_windows_config(self):
+        self._query("windows")
+
+        if self.windows is None:
+            raise AssertionError("The windows should've come from the snapshot")
+
+        return self.windows
+
+    def get_current_focused_window_id(self):
+        self._query("focused_window_id")
+        return self.focused_window_id
+
+    def get_snapshot_token(self):
+        return self.snapshot_token
+
+    def focus_window_by_id(self, window_id):
+        self.focused_windows.append(window_id)
+
+    def _query(self, name):
+        self.queries.append(name)
+
+        if self.barrier:
+            self.barrier.wait()
+
+
+def make_window(id, x_offset=0, y_offset=24, width=800, height=600, window_class="a.A", title=""):
+    """A (decorated) window; by default, a regular sized one in the top left corner of the first monitor."""
+    return Window(
+        id=id, x_offset=x_offset, y_offset=y_offset, width=width, height=height, window_class=window_class, title=title
+    )
+
+
+def make_focuser(backend=None, **kwargs):
+    """A focuser for the default monitors, with a fresh focus history; kwargs are passed on to WindowFocuser."""
+    return WindowFocuser(
+        backend=backend if backend is not None else object(),
+        monitor_topology=MonitorTopology(DEFAULT_MONITORS),
+        focus_history=FocusHistory(),
+        **kwargs
+    )
@@ -1,24 +1,115 @@
 import logging
 import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from typing import Optional  # noqa
+from easywindowswitcher.utils.paths import PROJECT_NAME, get_project_folder
 
 
 LOG_MAX_SIZE = 512000  # 500KB
 LOG_BACKUP_COUNT = 2
-PROJECT_NAME = "easywindowswitcher"
+
+# What gets written to the log file; e.g. DEBUG to see every command that's run and its output.
+LOG_LEVEL_ENVIRONMENT_VARIABLE = "EASYWINDOWSWITCHER_LOG_LEVEL"
+
+# Only messages that are meant for the user by default, so that the hot path doesn't even build the debug messages
+DEFAULT_LOG_LEVEL = logging.INFO
+
+# How long an exiting process waits for the last of its log records to be written (in seconds)
+LOG_DRAIN_TIMEOUT = 0.5
+
+
+class BackgroundFileHandler(logging.Handler):
+    """
+    Hands log records off to a background thread that formats them and writes them to the (rotating) log file.
+
+    That way, logging never waits on the disk (or on a rotation), and neither importing logging.handlers
+    nor opening the log file gets in the way of switching windows. The thread is only started once
+    there's something to write.
+
+    If the log file can't be opened (e.g. the home folder is read-only or full), the handler gives up and
+    drops every record from then on, rather than queueing them up for the rest of a long-lived process.
+    """
+
+    def __init__(self, log_file: str, level: int = logging.NOTSET) -> None:
+        super().__init__(level)
+
+        self.log_file = log_file
+        self.records = queue.SimpleQueue()  # type: queue.SimpleQueue[Optional[logging.LogRecord]]
+        self.thread = None  # type: Optional[threading.Thread]
+        self.failed = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.failed:
+            return
+
+        # Note: emit() is always called with the handler's lock held, so only one thread can be started
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._write_records, name="log-writer", daemon=True)
+            self.thread.start()
+
+        self.records.put(record)
+
+    def close(self) -> None:
+        # Give the thread a moment to write out what's left, but don't hold up the process exiting on it
+        if self.thread is not None and not self.failed:
+            self.records.put(None)
+            self.thread.join(LOG_DRAIN_TIMEOUT)
+
+        super().close()
+
+    def _write_records(self) -> None:
+        from logging.handlers import RotatingFileHandler
+
+        try:
+            file_handler = RotatingFileHandler(self.log_file, maxBytes=LOG_MAX_SIZE, backupCount=LOG_BACKUP_COUNT)
+        except OSError as e:
+            self.failed = True
+            sys.stderr.write("Couldn't open the log file, so nothing will be logged to it: {}\n".format(e))
+
+            # Let go of whatever was queued up before (or while) giving up
+            while True:
+                try:
+                    self.records.get_nowait()
+                except queue.Empty:
+                    return
+
+        file_handler.setFormatter(self.formatter)
+
+        try:
+            while True:
+                record = self.records.get()
+
+                if record is None:
+                    break
+
+                file_handler.handle(record)
+        finally:
+            file_handler.close()
+
+
+def get_log_level() -> int:
+    """The level of the log file, from the environment; falls back to DEFAULT_LOG_LEVEL if it's unset or invalid."""
+    level_name = os.environ.get(LOG_LEVEL_ENVIRONMENT_VARIABLE, "").upper()
+    level = logging.getLevelName(level_name) if level_name else DEFAULT_LOG_LEVEL
+
+    return level if isinstance(level, int) else DEFAULT_LOG_LEVEL
 
 
 def create_logger() -> logging.Logger:
-    log_folder = os.path.join(os.path.expanduser("~"), ".{}".format(PROJECT_NAME))
+    log_folder = get_project_folder()
     log_file = os.path.join(log_folder, "{}.log".format(PROJECT_NAME))
+    log_level = get_log_level()
 
     # Disable creating the log directory if running in a test
     if not hasattr(sys, "_called_from_test") and not os.path.exists(log_folder):  # pragma: no cover
         os.makedirs(log_folder)
 
     logger = logging.getLogger("")  # Put the logger at the root so that all sub modules can access it
-    logger.setLevel(logging.DEBUG)
+
+    # Messages that no handler would emit are dropped before they are even formatted
+    logger.setLevel(min(log_level, logging.INFO))
 
     console_formatter = logging.Formatter("%(message)s")
 
@@ -32,8 +123,8 @@ def create_logger() -> logging.Logger:
     if not hasattr(sys, "_called_from_test"):  # pragma: no cover
         file_formatter = logging.Formatter("[%(levelname)s] (%(asctime)s) %(name)s (%(lineno)s) - %(message)s")
 
-        file_handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_SIZE, backupCount=LOG_BACKUP_COUNT)
-        file_handler.setLevel(logging.DEBUG)
+        file_handler = BackgroundFileHandler(log_file)
+        file_handler.setLevel(log_level)
         file_handler.setFormatter(file_formatter)
 
         logger.addHandler(file_handler)
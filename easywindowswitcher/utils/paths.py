@@ -0,0 +1,64 @@
+import os
+from typing import Optional
+
+# Note: This module is imported by the thin client, so it should only ever depend on the standard library's `os`.
+
+PROJECT_NAME = "easywindowswitcher"
+
+
+def get_project_folder() -> str:
+    """Gets the folder where all of the persistent files (logs, sockets, caches, etc) are stored."""
+    return os.path.join(os.path.expanduser("~"), ".{}".format(PROJECT_NAME))
+
+
+def get_socket_path(display: Optional[str] = None) -> str:
+    """
+    Gets the path of the Unix socket that the daemon listens on.
+
+    Each X display gets its own socket so that multiple sessions for the same user don't step on each other.
+
+    :param display: The X display (e.g. ":0"); defaults to the DISPLAY environment variable.
+    """
+    return os.path.join(get_project_folder(), "{}{}.sock".format(PROJECT_NAME, _get_display_suffix(display)))
+
+
+def get_shared_socket_path() -> str:
+    """
+    Gets the path of the Unix socket that a daemon serving all of the user's X displays listens on
+    (see `easywindowswitcher serve --all-displays`).
+
+    Display suffixes never contain a dash, so this can't collide with any display's own socket.
+    """
+    return os.path.join(get_project_folder(), "{}-all-displays.sock".format(PROJECT_NAME))
+
+
+def get_focus_history_path(display: Optional[str] = None) -> str:
+    """
+    Gets the path of the file that the focus history is stored in.
+
+    Window IDs are only meaningful to the X display that they came from, so each display gets its own history.
+
+    :param display: The X display (e.g. ":0"); defaults to the DISPLAY environment variable.
+    """
+    return os.path.join(get_project_folder(), "focus_history{}.bin".format(_get_display_suffix(display)))
+
+
+def get_snapshot_path(display: Optional[str] = None) -> str:
+    """
+    Gets the path of the file that snapshots of the desktop are shared through (see services/snapshot_cache.py).
+
+    :param display: The X display (e.g. ":0"); defaults to the DISPLAY environment variable.
+    """
+    return os.path.join(get_project_folder(), "snapshot{}.bin".format(_get_display_suffix(display)))
+
+
+def get_window_rules_path() -> str:
+    """Gets the path of the file with the rules for which windows can be navigated to (see utils/window_rules.py)."""
+    return os.path.join(get_project_folder(), "window_rules.json")
+
+
+def _get_display_suffix(display: Optional[str]) -> str:
+    display = display if display is not None else os.environ.get("DISPLAY", "")
+
+    # Colons and slashes (e.g. 'localhost:10.0' or '/tmp/launch-xyz/org.xquartz:0') don't belong in file names
+    return display.replace(":", "_").replace("/", "_")
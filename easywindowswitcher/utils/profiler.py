@@ -0,0 +1,272 @@
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import IO, Any, Dict, Optional
+from typing import Deque, List  # noqa
+
+# Note: This module is imported by everything on the hot path, so it must stay cheap to import (and to use while
+# profiling is disabled); anything only needed for the output (e.g. json) is imported where it's used.
+#
+# Spans are timed phases of the work (e.g. a subprocess, parsing, building an index). They are emitted as
+# JSON lines (one per span) and, optionally, as a Chrome trace-event file that can be loaded into
+# chrome://tracing or https://ui.perfetto.dev to see how the phases nest and overlap across threads.
+
+# The categories of spans
+CATEGORY_COMMAND = "command"
+CATEGORY_PHASE = "phase"
+CATEGORY_SUBPROCESS = "subprocess"
+CATEGORY_STARTUP = "startup"
+
+# How many spans are kept around for the trace file, so that a long-lived process doesn't grow without bound
+MAX_TRACE_SPANS = 100000
+
+# How many of the most recent latencies each histogram keeps
+HISTOGRAM_SIZE = 1000
+
+PERCENTILES = (50, 95, 99)
+
+_profiler = None  # type: Optional[Profiler]
+
+
+class Span:
+    """A timed phase; use it as a context manager (see span())."""
+
+    __slots__ = ("profiler", "name", "category", "args", "start", "end", "thread_id")
+
+    def __init__(self, profiler: "Profiler", name: str, category: str, args: Dict[str, Any]) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+        self.end = 0.0
+        self.thread_id = 0
+
+    def __enter__(self) -> "Span":
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.end = time.perf_counter()
+        self.profiler.add_span(self)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class NullSpan:
+    """What span() returns while profiling is disabled; does nothing, as quickly as possible."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Profiler:
+    """
+    Collects spans, writing them out as JSON lines whenever it's flushed
+    and keeping them around for the trace file until it's finished.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, trace_path: Optional[str] = None) -> None:
+        """
+        :param stream: Where to write the JSON lines; defaults to stderr.
+        :param trace_path: Where to write the Chrome trace-event file when the profiler is finished, if anywhere.
+        """
+        self.stream = stream or sys.stderr
+        self.trace_path = trace_path
+
+        # Spans are reported relative to when profiling started
+        self.origin = time.perf_counter()
+        self.origin_wall_time = time.time()
+
+        self.pending_spans = []  # type: List[Span]
+        self.trace_spans = deque(maxlen=MAX_TRACE_SPANS)  # type: Deque[Span]
+
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self.pending_spans.append(span)
+
+    def add_startup_span(self) -> None:
+        """Adds a span for the time between the process starting and profiling starting (e.g. interpreter start)."""
+        process_start_time = get_process_start_time()
+
+        if process_start_time is None:
+            return
+
+        span = Span(self, "startup", CATEGORY_STARTUP, {})
+        span.thread_id = threading.get_ident()
+        span.start = self.origin - max(self.origin_wall_time - process_start_time, 0)
+        span.end = self.origin
+
+        self.add_span(span)
+
+    def flush(self) -> None:
+        """Writes out the JSON lines of every span that ended since the last flush."""
+        import json
+
+        with self._lock:
+            spans, self.pending_spans = self.pending_spans, []
+
+        for span in sorted(spans, key=lambda span: span.start):
+            self.stream.write(json.dumps({
+                "name": span.name,
+                "category": span.category,
+                "start_ms": round((span.start - self.origin) * 1000, 3),
+                "duration_ms": round(span.duration * 1000, 3),
+                "thread": span.thread_id,
+                "args": span.args,
+            }) + "\n")
+
+        self.stream.flush()
+
+        if self.trace_path:
+            self.trace_spans.extend(spans)
+
+    def finish(self) -> None:
+        self.flush()
+
+        if self.trace_path:
+            self.write_trace(self.trace_path)
+
+    def write_trace(self, trace_path: str) -> None:
+        """Writes the spans as a Chrome trace-event file (complete events, with microsecond timestamps)."""
+        import json
+
+        # Trace viewers don't like negative timestamps, which the startup span would otherwise have
+        origin = min([span.start for span in self.trace_spans] + [self.origin])
+
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": span.thread_id,
+                "args": span.args,
+            }
+            for span in self.trace_spans
+        ]
+
+        with open(trace_path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+
+class LatencyHistogram:
+    """Keeps the most recent latencies of something, for reporting their percentiles."""
+
+    def __init__(self, size: int = HISTOGRAM_SIZE) -> None:
+        self.latencies = deque(maxlen=size)  # type: Deque[float]
+        self.count = 0
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.count += 1
+
+    def report(self) -> Dict[str, float]:
+        """The percentiles (in milliseconds) of the recent latencies, plus how many there have been in total."""
+        latencies = sorted(self.latencies)
+        report = {"count": float(self.count)}  # type: Dict[str, float]
+
+        for percentile in PERCENTILES:
+            # Nearest-rank percentile
+            index = max(math.ceil(percentile / 100 * len(latencies)) - 1, 0)
+            report["p{}_ms".format(percentile)] = round(latencies[index] * 1000, 3) if latencies else 0.0
+
+        return report
+
+
+class LatencyHistograms:
+    """Rolling latency histograms, per name (e.g. per command handled by a long-lived process)."""
+
+    def __init__(self) -> None:
+        self.histograms = {}  # type: Dict[str, LatencyHistogram]
+        self._lock = threading.Lock()
+
+    def record(self, name: str, latency: float) -> None:
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = LatencyHistogram()
+
+            self.histograms[name].record(latency)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: histogram.report() for name, histogram in sorted(self.histograms.items())}
+
+
+def enable(stream: Optional[IO[str]] = None, trace_path: Optional[str] = None) -> Profiler:
+    """Starts profiling (for the whole process)."""
+    global _profiler
+
+    _profiler = Profiler(stream, trace_path)
+    _profiler.add_startup_span()
+
+    return _profiler
+
+
+def finish() -> None:
+    """Stops profiling, writing out whatever hasn't been yet."""
+    global _profiler
+
+    if _profiler:
+        profiler, _profiler = _profiler, None
+        profiler.finish()
+
+
+def flush() -> None:
+    if _profiler:
+        _profiler.flush()
+
+
+def is_enabled() -> bool:
+    return _profiler is not None
+
+
+def span(name: str, category: str = CATEGORY_PHASE, **args: Any):
+    """
+    Times the enclosed block as a span, if profiling is enabled.
+
+    Example:
+
+        with profiler.span("parse_windows", windows=len(lines)):
+            ...
+    """
+    if _profiler is None:
+        return NULL_SPAN
+
+    return Span(_profiler, name, category, args)
+
+
+def get_process_start_time() -> Optional[float]:
+    """When this process started (as a Unix timestamp), if that can be determined (i.e. on Linux)."""
+    try:
+        with open("/proc/self/stat") as stat_file:
+            # The process name (in parentheses) can contain spaces, so only split what comes after it
+            start_ticks = int(stat_file.read().rpartition(")")[2].split()[19])
+
+        with open("/proc/uptime") as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+
+        boot_time = time.time() - uptime
+
+        return boot_time + (start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,77 @@
+import os
+import time
+from typing import Any, Dict, Iterator, List
+
+# Note: This module is imported by everything that runs commands, so it must stay cheap to import (and to use while
+# recording is disabled); json is only imported once something actually gets recorded.
+#
+# A trace is a JSON lines file of everything that an invocation saw of the desktop: its args, the raw output of every
+# command it ran (wmctrl, xdotool, xrandr), and the commands it issued (i.e. the focus changes). Every invocation
+# appends to the same file, so a trace of a whole session can be replayed later without an X session
+# (see benchmarks/replay.py).
+
+# The trace file to record to; nothing is recorded when it's unset
+RECORD_ENVIRONMENT_VARIABLE = "EASYWINDOWSWITCHER_RECORD"
+
+# The kinds of trace events
+EVENT_INVOCATION = "invocation"
+EVENT_OUTPUT = "output"
+EVENT_CALL = "call"
+EVENT_MONITOR_TOPOLOGY = "monitor_topology"
+
+
+def is_recording() -> bool:
+    return bool(os.environ.get(RECORD_ENVIRONMENT_VARIABLE))
+
+
+def record(event: str, **fields: Any) -> None:
+    """Appends an event (with whatever fields describe it) to the trace, if recording is enabled."""
+    path = os.environ.get(RECORD_ENVIRONMENT_VARIABLE)
+
+    if not path:
+        return
+
+    import json
+
+    fields.update(event=event, pid=os.getpid(), time=time.time())
+
+    try:
+        # Each event is a single appended write, so concurrent invocations don't interleave their lines
+        with open(path, "a") as trace_file:
+            trace_file.write(json.dumps(fields) + "\n")
+    except OSError:
+        # Recording is a debugging aid; it should never get in the way of actually switching windows
+        pass
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """Reads the events of a trace, skipping any lines that can't be parsed (e.g. from an interrupted write)."""
+    import json
+
+    with open(path) as trace_file:
+        for line in trace_file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def group_by_invocation(events: Iterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Groups the events of a trace by the invocation that recorded them.
+
+    :return: The invocations, in the order that they started; each one is its invocation event, plus the list of
+        the rest of its events (under "events").
+    """
+    invocations = []  # type: List[Dict[str, Any]]
+    current_invocations = {}  # type: Dict[int, Dict[str, Any]]
+
+    for event in events:
+        if event.get("event") == EVENT_INVOCATION:
+            invocation = dict(event, events=[])
+            invocations.append(invocation)
+            current_invocations[event.get("pid", 0)] = invocation
+        elif event.get("pid", 0) in current_invocations:
+            current_invocations[event.get("pid", 0)]["events"].append(event)
+
+    return invocations
@@ -1,8 +1,15 @@
 import logging
-import shlex
+import os
 import subprocess
-from typing import Callable, Dict, List, Sequence, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from easywindowswitcher.utils import profiler, recorder
 
+# Note: Anything that isn't needed to run a command (e.g. shlex, concurrent.futures) is imported where it's used,
+# since every invocation of the CLI imports this module and startup time is most of the time of a window switch.
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import ThreadPoolExecutor  # noqa
+    from easywindowswitcher.utils.command_pool import CommandResult
+    from easywindowswitcher.utils.command_pool import CommandPool  # noqa
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +29,18 @@ STDERR_OPTIONS = {
     STDERR_DISPLAY: None
 }
 
+# Shared between calls to run_concurrently, so that long-lived processes don't keep spinning up new threads
+_executor = None  # type: Optional[ThreadPoolExecutor]
+
+# While enabled (see enable_command_pool), commands are run in long-lived shells instead of new processes
+_command_pool = None  # type: Optional[CommandPool]
+
 
 def get_command_output(
     command: List[str],
     shell: bool = False,
-    stderr_redirect: str = STDERR_SUPPRESS
+    stderr_redirect: str = STDERR_SUPPRESS,
+    env: Optional[Dict[str, str]] = None
 ) -> str:
     """
     Runs a command and cleans the result for use elsewhere.
@@ -34,20 +48,39 @@ def get_command_output(
     :param command: The command to run
     :param shell: Whether or not to run the command with an actual shell interpreter
     :param stderr_redirect: How to redirect stderr; one of STDERR_OPTIONS
+    :param env: Environment variables to set for the command, on top of the current environment (e.g. DISPLAY)
 
     :return: The resulting output from the command being run.
     """
-    logger.debug("Get command output: {}".format(" ".join(command)))
+    output = _get_command_output(command, shell, stderr_redirect, env)
+
+    if recorder.is_recording():
+        recorder.record(recorder.EVENT_OUTPUT, command=command, output=output)
+
+    return output
+
+
+def _get_command_output(
+    command: List[str], shell: bool, stderr_redirect: str, env: Optional[Dict[str, str]]
+) -> str:
+    logger.debug("Get command output: %s", command)
 
     try:
         stderr_option = STDERR_OPTIONS.get(stderr_redirect, subprocess.STDOUT)
-        out = subprocess.check_output(_format_command(command, shell), stderr=stderr_option, shell=shell)
+
+        with profiler.span(command[0], profiler.CATEGORY_SUBPROCESS, command=command):
+            if _command_pool is not None:
+                out = _get_pooled_command_output(command, shell, stderr_redirect, env)
+            else:
+                out = subprocess.check_output(
+                    _format_command(command, shell), stderr=stderr_option, shell=shell, env=_get_environment(env)
+                )
 
         # out is a utf-8 encoded byte string that must be converted to a literal string for use
         # rstrip() takes off the seemingly always present \n that's at the end of the result
         # strip("'") removes the single quotes that surround the result
         cleaned_out = out.decode("utf8").rstrip().strip("'")
-        logger.debug("Command output: " + cleaned_out)
+        logger.debug("Command output: %s", cleaned_out)
 
         if cleaned_out == "null":  # Some of the docker commands like to return literal "null"
             return ""
@@ -55,43 +88,118 @@ def get_command_output(
             return cleaned_out
     except subprocess.CalledProcessError as e:  # Return code was 1 or some other error code
         logger.debug(
-            "Exception occured while trying to get command output: {}"
-            "\nCommand output: {}".format(str(e), e.output.decode("utf8").rstrip())
+            "Exception occured while trying to get command output: %s\nCommand output: %s",
+            e, _LazyDecodedOutput(e.output)
         )
         logger.debug("Stacktrace: ", exc_info=True)
 
         return ""
     except Exception as e:  # Who knows what else went wrong
-        logger.debug("Exception occured while trying to get command output: {}".format(str(e)))
+        logger.debug("Exception occured while trying to get command output: %s", e)
         logger.debug("Stacktrace: ", exc_info=True)
 
         return ""
 
 
-def call_command(command: List[str], shell: bool = False, **kwargs) -> bool:
+def call_command(
+    command: List[str], shell: bool = False, wait: bool = True, env: Optional[Dict[str, str]] = None, **kwargs
+) -> bool:
     """
     Logs a command, calls it, and then returns the exit code.
 
     :param command: The command (in list form) to call
     :param shell: Whether or not to run the command using a system shell
+    :param wait: Whether to wait for the command to finish; only commands run by the command pool (see
+        enable_command_pool) can be left running, in which case they're assumed to be successful
+    :param env: Environment variables to set for the command, on top of the current environment (e.g. DISPLAY)
     :param kwargs: Extra args to be passed to subprocess.call; see its docs for options
 
     :return: Whether or not the command was successful
     """
     log_command(command)
-    exit_code = subprocess.call(_format_command(command, shell), shell=shell, **kwargs)
-    logger.debug("Command exit code: {}".format(exit_code))
+
+    with profiler.span(command[0], profiler.CATEGORY_SUBPROCESS, command=command):
+        if _command_pool is not None and not kwargs:
+            exit_code = _call_pooled_command(command, shell, wait, env)
+        else:
+            exit_code = subprocess.call(
+                _format_command(command, shell), shell=shell, env=_get_environment(env), **kwargs
+            )
+
+    logger.debug("Command exit code: %s", exit_code)
+
+    if recorder.is_recording():
+        recorder.record(recorder.EVENT_CALL, command=command, exit_code=exit_code)
 
     return not bool(exit_code)
 
 
+def run_concurrently(functions: Sequence[Callable[[], Any]]) -> List[Any]:
+    """
+    Calls all of the given functions at the same time and waits for all of them to finish.
+
+    This is meant for functions that spend most of their time waiting on other processes (e.g. get_command_output),
+    since the GIL is released while waiting; that way, whatever processing one function does with its output
+    overlaps with the others still waiting on theirs.
+
+    :param functions: The functions to call; they don't take any arguments.
+
+    :return: The results of the functions, in the same order as the functions.
+        If any of the functions raised an exception, it is re-raised here.
+    """
+    global _executor
+
+    if _executor is None:
+        import concurrent.futures
+
+        _executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="run-concurrently")
+
+    # The current thread would just be sitting around waiting otherwise, so it might as well run one of them
+    futures = [_executor.submit(function) for function in functions[1:]]
+    results = [functions[0]()] if functions else []
+
+    return results + [future.result() for future in futures]
+
+
+def enable_command_pool(size: Optional[int] = None, timeout: Optional[float] = None) -> None:
+    """
+    Runs every command from now on in a pool of long-lived shell sessions (see utils/command_pool.py).
+
+    Starting up the shells costs about as much as running a command does, so this only pays off for long-lived
+    processes (i.e. the daemon).
+
+    :param size: How many commands can run at the same time.
+    :param timeout: How long (in seconds) a command can take before it's given up on.
+    """
+    global _command_pool
+
+    from easywindowswitcher.utils import command_pool
+
+    disable_command_pool()
+
+    _command_pool = command_pool.CommandPool(
+        size or command_pool.DEFAULT_POOL_SIZE, timeout or command_pool.DEFAULT_TIMEOUT
+    )
+
+
+def disable_command_pool() -> None:
+    """Goes back to running every command in a new process, shutting down the pool's shells."""
+    global _command_pool
+
+    if _command_pool is not None:
+        _command_pool.close()
+        _command_pool = None
+
+
 def log_command(command: List[str]) -> None:
     """Logs the given command."""
-    logger.debug("Command: " + " ".join(command))
+    logger.debug("Command: %s", command)
 
 
 def escape_value(value: OptionValueType) -> OptionValueType:
     """Escapes an option value based on its type."""
+    import shlex
+
     if isinstance(value, str):
         return shlex.quote(value)
     elif isinstance(value, Sequence):
@@ -100,6 +208,54 @@ def escape_value(value: OptionValueType) -> OptionValueType:
         return value
 
 
+class _LazyDecodedOutput:
+    """Decodes a command's output only if (and when) it actually gets logged."""
+
+    def __init__(self, output: Optional[bytes]) -> None:
+        self.output = output
+
+    def __str__(self) -> str:
+        return (self.output or b"").decode("utf8", "replace").rstrip()
+
+
+def _run_pooled_command(
+    command: List[str], shell: bool, stderr_redirect: str, wait: bool, env: Optional[Dict[str, str]]
+) -> "Optional[CommandResult]":
+    assert _command_pool is not None
+
+    return _command_pool.run(command, shell=shell, stderr_redirect=stderr_redirect, wait=wait, env=env)
+
+
+def _get_pooled_command_output(
+    command: List[str], shell: bool, stderr_redirect: str, env: Optional[Dict[str, str]]
+) -> bytes:
+    result = _run_pooled_command(command, shell, stderr_redirect, True, env)
+    assert result is not None
+
+    # Failures are handled the same way as they are for commands run with subprocess
+    if result.exit_code:
+        raise subprocess.CalledProcessError(result.exit_code, command, result.output)
+
+    return result.output
+
+
+def _call_pooled_command(command: List[str], shell: bool, wait: bool, env: Optional[Dict[str, str]]) -> int:
+    from easywindowswitcher.utils.command_pool import CommandTimeout
+
+    try:
+        result = _run_pooled_command(command, shell, STDERR_DISPLAY, wait, env)
+    except (CommandTimeout, OSError) as e:
+        logger.debug("Exception occured while trying to call the command: %s", e)
+        return 1
+
+    return result.exit_code if result else 0
+
+
+def _get_environment(env: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """The full environment for a command that sets the given variables; None (i.e. inherit it) if it sets none."""
+    return dict(os.environ, **env) if env else None
+
+
 def _format_command(command: List[str], shell: bool = False) -> Union[Sequence[str], str]:
     """
     Formats a command depending on whether or not it needs to be called with a shell
@@ -0,0 +1,53 @@
+import os
+import tempfile
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher.utils import service_helpers
+from easywindowswitcher.utils.command_pool import CommandPool, CommandTimeout
+
+
+class TestCommandPool(CustomTestCase):
+    def setUp(self):
+        self.pool = CommandPool(size=2, timeout=2)
+        self.addCleanup(self.pool.close)
+
+    def test_commands_are_framed_in_a_reused_session(self):
+        first = self.pool.run(["printf", "one\\ntwo"])
+        second = self.pool.run(["sh", "-c", "echo three; exit 3"])
+
+        self.assertEqual(first, (0, b"one\ntwo"))
+        self.assertEqual(second, (3, b"three\n"))
+        self.assertEqual(len(self.pool._sessions), 1)
+
+    def test_commands_that_arent_waited_for_still_run_in_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "focused")
+
+            self.assertIsNone(self.pool.run(["sh", "-c", "sleep 0.1; echo 1 > {}".format(path)], wait=False))
+            self.assertEqual(self.pool.run(["cat", path]), (0, b"1\n"))
+
+    def test_dead_and_hung_sessions_are_replaced(self):
+        self.pool.run(["true"])
+        self.pool._sessions[0].kill()
+
+        self.assertEqual(self.pool.run(["echo", "restarted"]), (0, b"restarted\n"))
+
+        self.pool.timeout = 0.1
+
+        with self.assertRaises(CommandTimeout):
+            self.pool.run(["sleep", "5"])
+
+        self.assertEqual(self.pool.run(["echo", "again"]), (0, b"again\n"))
+
+
+class TestPooledServiceHelpers(CustomTestCase):
+    def setUp(self):
+        service_helpers.enable_command_pool()
+        self.addCleanup(service_helpers.disable_command_pool)
+
+    def test_pooled_commands_behave_like_subprocesses(self):
+        self.assertEqual(service_helpers.get_command_output(["echo", "'quoted'"]), "quoted")
+        self.assertEqual(service_helpers.get_command_output(["sh", "-c", "echo failed; exit 1"]), "")
+        self.assertEqual(service_helpers.get_command_output(["sh", "-c", "echo $DISPLAY"], env={"DISPLAY": ":7"}), ":7")
+        self.assertTrue(service_helpers.call_command(["true"]))
+        self.assertFalse(service_helpers.call_command(["false"]))
+        self.assertTrue(service_helpers.call_command(["false"], wait=False))
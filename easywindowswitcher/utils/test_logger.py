@@ -0,0 +1,49 @@
+import logging
+import os
+import tempfile
+from unittest import mock
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher.utils import logger
+
+
+class TestLogger(CustomTestCase):
+    def test_log_level_comes_from_the_environment(self):
+        levels = [("debug", logging.DEBUG), ("WARNING", logging.WARNING), ("", logging.INFO), ("nope", logging.INFO)]
+
+        for value, level in levels:
+            with mock.patch.dict(os.environ, {logger.LOG_LEVEL_ENVIRONMENT_VARIABLE: value}):
+                self.assertEqual(logger.get_log_level(), level, value)
+
+    def test_background_file_handler_writes_every_record_by_close(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log_file = os.path.join(folder, "test.log")
+
+            handler = logger.BackgroundFileHandler(log_file)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+
+            for i in range(100):
+                handler.handle(logging.makeLogRecord({"msg": "message %s", "args": (i,)}))
+
+            handler.close()
+
+            with open(log_file) as f:
+                self.assertEqual(f.read().splitlines(), ["message {}".format(i) for i in range(100)])
+
+    def test_background_file_handler_drops_records_if_the_log_file_cant_be_opened(self):
+        with tempfile.TemporaryDirectory() as folder:
+            # Unlike a read-only folder, a missing one can't be written to even when running as root
+            handler = logger.BackgroundFileHandler(os.path.join(folder, "missing", "test.log"))
+
+            with mock.patch("sys.stderr") as stderr:
+                handler.handle(logging.makeLogRecord({"msg": "message"}))
+                handler.thread.join(5)
+
+            self.assertTrue(handler.failed)
+            stderr.write.assert_called_once()
+
+            for i in range(100):
+                handler.handle(logging.makeLogRecord({"msg": "message %s", "args": (i,)}))
+
+            self.assertTrue(handler.records.empty())
+
+            handler.close()
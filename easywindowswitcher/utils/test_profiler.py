@@ -0,0 +1,49 @@
+import io
+import json
+import os
+import tempfile
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher.utils import profiler
+
+
+class TestProfiler(CustomTestCase):
+    def tearDown(self):
+        profiler.finish()
+
+    def test_spans_are_only_recorded_while_enabled(self):
+        self.assertIs(profiler.span("parse"), profiler.NULL_SPAN)
+
+    def test_spans_are_written_as_json_lines_and_chrome_trace_events(self):
+        stream = io.StringIO()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            trace_path = os.path.join(temp_dir, "trace.json")
+            profiler.enable(stream=stream, trace_path=trace_path)
+
+            with profiler.span("direction", profiler.CATEGORY_COMMAND, value="left"):
+                with profiler.span("wmctrl", profiler.CATEGORY_SUBPROCESS):
+                    pass
+
+            profiler.finish()
+
+            with open(trace_path) as trace_file:
+                events = json.load(trace_file)["traceEvents"]
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        names = [line["name"] for line in lines if line["category"] != profiler.CATEGORY_STARTUP]
+
+        self.assertEqual(names, ["direction", "wmctrl"])
+        self.assertEqual(lines[-2]["args"], {"value": "left"})
+        self.assertTrue({"direction", "wmctrl"} <= {event["name"] for event in events})
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+
+    def test_histogram_percentiles(self):
+        histogram = profiler.LatencyHistogram(size=100)
+
+        for latency in range(1, 201):
+            histogram.record(latency / 1000)
+
+        # Only the most recent 100 latencies (101ms to 200ms) are kept
+        self.assertEqual(
+            histogram.report(), {"count": 200.0, "p50_ms": 150.0, "p95_ms": 195.0, "p99_ms": 199.0}
+        )
@@ -0,0 +1,35 @@
+import os
+import tempfile
+from unittest import mock
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher.utils import recorder
+from easywindowswitcher.utils.service_helpers import call_command, get_command_output
+
+
+class TestRecorder(CustomTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+
+        self.trace_path = os.path.join(temp_dir.name, "session.trace")
+
+    def test_nothing_is_recorded_while_disabled(self):
+        with mock.patch.dict(os.environ, {recorder.RECORD_ENVIRONMENT_VARIABLE: ""}):
+            get_command_output(["echo", "hello"])
+
+        self.assertFalse(os.path.exists(self.trace_path))
+
+    def test_commands_are_recorded_by_invocation(self):
+        with mock.patch.dict(os.environ, {recorder.RECORD_ENVIRONMENT_VARIABLE: self.trace_path}):
+            recorder.record(recorder.EVENT_INVOCATION, args=["direction", "left"])
+            get_command_output(["echo", "hello"])
+            call_command(["true"])
+
+        invocation, = recorder.group_by_invocation(recorder.read_trace(self.trace_path))
+
+        self.assertEqual(invocation["args"], ["direction", "left"])
+        self.assertEqual(
+            [(event["event"], event["command"]) for event in invocation["events"]],
+            [(recorder.EVENT_OUTPUT, ["echo", "hello"]), (recorder.EVENT_CALL, ["true"])]
+        )
+        self.assertEqual(invocation["events"][0]["output"], "hello")
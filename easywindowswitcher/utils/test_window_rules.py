@@ -0,0 +1,144 @@
+import json
+import os
+import tempfile
+from unittest import mock
+from utils.helpers_test import CustomTestCase
+from easywindowswitcher.utils import window_rules
+from easywindowswitcher.utils.window_rules import WindowFilter
+
+
+class TestWindowFilter(CustomTestCase):
+    def test_default_rules_exclude_desktops_and_undecorated_windows(self):
+        window_filter = WindowFilter([], [])
+
+        self.assertTrue(window_filter.is_navigable("code.Code", "main.py", 0, 24, 800, 600))
+        self.assertFalse(window_filter.is_navigable("N/A", "unity-launcher", 0, 24, 64, 1056))
+        self.assertFalse(window_filter.is_navigable("nemo-desktop.Nemo-desktop", "Desktop", 0, 24, 1920, 1080))
+        self.assertFalse(window_filter.is_navigable("nautilus.Nautilus", "Files", 0, 0, 1440, 2560))
+
+    def test_rules_combine_classes_patterns_and_geometry(self):
+        window_filter = WindowFilter(
+            [
+                {"class": ["xfce4-panel.Xfce4-panel", "plank.Plank"]},
+                {"class_pattern": "^conky\\.", "max_height": 200},
+                {"title_pattern": "^Picture-in-Picture$"},
+                {"class": "code.Code", "title_pattern": "Settings"},
+                {"max_width": 10},
+            ],
+            [{"class": "nemo-desktop.Nemo-desktop"}]
+        )
+
+        self.assertFalse(window_filter.is_navigable("plank.Plank", "Dock", 0, 24, 1920, 48))
+        self.assertFalse(window_filter.is_navigable("conky.Conky", "Stats", 0, 24, 300, 150))
+        self.assertTrue(window_filter.is_navigable("conky.Conky", "Stats", 0, 24, 300, 600))
+        self.assertTrue(window_filter.is_navigable("myconky.Conky", "Stats", 0, 24, 300, 150))
+        self.assertFalse(window_filter.is_navigable("firefox.Firefox", "Picture-in-Picture", 0, 24, 480, 270))
+        self.assertTrue(window_filter.is_navigable("firefox.Firefox", "Picture-in-Picture - Docs", 0, 24, 480, 270))
+        self.assertFalse(window_filter.is_navigable("code.Code", "Settings - main.py", 0, 24, 800, 600))
+        self.assertTrue(window_filter.is_navigable("code.Code", "main.py", 0, 24, 800, 600))
+        self.assertFalse(window_filter.is_navigable("tiny.Tiny", "", 0, 24, 8, 8))
+        self.assertTrue(window_filter.is_navigable("nemo-desktop.Nemo-desktop", "Desktop", 0, 24, 1920, 1080))
+
+    def test_patterns_keep_their_own_inline_flags(self):
+        window_filter = WindowFilter(
+            [
+                {"title_pattern": "(?i)picture-in-picture"},
+                {"title_pattern": "^Settings$"},
+                {"class_pattern": "(?x) ^conky \\. # the conky widgets"},
+                {"class": "code.Code", "title_pattern": "(?i)^untitled"},
+            ],
+            []
+        )
+
+        self.assertFalse(window_filter.is_navigable("firefox.Firefox", "PICTURE-IN-PICTURE", 0, 24, 480, 270))
+        self.assertFalse(window_filter.is_navigable("gnome-control-center.Gnome-control", "Settings", 0, 24, 1, 1))
+        self.assertTrue(window_filter.is_navigable("gnome-control-center.Gnome-control", "settings", 0, 24, 1, 1))
+        self.assertFalse(window_filter.is_navigable("conky.Conky", "Stats", 0, 24, 300, 150))
+        self.assertFalse(window_filter.is_navigable("code.Code", "UNTITLED-1", 0, 24, 800, 600))
+
+    def test_patterns_keep_their_own_groups(self):
+        window_filter = WindowFilter(
+            [
+                {"title_pattern": "^(?P<a>Foo)$"},
+                {"title_pattern": "^(?P<a>Bar)$"},
+                {"title_pattern": "^(a)\\1$"},
+                {"title_pattern": "^(b)\\1$"},
+                {"title_pattern": "^Baz$"},
+            ],
+            []
+        )
+
+        for title in ("Foo", "Bar", "aa", "bb", "Baz"):
+            self.assertFalse(window_filter.is_navigable("code.Code", title, 0, 24, 800, 600), title)
+
+        for title in ("Foo Bar", "ab", "ba", "b"):
+            self.assertTrue(window_filter.is_navigable("code.Code", title, 0, 24, 800, 600), title)
+
+    def test_invalid_rules_are_rejected(self):
+        rules = (
+            {}, {"klass": "code.Code"}, {"class_pattern": "("}, {"min_width": "10"},
+            {"max_width": float("nan")}, {"min_height": float("inf")}
+        )
+
+        for rule in rules:
+            with self.assertRaises(ValueError):
+                WindowFilter([rule], [])
+
+
+class TestGetWindowFilter(CustomTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+
+        self.rules_path = os.path.join(temp_dir.name, "window_rules.json")
+
+        patcher = mock.patch.dict(os.environ, {window_rules.WINDOW_RULES_ENVIRONMENT_VARIABLE: self.rules_path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_rules(self, rules, mtime):
+        with open(self.rules_path, "w") as rules_file:
+            rules_file.write(rules if isinstance(rules, str) else json.dumps(rules))
+
+        os.utime(self.rules_path, (mtime, mtime))
+
+    def test_rule_file_is_only_compiled_again_once_it_changes(self):
+        self.write_rules({"exclude": [{"class": "plank.Plank"}]}, mtime=1)
+
+        window_filter = window_rules.get_window_filter()
+
+        self.assertIs(window_rules.get_window_filter(), window_filter)
+        self.assertFalse(window_filter.is_navigable("plank.Plank", "Dock", 0, 24, 1920, 48))
+
+        self.write_rules({"exclude": []}, mtime=2)
+
+        self.assertTrue(window_rules.get_window_filter().is_navigable("plank.Plank", "Dock", 0, 24, 1920, 48))
+
+    def test_invalid_rules_are_ignored_without_the_rest(self):
+        self.write_rules(
+            '{"exclude": [{"class_pattern": "("}, {"max_width": NaN}, {"title_pattern": "(?i)dock"}]}', mtime=1
+        )
+
+        with self.assertLogs(window_rules.logger, "WARNING"):
+            window_filter = window_rules.get_window_filter()
+
+        self.assertFalse(window_filter.is_navigable("plank.Plank", "DOCK", 0, 24, 1920, 48))
+        self.assertTrue(window_filter.is_navigable("code.Code", "main.py", 0, 24, 800, 600))
+
+    def test_rules_with_the_same_group_names_are_all_loaded(self):
+        self.write_rules(
+            {"exclude": [{"title_pattern": "^(?P<a>Foo)$"}, {"title_pattern": "^(?P<a>Bar)$"}]}, mtime=1
+        )
+
+        window_filter = window_rules.get_window_filter()
+
+        self.assertFalse(window_filter.is_navigable("code.Code", "Foo", 0, 24, 800, 600))
+        self.assertFalse(window_filter.is_navigable("code.Code", "Bar", 0, 24, 800, 600))
+
+    def test_invalid_rule_file_falls_back_to_the_default_rules(self):
+        self.write_rules("{not json", mtime=1)
+
+        window_filter = window_rules.get_window_filter()
+
+        self.assertTrue(window_filter.is_navigable("plank.Plank", "Dock", 0, 24, 1920, 48))
+        self.assertFalse(window_filter.is_navigable("N/A", "unity-launcher", 0, 24, 64, 1056))
@@ -0,0 +1,418 @@
+import logging
+import math
+import os
+import re
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional, Pattern, Sequence, Tuple
+from typing import Callable, List, Set  # noqa
+from easywindowswitcher.utils.paths import get_window_rules_path
+
+logger = logging.getLogger(__name__)
+
+# Note: Every backend filters every window through here, so the rules are compiled once (per version of the rule file)
+# and checking a window is a set lookup, a regex search of its class and of its title, and a few comparisons, however
+# many rules there are. (A regex that's an alternation of many patterns stays fast, since the regex engine first checks
+# the characters that any of the patterns can start with.)
+#
+# The rule file is JSON, with lists of rules that exclude windows from navigation, and rules that include them
+# again regardless (e.g. to get back a window that one of the default rules excludes):
+#
+#     {
+#         "exclude": [
+#             {"class": ["xfce4-panel.Xfce4-panel", "plank.Plank"]},
+#             {"class_pattern": "^conky\\.", "max_height": 200},
+#             {"title_pattern": "Picture-in-Picture"}
+#         ],
+#         "include": [
+#             {"class": "nemo-desktop.Nemo-desktop"}
+#         ]
+#     }
+#
+# A rule matches a window when all of its conditions do:
+#
+# - class: The window's exact class (or any of a list of them), as shown by `wmctrl -l -x`.
+# - class_pattern: A regex that matches anywhere in the window's class (anchor it with ^ and $ to match all of it).
+# - title_pattern: A regex that matches anywhere in the window's title.
+# - min_x/max_x/min_y/max_y: Bounds (inclusive) on the window's offsets, as shown by `wmctrl -l -G`.
+# - min_width/max_width/min_height/max_height: Bounds (inclusive) on the window's size.
+
+# The rule file to use instead of the one in the project folder
+WINDOW_RULES_ENVIRONMENT_VARIABLE = "EASYWINDOWSWITCHER_WINDOW_RULES"
+
+# The rules that always apply, before any of the rule file's:
+#
+# - Any 'window' that doesn't have a window class isn't a window (e.g. unity-launcher).
+# - Windows with the nemo-desktop class are just the... well, desktop. And we don't want to focus the desktop.
+# - Any window where the y-offset is actually 0 means that it doesn't have any window decoration and is therefore
+#   not a window (e.g. Nautilus). Additionally, I don't think I've seen a negative y-offset value for a legit window,
+#   so we can shortcut that logic.
+DEFAULT_EXCLUDE_RULES = [
+    {"class": ["N/A", "nemo-desktop.Nemo-desktop"]},
+    {"max_y": 0},
+]  # type: List[Dict[str, Any]]
+
+TEXT_CONDITIONS = ("class", "class_pattern", "title_pattern")
+
+PATTERN_CONDITIONS = ("class_pattern", "title_pattern")
+
+# The (global) inline flags at the start of a pattern, e.g. "(?i)"
+INLINE_FLAGS_PATTERN = re.compile(r"\(\?([aiLmsux]+)\)")
+
+# The order of a rule's bounds (see Bounds)
+BOUND_CONDITIONS = (
+    "min_x", "max_x", "min_y", "max_y", "min_width", "max_width", "min_height", "max_height"
+)
+
+# The (inclusive) bounds of a rule, in the order of BOUND_CONDITIONS; unbounded ones are infinite
+Bounds = Tuple[float, float, float, float, float, float, float, float]
+
+UNBOUNDED = (-math.inf, math.inf) * 4  # type: Bounds
+
+
+class CompoundRule(NamedTuple):
+    """A rule that combines conditions of different kinds (e.g. a class pattern and a size)."""
+    class_pattern: Optional[Pattern[str]]
+    title_pattern: Optional[Pattern[str]]
+    bounds: Bounds
+
+
+class CompiledRules:
+    """
+    A list of rules compiled into a single predicate (see get_expression).
+
+    Every rule is sorted into whichever of the following checks it boils down to:
+
+    - Rules that are just exact classes are merged into one set of classes.
+    - Rules that are just class patterns are merged into one alternation regex, and so are the title patterns
+      (apart from patterns with capturing groups, which keep a regex of their own; see _compile_alternation).
+    - Rules that are just bounds are kept as tuples of bounds; these are few (e.g. the y offset of the defaults).
+    - Anything else is a compound rule; those with an exact class are only checked for windows of that class.
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]]) -> None:
+        """
+        :raises ValueError: When one of the rules is invalid (e.g. an unknown condition or a bad regex).
+        """
+        classes = set()  # type: Set[str]
+        patterns = {condition: [] for condition in PATTERN_CONDITIONS}  # type: Dict[str, List[str]]
+
+        self.bounds = []  # type: List[Bounds]
+        self.compound_rules_by_class = {}  # type: Dict[str, List[CompoundRule]]
+        self.compound_rules = []  # type: List[CompoundRule]
+
+        for rule in rules:
+            rule_classes = _get_classes(rule)
+            rule_patterns = _get_patterns(rule)
+            rule_bounds = _get_bounds(rule)
+
+            if rule_classes is not None and not rule_patterns and rule_bounds == UNBOUNDED:
+                classes.update(rule_classes)
+            elif rule_classes is None and len(rule_patterns) == 1 and rule_bounds == UNBOUNDED:
+                condition, pattern = rule_patterns.popitem()
+                patterns[condition].append(pattern)
+            elif rule_classes is None and not rule_patterns:
+                self.bounds.append(rule_bounds)
+            else:
+                compound_rule = CompoundRule(
+                    _compile_pattern(rule_patterns.get("class_pattern")),
+                    _compile_pattern(rule_patterns.get("title_pattern")),
+                    rule_bounds
+                )
+
+                if rule_classes is None:
+                    self.compound_rules.append(compound_rule)
+                else:
+                    for window_class in rule_classes:
+                        self.compound_rules_by_class.setdefault(window_class, []).append(compound_rule)
+
+        self.classes = frozenset(classes)
+        self.class_patterns = _compile_alternation(patterns["class_pattern"])
+        self.title_patterns = _compile_alternation(patterns["title_pattern"])
+
+    def get_expression(self, name: str, namespace: Dict[str, Any]) -> str:
+        """
+        Gets the rules as a single Python expression of the window's class, title, x, y, width, and height,
+        adding whatever it refers to (e.g. the set of classes) to the namespace that it's evaluated in.
+
+        Only the checks that these rules actually need are included (with their bounds as constants in the namespace,
+        rather than spliced into the source), so checking a window against the default rules is just a set lookup and
+        a comparison.
+
+        :param name: What to prefix the names added to the namespace with.
+        """
+        checks = []  # type: List[str]
+
+        if self.classes:
+            namespace[name + "_classes"] = self.classes
+            checks.append("window_class in {}_classes".format(name))
+
+        for index, bounds in enumerate(self.bounds):
+            checks.append("({})".format(_get_bounds_expression(bounds, "{}_bounds_{}".format(name, index), namespace)))
+
+        for index, pattern in enumerate(self.class_patterns):
+            namespace["{}_search_class_{}".format(name, index)] = pattern.search
+            checks.append("{}_search_class_{}(window_class) is not None".format(name, index))
+
+        for index, pattern in enumerate(self.title_patterns):
+            namespace["{}_search_title_{}".format(name, index)] = pattern.search
+            checks.append("{}_search_title_{}(title) is not None".format(name, index))
+
+        if self.compound_rules_by_class or self.compound_rules:
+            namespace[name + "_compound_rules_by_class"] = self.compound_rules_by_class
+            namespace[name + "_compound_rules"] = self.compound_rules
+            namespace["matches_compound_rule"] = _matches_compound_rule
+
+            checks.append(
+                "any(matches_compound_rule(rule, window_class, title, x, y, width, height) for rule in "
+                "{0}_compound_rules_by_class.get(window_class, {0}_compound_rules))".format(name)
+            )
+
+            # The rules without a class still apply to the classes that have their own compound rules
+            if self.compound_rules_by_class and self.compound_rules:
+                checks.append(
+                    "(window_class in {0}_compound_rules_by_class and any(matches_compound_rule("
+                    "rule, window_class, title, x, y, width, height) for rule in {0}_compound_rules))".format(name)
+                )
+
+        return " or ".join(checks) or "False"
+
+
+class WindowFilter:
+    """Decides which windows can be navigated to, from the default rules plus the user's rule file."""
+
+    def __init__(self, exclude_rules: Sequence[Dict[str, Any]], include_rules: Sequence[Dict[str, Any]]) -> None:
+        """
+        :raises ValueError: When one of the rules is invalid.
+        """
+        self.exclude_rules = CompiledRules(list(DEFAULT_EXCLUDE_RULES) + list(exclude_rules))
+        self.include_rules = CompiledRules(include_rules)
+
+        namespace = {}  # type: Dict[str, Any]
+
+        # Most windows aren't excluded at all, so the include rules rarely need to be checked
+        source = "lambda window_class, title, x, y, width, height: not ({}) or ({})".format(
+            self.exclude_rules.get_expression("exclude", namespace),
+            self.include_rules.get_expression("include", namespace)
+        )
+
+        # Whether a window (by its class, title, x, y, width, and height) can be navigated to
+        self.is_navigable = eval(source, namespace)  # type: Callable[[str, str, int, int, int, int], bool]
+
+
+# The compiled filter, along with the version of the rule file it was compiled from (see _get_rules_file_version)
+_cached_filter = None  # type: Optional[Tuple[Tuple[Any, ...], WindowFilter]]
+
+
+def get_window_filter() -> WindowFilter:
+    """
+    Gets the filter for the current rules, only compiling the rule file again when it has changed
+    (which keeps a long-running daemon up to date with it).
+
+    An invalid rule file is logged and ignored (i.e. only the default rules apply), rather than breaking switching.
+    """
+    global _cached_filter
+
+    path = os.environ.get(WINDOW_RULES_ENVIRONMENT_VARIABLE) or get_window_rules_path()
+    version = _get_rules_file_version(path)
+
+    if _cached_filter is not None and _cached_filter[0] == version:
+        return _cached_filter[1]
+
+    window_filter = _load_window_filter(path)
+    _cached_filter = (version, window_filter)
+
+    return window_filter
+
+
+def _get_rules_file_version(path: str) -> Tuple[Any, ...]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path,)
+
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def _load_window_filter(path: str) -> WindowFilter:
+    if not os.path.exists(path):
+        return WindowFilter([], [])
+
+    # Only imported when there are rules to read, so that the default rules don't pay for it
+    import json
+
+    try:
+        with open(path) as rules_file:
+            rules = json.load(rules_file)
+
+        if not isinstance(rules, dict) or set(rules) - {"exclude", "include"}:
+            raise ValueError("expected an object with just 'exclude' and 'include' lists of rules")
+
+        return WindowFilter(
+            _get_valid_rules(path, rules.get("exclude", [])), _get_valid_rules(path, rules.get("include", []))
+        )
+    except (OSError, ValueError, TypeError, re.error) as e:
+        logger.warning("Ignoring the invalid window rules in %s: %s", path, e)
+        return WindowFilter([], [])
+
+
+def _get_valid_rules(path: str, rules: Any) -> List[Dict[str, Any]]:
+    """The rules that can be compiled; the others are logged and ignored, so that one bad rule doesn't take the rest."""
+    if not isinstance(rules, list):
+        raise ValueError("expected a list of rules, got: {}".format(rules))
+
+    valid_rules = []  # type: List[Dict[str, Any]]
+
+    for rule in rules:
+        try:
+            CompiledRules([rule])
+        except (ValueError, TypeError, re.error) as e:
+            logger.warning("Ignoring the invalid window rule %s in %s: %s", rule, path, e)
+        else:
+            valid_rules.append(rule)
+
+    return valid_rules
+
+
+def _get_classes(rule: Dict[str, Any]) -> Optional[FrozenSet[str]]:
+    if not isinstance(rule, dict) or not rule:
+        raise ValueError("expected a rule to be an object with some conditions, got: {}".format(rule))
+
+    unknown_conditions = set(rule) - set(TEXT_CONDITIONS) - set(BOUND_CONDITIONS)
+
+    if unknown_conditions:
+        raise ValueError("unknown rule conditions: {}".format(", ".join(sorted(unknown_conditions))))
+
+    if "class" not in rule:
+        return None
+
+    classes = rule["class"] if isinstance(rule["class"], list) else [rule["class"]]
+
+    if not classes or not all(isinstance(window_class, str) for window_class in classes):
+        raise ValueError("expected 'class' to be a class or a list of them, got: {}".format(rule["class"]))
+
+    return frozenset(classes)
+
+
+def _get_patterns(rule: Dict[str, Any]) -> Dict[str, str]:
+    """The rule's pattern conditions (by condition), checked to be valid regexes."""
+    patterns = {}  # type: Dict[str, str]
+
+    for condition in PATTERN_CONDITIONS:
+        if condition in rule:
+            try:
+                re.compile(rule[condition])
+            except (re.error, TypeError) as e:
+                raise ValueError("invalid {}: {} ({})".format(condition, rule[condition], e))
+
+            patterns[condition] = rule[condition]
+
+    return patterns
+
+
+def _compile_pattern(pattern: Optional[str]) -> Optional[Pattern[str]]:
+    return re.compile(pattern) if pattern is not None else None
+
+
+def _compile_alternation(patterns: Sequence[str]) -> List[Pattern[str]]:
+    """
+    Compiles the patterns into as few regexes as possible, which together match whatever any of the patterns match.
+
+    The patterns without capturing groups are merged into a single alternation. The ones with capturing groups are
+    compiled on their own, since their groups would clash (e.g. two patterns with a group named "a") or be renumbered
+    (breaking backreferences like \\1) in an alternation.
+    """
+    compiled_patterns = []  # type: List[Pattern[str]]
+    mergeable_patterns = []  # type: List[str]
+
+    for pattern in patterns:
+        compiled_pattern = re.compile(pattern)
+
+        if compiled_pattern.groups:
+            compiled_patterns.append(compiled_pattern)
+        else:
+            mergeable_patterns.append(pattern)
+
+    if len(mergeable_patterns) == 1:
+        compiled_patterns.insert(0, re.compile(mergeable_patterns[0]))
+    elif mergeable_patterns:
+        compiled_patterns.insert(0, re.compile("|".join(map(_get_pattern_group, mergeable_patterns))))
+
+    return compiled_patterns
+
+
+def _get_pattern_group(pattern: str) -> str:
+    """
+    Wraps the pattern in a group, so that it can be part of an alternation. Any (global) inline flags at the start of
+    the pattern (e.g. "(?i)picture") are only allowed at the start of the whole regex, so they're scoped to the group
+    instead (e.g. "(?i:picture)").
+    """
+    flags = ""
+
+    while True:
+        match = INLINE_FLAGS_PATTERN.match(pattern)
+
+        if match is None:
+            # A verbose pattern can end in a comment, which would swallow the end of the group
+            return "(?{}:{}{})".format(flags, pattern, "\n" if "x" in flags else "")
+
+        flags += match.group(1)
+        pattern = pattern[match.end():]
+
+
+def _get_bounds(rule: Dict[str, Any]) -> Bounds:
+    bounds = list(UNBOUNDED)
+
+    for index, condition in enumerate(BOUND_CONDITIONS):
+        if condition in rule:
+            # JSON allows NaN and Infinity, which would never (or always) match
+            if (
+                isinstance(rule[condition], bool)
+                or not isinstance(rule[condition], (int, float))
+                or not math.isfinite(rule[condition])
+            ):
+                raise ValueError("expected {} to be a finite number, got: {}".format(condition, rule[condition]))
+
+            bounds[index] = rule[condition]
+
+    return tuple(bounds)  # type: ignore
+
+
+def _get_bounds_expression(bounds: Bounds, name: str, namespace: Dict[str, Any]) -> str:
+    """
+    The comparisons of the bounds that are actually bounded (e.g. "y <= exclude_bounds_0_max_y"), as a Python
+    expression, adding the bounds that it compares against to the namespace that it's evaluated in.
+
+    :param name: What to prefix the names of the bounds with.
+    """
+    comparisons = []  # type: List[str]
+
+    for index, variable in enumerate(("x", "y", "width", "height")):
+        minimum, maximum = bounds[index * 2], bounds[(index * 2) + 1]
+
+        if minimum != -math.inf:
+            namespace["{}_min_{}".format(name, variable)] = minimum
+            comparisons.append("{0} >= {1}_min_{0}".format(variable, name))
+
+        if maximum != math.inf:
+            namespace["{}_max_{}".format(name, variable)] = maximum
+            comparisons.append("{0} <= {1}_max_{0}".format(variable, name))
+
+    return " and ".join(comparisons) or "True"
+
+
+def _is_within(bounds: Bounds, x: int, y: int, width: int, height: int) -> bool:
+    return (
+        bounds[0] <= x <= bounds[1]
+        and bounds[2] <= y <= bounds[3]
+        and bounds[4] <= width <= bounds[5]
+        and bounds[6] <= height <= bounds[7]
+    )
+
+
+def _matches_compound_rule(
+    rule: CompoundRule, window_class: str, title: str, x: int, y: int, width: int, height: int
+) -> bool:
+    return (
+        _is_within(rule.bounds, x, y, width, height)
+        and (rule.class_pattern is None or rule.class_pattern.search(window_class) is not None)
+        and (rule.title_pattern is None or rule.title_pattern.search(title) is not None)
+    )
@@ -9,9 +9,14 @@ setup(
         "Click>=7.0",
         "typing>=3.6.4"
     ],
+    extras_require={
+        # Indexes desktops with lots of windows faster in the daemon (see services/window_table.py)
+        "numpy": ["numpy"]
+    },
     entry_points={
         "console_scripts": [
-            "easywindowswitcher = easywindowswitcher.main:cli"
+            "easywindowswitcher = easywindowswitcher.fast_main:main",
+            "easywindowswitcher-client = easywindowswitcher.client:main"
         ]
     }
 )